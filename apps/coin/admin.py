@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from django.contrib import admin
 
-from apps.coin.models import CoinAccount, CoinEvent, CoinLedgerEntry, MonthlyCoinSnapshot
+from apps.coin.models import CoinAccount, CoinAccountBalance, CoinEvent, CoinLedgerEntry, MonthlyCoinSnapshot
 
 
 @admin.register(CoinAccount)
@@ -21,6 +21,22 @@ class CoinAccountAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(CoinAccountBalance)
+class CoinAccountBalanceAdmin(admin.ModelAdmin):
+    list_display = ("account_key", "balance_cents", "updated_at")
+    search_fields = ("account_key",)
+    readonly_fields = ("account_key", "balance_cents", "created_at", "updated_at")
+
+    def has_add_permission(self, request):  # type: ignore[override]
+        return False
+
+    def has_change_permission(self, request, obj=None):  # type: ignore[override]
+        return False
+
+    def has_delete_permission(self, request, obj=None):  # type: ignore[override]
+        return False
+
+
 @admin.register(CoinEvent)
 class CoinEventAdmin(admin.ModelAdmin):
     list_display = ("event_type", "created_by", "occurred_at", "idempotency_key", "ruleset_version")
@@ -7,3 +7,9 @@ class CoinConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.coin"
     verbose_name = "Coin"
+
+    def ready(self) -> None:
+        try:
+            import apps.coin.signals  # noqa: F401
+        except ImportError:
+            pass
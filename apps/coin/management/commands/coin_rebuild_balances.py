@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.coin.services.balances import find_balance_mismatches, rebuild_account_balances
+
+
+class Command(BaseCommand):
+    help = "Verify or rebuild the CoinAccountBalance projection from the raw SLC ledger."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            default=False,
+            help="Read-only: report projection drift and exit non-zero if any is found.",
+        )
+        parser.add_argument(
+            "--account-key",
+            action="append",
+            dest="account_keys",
+            default=None,
+            help="Limit to this account_key (repeatable).",
+        )
+
+    def handle(self, *args, **options) -> None:
+        account_keys = options.get("account_keys")
+
+        if options["verify"]:
+            mismatches = [m for m in find_balance_mismatches(account_keys) if m.projected_cents is not None]
+            for mismatch in mismatches:
+                self.stdout.write(
+                    f"- {mismatch.account_key} projected={mismatch.projected_cents} ledger={mismatch.ledger_cents}"
+                )
+            if mismatches:
+                raise CommandError(f"coin_rebuild_balances verify failed: balance_mismatches={len(mismatches)}")
+            self.stdout.write(self.style.SUCCESS("coin_rebuild_balances verify ok: balance_mismatches=0"))
+            return
+
+        written = rebuild_account_balances(account_keys)
+        self.stdout.write(self.style.SUCCESS(f"coin_rebuild_balances complete: rows_written={written}"))
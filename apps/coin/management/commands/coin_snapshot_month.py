@@ -1,13 +1,12 @@
 from __future__ import annotations
 
-import hashlib
 import json
 from pathlib import Path
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 
-from apps.coin.services.snapshot import generate_monthly_coin_snapshot
+from apps.coin.services.snapshot import generate_monthly_coin_snapshot, parse_period
 
 
 class Command(BaseCommand):
@@ -22,12 +21,8 @@ class Command(BaseCommand):
         month: str = options["month"]
         output_dir = options.get("output_dir")
         dry_run = options["dry_run"]
-
         try:
-            result = generate_monthly_coin_snapshot(
-                period=month,
-                dry_run=dry_run,
-            )
+            parse_period(month)
         except Exception as exc:
             raise CommandError(str(exc)) from exc
 
@@ -35,9 +30,21 @@ class Command(BaseCommand):
         base_dir.mkdir(parents=True, exist_ok=True)
 
         csv_path = base_dir / "snapshot.csv"
-        csv_path.write_bytes(result.csv_bytes)
+        # Stream into a sibling file and rename, so a failed run never leaves a partial CSV.
+        partial_path = base_dir / "snapshot.csv.partial"
+        try:
+            with partial_path.open("wb") as csv_stream:
+                result = generate_monthly_coin_snapshot(
+                    period=month,
+                    dry_run=dry_run,
+                    csv_stream=csv_stream,
+                )
+        except Exception as exc:
+            partial_path.unlink(missing_ok=True)
+            raise CommandError(str(exc)) from exc
+        partial_path.replace(csv_path)
 
-        csv_hash = hashlib.sha256(result.csv_bytes).hexdigest()
+        csv_hash = result.csv_sha256
         manifest = {
             "period": result.period,
             "ledger_hash": result.ledger_hash,
@@ -45,6 +52,8 @@ class Command(BaseCommand):
             "total_events": result.total_events,
             "total_entries": result.total_entries,
             "total_volume_cents": result.total_volume_cents,
+            "merkle_root": result.merkle_root,
+            "merkle_day_roots": result.merkle_day_roots,
         }
 
         manifest_path = base_dir / "manifest.json"
@@ -52,4 +61,8 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS(f"Wrote snapshot CSV to {csv_path.resolve()}"))
         self.stdout.write(self.style.SUCCESS(f"Wrote manifest to {manifest_path.resolve()}"))
-        self.stdout.write(self.style.SUCCESS(f"ledger_hash={result.ledger_hash} csv_sha256={csv_hash}"))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"ledger_hash={result.ledger_hash} csv_sha256={csv_hash} merkle_root={result.merkle_root}"
+            )
+        )
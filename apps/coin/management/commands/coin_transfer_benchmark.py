@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from apps.coin.models import CoinAccount
+from apps.coin.services.balances import find_balance_mismatches
+from apps.coin.services.ledger import create_transfer, mint_for_payment
+from apps.payments.models import PaymentEvent, PaymentEventProvider, PaymentEventStatus
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure SLC transfers/sec with every transfer touching one hot account. "
+        "Creates users and ledger rows; run it against a scratch database."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--transfers", type=int, default=1000, help="Total transfers across all threads.")
+        parser.add_argument("--threads", type=int, default=8, help="Concurrent workers, one connection each.")
+        parser.add_argument("--amount-cents", type=int, default=1, help="Amount per transfer.")
+        parser.add_argument(
+            "--hot-side",
+            choices=["sender", "receiver"],
+            default="sender",
+            help="Whether the hot account is debited (contended funds check) or credited.",
+        )
+        parser.add_argument("--force", action="store_true", default=False, help="Allow running with DEBUG off.")
+
+    def _funded_user(self, token: str, index: int, amount_cents: int) -> User:
+        user = User.objects.create_user(
+            email=f"bench-{token}-{index}@example.com",
+            password=uuid.uuid4().hex,
+            handle=f"bench{token}{index}",
+            name=f"Bench {index}",
+        )
+        if amount_cents > 0:
+            provider_event_id = f"bench_{token}_{index}"
+            payment_event = PaymentEvent.objects.create(
+                provider=PaymentEventProvider.STRIPE,
+                provider_event_id=provider_event_id,
+                event_type="benchmark.funding",
+                user=user,
+                amount_cents=amount_cents,
+                status=PaymentEventStatus.RECEIVED,
+                raw_body_hash=hashlib.sha256(provider_event_id.encode("utf-8")).hexdigest(),
+                verified_at=timezone.now(),
+            )
+            mint_for_payment(payment_event=payment_event)
+        return user
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError("Refusing to write benchmark data with DEBUG off; pass --force on a scratch database.")
+        transfers = max(1, options["transfers"])
+        threads = max(1, options["threads"])
+        amount = max(1, options["amount_cents"])
+        hot_is_sender = options["hot_side"] == "sender"
+        per_thread = [transfers // threads + (1 if i < transfers % threads else 0) for i in range(threads)]
+
+        token = uuid.uuid4().hex[:8]
+        hot = self._funded_user(token, 0, transfers * amount if hot_is_sender else 0)
+        peers = [
+            self._funded_user(token, i + 1, 0 if hot_is_sender else per_thread[i] * amount) for i in range(threads)
+        ]
+
+        lock = threading.Lock()
+        latencies: list[float] = []
+        outcomes = {"ok": 0, "insufficient_funds": 0, "error": 0}
+
+        def worker(peer: User, count: int) -> None:
+            sender, receiver = (hot, peer) if hot_is_sender else (peer, hot)
+            local: list[float] = []
+            local_outcomes = dict.fromkeys(outcomes, 0)
+            try:
+                for _ in range(count):
+                    started = time.perf_counter()
+                    try:
+                        create_transfer(sender=sender, receiver=receiver, amount_cents=amount)
+                        local_outcomes["ok"] += 1
+                    except ValidationError as exc:
+                        local_outcomes["insufficient_funds" if "insufficient_funds" in exc.messages else "error"] += 1
+                    except DatabaseError:
+                        local_outcomes["error"] += 1
+                    local.append(time.perf_counter() - started)
+            finally:
+                with lock:
+                    latencies.extend(local)
+                    for key, value in local_outcomes.items():
+                        outcomes[key] += value
+
+        started = time.perf_counter()
+        if threads == 1:
+            worker(peers[0], per_thread[0])
+        else:
+            workers = [
+                threading.Thread(target=self._run_in_thread, args=(worker, peer, count))
+                for peer, count in zip(peers, per_thread)
+            ]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        keys = [CoinAccount.user_account_key(user.id) for user in [hot, *peers]]
+        drift = [m for m in find_balance_mismatches(keys) if m.projected_cents is not None]
+
+        self.stdout.write("coin_transfer_benchmark:")
+        self.stdout.write(f"- hot_side={options['hot_side']} threads={threads} transfers={transfers}")
+        self.stdout.write(f"- ok={outcomes['ok']} insufficient_funds={outcomes['insufficient_funds']} errors={outcomes['error']}")
+        self.stdout.write(f"- elapsed_s={elapsed:.3f} transfers_per_s={outcomes['ok'] / elapsed if elapsed else 0:.1f}")
+        if latencies:
+            p50 = latencies[len(latencies) // 2]
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(f"- latency_ms_p50={p50 * 1000:.2f} latency_ms_p99={p99 * 1000:.2f}")
+        self.stdout.write(f"- balance_projection_mismatches={len(drift)}")
+        if drift or outcomes["ok"] + outcomes["insufficient_funds"] != transfers:
+            raise CommandError("coin_transfer_benchmark: ledger and projection disagree or transfers failed.")
+
+    @staticmethod
+    def _run_in_thread(worker, peer: User, count: int) -> None:
+        try:
+            worker(peer, count)
+        finally:
+            connection.close()
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:28
+
+import libs.idgen
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coin', '0006_merge_20260209_0656'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoinAccountBalance',
+            fields=[
+                ('id', models.BigIntegerField(default=libs.idgen.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('account_key', models.CharField(max_length=255, unique=True)),
+                ('balance_cents', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
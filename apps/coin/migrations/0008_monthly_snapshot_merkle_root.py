@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coin', '0007_coinaccountbalance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlycoinsnapshot',
+            name='merkle_day_roots',
+            field=models.JSONField(blank=True, default=dict, help_text='Merkle root per UTC day (YYYY-MM-DD).'),
+        ),
+        migrations.AddField(
+            model_name='monthlycoinsnapshot',
+            name='merkle_root',
+            field=models.CharField(blank=True, default='', help_text='Root over the day roots.', max_length=64),
+        ),
+    ]
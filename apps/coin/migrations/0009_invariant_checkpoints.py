@@ -0,0 +1,43 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:05
+
+import libs.idgen
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coin', '0008_monthly_snapshot_merkle_root'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoinInvariantCheckpoint',
+            fields=[
+                ('id', models.BigIntegerField(default=libs.idgen.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('high_water_event_id', models.BigIntegerField(default=0)),
+                ('last_full_check_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CoinLedgerPeriodChecksum',
+            fields=[
+                ('id', models.BigIntegerField(default=libs.idgen.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('period', models.CharField(help_text='YYYY-MM', max_length=7, unique=True)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('volume_cents', models.BigIntegerField(default=0)),
+                ('checksum', models.CharField(max_length=64)),
+            ],
+            options={
+                'ordering': ['period'],
+            },
+        ),
+    ]
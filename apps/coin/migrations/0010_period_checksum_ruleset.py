@@ -0,0 +1,38 @@
+# Generated by Django 5.0.14 on 2026-10-17 04:35
+
+from django.db import migrations, models
+
+
+def rebuild_checksums(apps, schema_editor):
+    # Stored sums are per UTC month across rulesets; drop them and let the next run re-verify.
+    apps.get_model("coin", "CoinLedgerPeriodChecksum").objects.all().delete()
+    apps.get_model("coin", "CoinInvariantCheckpoint").objects.update(high_water_event_id=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coin', '0009_invariant_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='coinledgerperiodchecksum',
+            options={'ordering': ['period', 'ruleset_version']},
+        ),
+        migrations.AddField(
+            model_name='coinledgerperiodchecksum',
+            name='ruleset_version',
+            field=models.CharField(default='v1', max_length=16),
+        ),
+        migrations.AlterField(
+            model_name='coinledgerperiodchecksum',
+            name='period',
+            field=models.CharField(help_text='YYYY-MM', max_length=7),
+        ),
+        migrations.AlterUniqueTogether(
+            name='coinledgerperiodchecksum',
+            unique_together={('period', 'ruleset_version')},
+        ),
+        migrations.RunPython(rebuild_checksums, migrations.RunPython.noop),
+    ]
@@ -71,6 +71,20 @@ class CoinAccount(BaseModel):
         return self.account_key
 
 
+class CoinAccountBalance(BaseModel):
+    """Materialized balance per account_key, maintained by post_event_and_entries.
+
+    The raw ledger stays the source of truth; use coin_rebuild_balances to
+    verify or rebuild this projection.
+    """
+
+    account_key = models.CharField(max_length=255, unique=True)
+    balance_cents = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:  # pragma: no cover - debug helper
+        return f"{self.account_key}={self.balance_cents}"
+
+
 class CoinEvent(BaseModel):
     event_type = models.CharField(max_length=32, choices=CoinEventType.choices)
     occurred_at = models.DateTimeField(default=timezone.now)
@@ -138,6 +152,8 @@ class MonthlyCoinSnapshot(BaseModel):
     total_entries = models.PositiveIntegerField(default=0)
     total_volume_cents = models.BigIntegerField(default=0)
     ledger_hash = models.CharField(max_length=128, help_text="SHA256 hash of ordered ledger for auditing.")
+    merkle_root = models.CharField(max_length=64, blank=True, default="", help_text="Root over the day roots.")
+    merkle_day_roots = models.JSONField(default=dict, blank=True, help_text="Merkle root per UTC day (YYYY-MM-DD).")
 
     class Meta:
         ordering = ["-period"]
@@ -151,6 +167,38 @@ class MonthlyCoinSnapshot(BaseModel):
         raise ValidationError("MonthlyCoinSnapshot rows are immutable; deletion is not allowed.")
 
 
+class CoinInvariantCheckpoint(BaseModel):
+    """High-water mark of coin_invariant_check: every CoinEvent with id <= it has passed."""
+
+    name = models.CharField(max_length=64, unique=True)
+    high_water_event_id = models.BigIntegerField(default=0)
+    last_full_check_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:  # pragma: no cover - debug helper
+        return f"{self.name}@{self.high_water_event_id}"
+
+
+class CoinLedgerPeriodChecksum(BaseModel):
+    """
+    Running checksum of the verified ledger entries of one month and ruleset version.
+
+    Entries are grouped the way monthly snapshots select them: by created_at month in
+    settings.TIME_ZONE and by their event's ruleset version. `checksum` is the sum,
+    modulo 2**256, of the SHA-256 of each entry's snapshot row, so entries can be folded
+    in as they are verified and a full re-verify recomputes it in any order.
+    """
+
+    period = models.CharField(max_length=7, help_text="YYYY-MM")
+    ruleset_version = models.CharField(max_length=16, default="v1")
+    entry_count = models.PositiveIntegerField(default=0)
+    volume_cents = models.BigIntegerField(default=0)
+    checksum = models.CharField(max_length=64)
+
+    class Meta:
+        ordering = ["period", "ruleset_version"]
+        unique_together = ("period", "ruleset_version")
+
+
 class EntitlementKey(models.TextChoices):
     PREMIUM = "premium", "Premium"
     PREMIUM_PLUS = "premium_plus", "Premium Plus"
@@ -0,0 +1,148 @@
+"""
+Cached CoinAccount metadata (status, is_system, owner) for ledger postings.
+
+Two tiers: a per-process LRU and the shared Django cache (Redis in deployments).
+Every entry is tagged with a global generation counter kept in the shared cache; a
+CoinAccount update or delete bumps it, so every process drops its entries at once
+and a suspended account is rejected on the next posting. A reader that loaded the
+row before the bump tags its entry with the old generation, which is never served.
+Cache failures fall back to the database. The generation counter has to be visible
+to every process, so settings only enable the cache when the default cache is Redis.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from redis.exceptions import RedisError
+
+from apps.coin.models import CoinAccount
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "coin:accounts:generation"
+SHARED_KEY_PREFIX = "coin:account:"
+
+
+@dataclass(frozen=True)
+class AccountMeta:
+    account_key: str
+    user_id: Optional[int]
+    is_system: bool
+    status: str
+
+
+_local: "OrderedDict[str, Tuple[int, float, AccountMeta]]" = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def cache_enabled() -> bool:
+    return bool(getattr(settings, "COIN_ACCOUNT_CACHE_ENABLED", True))
+
+
+def _ttl_seconds() -> int:
+    return max(1, int(getattr(settings, "COIN_ACCOUNT_CACHE_TTL_SECONDS", 300)))
+
+
+def _local_size() -> int:
+    return max(1, int(getattr(settings, "COIN_ACCOUNT_CACHE_SIZE", 4096)))
+
+
+def _generation() -> Optional[int]:
+    try:
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            # Seed from the clock, not 0, so an evicted counter never revives old tags.
+            cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+            generation = cache.get(GENERATION_KEY)
+        return None if generation is None else int(generation)
+    except RedisError as exc:
+        logger.warning("Coin account cache unavailable, using database: %s", exc)
+        return None
+
+
+def _load(account_keys: Iterable[str]) -> Dict[str, AccountMeta]:
+    rows = CoinAccount.objects.filter(account_key__in=list(account_keys)).values(
+        "account_key", "user_id", "is_system", "status"
+    )
+    return {row["account_key"]: AccountMeta(**row) for row in rows}
+
+
+def get_account_meta(account_keys: Iterable[str]) -> Dict[str, AccountMeta]:
+    """Metadata for the existing accounts among `account_keys`; unknown keys are left out."""
+    keys = set(account_keys)
+    if not keys:
+        return {}
+    generation = _generation() if cache_enabled() else None
+    if generation is None:
+        return _load(keys)
+
+    found: Dict[str, AccountMeta] = {}
+    now = time.monotonic()
+    with _local_lock:
+        for key in keys:
+            cached = _local.get(key)
+            if cached and cached[0] == generation and cached[1] > now:
+                _local.move_to_end(key)
+                found[key] = cached[2]
+    local_hits = set(found)
+
+    missing = keys - found.keys()
+    if missing:
+        try:
+            shared = cache.get_many([SHARED_KEY_PREFIX + key for key in missing])
+        except RedisError as exc:
+            logger.warning("Coin account cache read failed: %s", exc)
+            shared = {}
+        for key in missing:
+            entry = shared.get(SHARED_KEY_PREFIX + key)
+            if entry and entry[0] == generation:
+                found[key] = entry[1]
+        missing -= found.keys()
+    if missing:
+        loaded = _load(missing)
+        try:
+            cache.set_many(
+                {SHARED_KEY_PREFIX + key: (generation, meta) for key, meta in loaded.items()}, _ttl_seconds()
+            )
+        except RedisError as exc:
+            logger.warning("Coin account cache write failed: %s", exc)
+        found.update(loaded)
+
+    expires_at = now + _ttl_seconds()
+    with _local_lock:
+        for key, meta in found.items():
+            if key in local_hits:
+                continue
+            _local[key] = (generation, expires_at, meta)
+            _local.move_to_end(key)
+        while len(_local) > _local_size():
+            _local.popitem(last=False)
+    return found
+
+
+def invalidate_accounts(account_keys: Iterable[str]) -> None:
+    keys = list(account_keys)
+    with _local_lock:
+        for key in keys:
+            _local.pop(key, None)
+    try:
+        cache.delete_many([SHARED_KEY_PREFIX + key for key in keys])
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, time.time_ns(), timeout=None)
+    except RedisError as exc:
+        logger.warning("Coin account cache invalidation failed for %s: %s", keys, exc)
+
+
+def clear_local_cache() -> None:
+    with _local_lock:
+        _local.clear()
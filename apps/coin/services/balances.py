@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Collection, Iterable, Mapping
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Case, F, Sum, When
+from django.utils import timezone
+
+from apps.coin.models import CoinAccountBalance, CoinLedgerEntry, CoinLedgerEntryDirection
+
+
+@dataclass(frozen=True)
+class BalanceMismatch:
+    account_key: str
+    projected_cents: int | None
+    ledger_cents: int
+
+
+def _signed_amount_sum() -> Sum:
+    return Sum(
+        Case(
+            When(direction=CoinLedgerEntryDirection.CREDIT, then=F("amount_cents")),
+            When(direction=CoinLedgerEntryDirection.DEBIT, then=-F("amount_cents")),
+            default=0,
+            output_field=models.BigIntegerField(),
+        )
+    )
+
+
+def ledger_balances(account_keys: Iterable[str] | None = None) -> dict[str, int]:
+    """Aggregate balances straight from CoinLedgerEntry (slow path, source of truth)."""
+    queryset = CoinLedgerEntry.objects.all()
+    if account_keys is not None:
+        queryset = queryset.filter(account_key__in=list(account_keys))
+    rows = queryset.order_by().values("account_key").annotate(total=_signed_amount_sum())
+    return {row["account_key"]: int(row["total"] or 0) for row in rows}
+
+
+def ensure_balance_rows(account_keys: Iterable[str]) -> None:
+    """
+    Materialize projection rows for accounts that do not have one yet.
+
+    Must run before new ledger entries for these accounts are inserted: the
+    seed value is the current ledger aggregate, and concurrent seeders lose
+    the insert race harmlessly via ignore_conflicts.
+    """
+    keys = set(account_keys)
+    if not keys:
+        return
+    existing = set(
+        CoinAccountBalance.objects.filter(account_key__in=keys).values_list("account_key", flat=True)
+    )
+    missing = keys - existing
+    if not missing:
+        return
+    totals = ledger_balances(missing)
+    CoinAccountBalance.objects.bulk_create(
+        [CoinAccountBalance(account_key=key, balance_cents=totals.get(key, 0)) for key in sorted(missing)],
+        ignore_conflicts=True,
+    )
+
+
+def apply_balance_deltas(deltas: Mapping[str, int], *, no_overdraft: Collection[str] = ()) -> None:
+    """
+    Apply signed deltas to projection rows; caller must hold an open transaction.
+
+    A debit on an account in `no_overdraft` is a conditional UPDATE (WHERE balance_cents
+    >= amount), so the funds check and the debit are one statement and concurrent
+    debits only queue on that row's lock; ValidationError("insufficient_funds") is
+    raised when it matches nothing. Missing rows are seeded on demand, so deltas must
+    be applied before the matching ledger entries are inserted. Rows are updated in
+    account_key order to keep lock acquisition deadlock-free.
+    """
+    now = timezone.now()
+    for account_key in sorted(deltas):
+        delta = deltas[account_key]
+        if not delta:
+            continue
+        guarded = delta < 0 and account_key in no_overdraft
+        for seeded in (False, True):
+            rows = CoinAccountBalance.objects.filter(account_key=account_key)
+            if guarded:
+                rows = rows.filter(balance_cents__gte=-delta)
+            if rows.update(balance_cents=F("balance_cents") + delta, updated_at=now):
+                break
+            if seeded:
+                raise ValidationError("insufficient_funds")
+            ensure_balance_rows([account_key])
+
+
+def get_projected_balance_cents(account_key: str) -> int:
+    balance = (
+        CoinAccountBalance.objects.filter(account_key=account_key).values_list("balance_cents", flat=True).first()
+    )
+    if balance is not None:
+        return int(balance)
+    ensure_balance_rows([account_key])
+    return int(
+        CoinAccountBalance.objects.filter(account_key=account_key).values_list("balance_cents", flat=True).get()
+    )
+
+
+def find_balance_mismatches(account_keys: Iterable[str] | None = None) -> list[BalanceMismatch]:
+    """
+    Compare projection rows against the raw ledger.
+
+    Accounts with ledger entries but no projection row are reported with
+    projected_cents=None; they are materialized lazily on first read/post.
+    """
+    keys = list(account_keys) if account_keys is not None else None
+    projected_qs = CoinAccountBalance.objects.all()
+    if keys is not None:
+        projected_qs = projected_qs.filter(account_key__in=keys)
+    projected = dict(projected_qs.values_list("account_key", "balance_cents"))
+    actual = ledger_balances(keys)
+    mismatches: list[BalanceMismatch] = []
+    for account_key in sorted(set(projected) | set(actual)):
+        ledger_cents = actual.get(account_key, 0)
+        projected_cents = projected.get(account_key)
+        if projected_cents is None or int(projected_cents) != ledger_cents:
+            mismatches.append(
+                BalanceMismatch(
+                    account_key=account_key,
+                    projected_cents=None if projected_cents is None else int(projected_cents),
+                    ledger_cents=ledger_cents,
+                )
+            )
+    return mismatches
+
+
+def rebuild_account_balances(account_keys: Iterable[str] | None = None) -> int:
+    """Recompute projection rows from the raw ledger. Returns the number of rows written."""
+    keys = list(account_keys) if account_keys is not None else None
+    with transaction.atomic():
+        # Lock projection rows before aggregating so in-flight postings either
+        # land in the aggregate or apply their delta after this rebuild commits.
+        locked = CoinAccountBalance.objects.select_for_update()
+        if keys is not None:
+            locked = locked.filter(account_key__in=keys)
+        existing = {row.account_key: row for row in locked}
+        totals = ledger_balances(keys)
+        for key in keys or ():
+            totals.setdefault(key, 0)
+        for key in existing:
+            totals.setdefault(key, 0)
+        now = timezone.now()
+        to_update = []
+        to_create = []
+        for account_key, total in sorted(totals.items()):
+            row = existing.get(account_key)
+            if row is None:
+                to_create.append(CoinAccountBalance(account_key=account_key, balance_cents=total))
+            elif row.balance_cents != total:
+                row.balance_cents = total
+                row.updated_at = now
+                to_update.append(row)
+        if to_create:
+            CoinAccountBalance.objects.bulk_create(to_create, ignore_conflicts=True)
+        if to_update:
+            CoinAccountBalance.objects.bulk_update(to_update, ["balance_cents", "updated_at"])
+    return len(to_create) + len(to_update)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Case, F, Sum, When
+from django.utils import timezone
+
+from apps.coin.models import (
+    CoinAccount,
+    CoinAccountStatus,
+    CoinEvent,
+    CoinEventType,
+    CoinInvariantCheckpoint,
+    CoinLedgerEntry,
+    CoinLedgerEntryDirection,
+    CoinLedgerPeriodChecksum,
+    SYSTEM_ACCOUNT_KEYS,
+)
+from apps.coin.services.balances import find_balance_mismatches
+from apps.coin.services.snapshot import DEFAULT_CHUNK_SIZE, _ledger_row
+from apps.payments.models import PaymentEvent, PaymentEventStatus
+from libs.idgen import min_id_for_timestamp
+from libs.merkle import encode_row
+
+CHECKPOINT_NAME = "ledger"
+_CHECKSUM_MODULUS = 2**256
+
+# (period, ruleset_version) -> (entry_count, volume_cents, checksum)
+PeriodTotals = Dict[Tuple[str, str], Tuple[int, int, int]]
+
+
+@dataclass
+class InvariantReport:
+    full: bool
+    checked_from_event_id: int
+    high_water_event_id: int
+    counts: Dict[str, int] = field(default_factory=dict)
+    failures: List[str] = field(default_factory=list)
+    period_mismatches: List[str] = field(default_factory=list)
+
+
+def _settled_event_id() -> int:
+    """Largest event id whose transaction is assumed to have committed by now."""
+    settle_ms = getattr(settings, "COIN_INVARIANT_SETTLE_MS", 5000)
+    return min_id_for_timestamp(int(time.time() * 1000) - settle_ms + 1) - 1
+
+
+def _period_totals(after_event_id: int, upto_event_id: int) -> PeriodTotals:
+    """Fold entries into the same months (settings.TIME_ZONE) and rulesets snapshots select."""
+    totals: PeriodTotals = {}
+    entries = CoinLedgerEntry.objects.select_related("event").filter(
+        event_id__gt=after_event_id, event_id__lte=upto_event_id
+    )
+    for entry in entries.order_by().iterator(chunk_size=DEFAULT_CHUNK_SIZE):
+        key = (timezone.localtime(entry.created_at).strftime("%Y-%m"), entry.event.ruleset_version)
+        digest = int.from_bytes(hashlib.sha256(encode_row(_ledger_row(entry))).digest(), "big")
+        count, volume, checksum = totals.get(key, (0, 0, 0))
+        totals[key] = (count + 1, volume + entry.amount_cents, (checksum + digest) % _CHECKSUM_MODULUS)
+    return totals
+
+
+def _merge_totals(base: PeriodTotals, delta: PeriodTotals) -> PeriodTotals:
+    merged = dict(base)
+    for period, (count, volume, checksum) in delta.items():
+        old_count, old_volume, old_checksum = merged.get(period, (0, 0, 0))
+        merged[period] = (old_count + count, old_volume + volume, (old_checksum + checksum) % _CHECKSUM_MODULUS)
+    return merged
+
+
+def _stored_totals() -> PeriodTotals:
+    return {
+        (row.period, row.ruleset_version): (row.entry_count, row.volume_cents, int(row.checksum, 16))
+        for row in CoinLedgerPeriodChecksum.objects.all()
+    }
+
+
+def _save_totals(totals: PeriodTotals, periods) -> None:
+    for period, ruleset_version in sorted(periods):
+        count, volume, checksum = totals[(period, ruleset_version)]
+        CoinLedgerPeriodChecksum.objects.update_or_create(
+            period=period,
+            ruleset_version=ruleset_version,
+            defaults={"entry_count": count, "volume_cents": volume, "checksum": f"{checksum:064x}"},
+        )
+
+
+def _count_violations(report: InvariantReport, after_event_id: int) -> None:
+    """Run the set-based checks over events with id > after_event_id (0 checks everything)."""
+    counts = report.counts
+    events = CoinEvent.objects.filter(id__gt=after_event_id)
+    entries = CoinLedgerEntry.objects.filter(event_id__gt=after_event_id)
+
+    mint_events = events.filter(event_type=CoinEventType.MINT)
+    counts["mint_events"] = mint_events.count()
+    counts["mint_events_without_payment_event"] = mint_events.filter(payment_events__isnull=True).distinct().count()
+    counts["mint_events_with_non_minted_payment_event"] = (
+        mint_events.filter(payment_events__isnull=False)
+        .exclude(payment_events__status=PaymentEventStatus.MINTED)
+        .distinct()
+        .count()
+    )
+    counts["payment_events_linked_to_non_mint_event"] = (
+        PaymentEvent.objects.filter(minted_coin_event_id__gt=after_event_id)
+        .exclude(minted_coin_event__event_type=CoinEventType.MINT)
+        .count()
+    )
+    counts["unbalanced_event_groups"] = (
+        entries.values("event_id", "currency")
+        .annotate(
+            total=Sum(
+                Case(
+                    When(direction=CoinLedgerEntryDirection.CREDIT, then=F("amount_cents")),
+                    When(direction=CoinLedgerEntryDirection.DEBIT, then=-F("amount_cents")),
+                    default=0,
+                    output_field=models.BigIntegerField(),
+                )
+            )
+        )
+        .filter(~models.Q(total=0))
+        .count()
+    )
+    counts["unknown_account_entries"] = entries.exclude(
+        account_key__in=CoinAccount.objects.values("account_key")
+    ).count()
+    suspended_accounts = CoinAccount.objects.filter(status=CoinAccountStatus.SUSPENDED).exclude(
+        account_key__in=SYSTEM_ACCOUNT_KEYS
+    )
+    counts["suspended_account_entries"] = entries.filter(
+        account_key__in=suspended_accounts.values("account_key")
+    ).count()
+
+    # Projections only move when entries are posted, so incremental runs check touched accounts.
+    touched = None if after_event_id == 0 else set(entries.values_list("account_key", flat=True))
+    balance_mismatches = find_balance_mismatches(touched)
+    # Accounts without a projection row are seeded lazily; only drift is a failure.
+    counts["balance_projection_mismatches"] = sum(1 for m in balance_mismatches if m.projected_cents is not None)
+    counts["balance_projection_unmaterialized"] = len(balance_mismatches) - counts["balance_projection_mismatches"]
+
+    for name in (
+        "mint_events_without_payment_event",
+        "mint_events_with_non_minted_payment_event",
+        "payment_events_linked_to_non_mint_event",
+        "unbalanced_event_groups",
+        "unknown_account_entries",
+        "suspended_account_entries",
+        "balance_projection_mismatches",
+    ):
+        if counts[name]:
+            report.failures.append(f"{name}={counts[name]}")
+
+
+def check_ledger_invariants(*, full: bool = False) -> InvariantReport:
+    """
+    Check the coin ledger invariants, incrementally by default.
+
+    An incremental run checks only events newer than the stored high-water mark and
+    folds their entries into the per-month, per-ruleset checksums. A full run re-checks
+    every event and recomputes every checksum, reporting `period/ruleset` pairs whose
+    stored checksum no longer matches the ledger. The high-water mark only advances to ids older than
+    COIN_INVARIANT_SETTLE_MS, so an event that commits after a younger one is not
+    skipped; newer events are still checked, just again on the next run. Nothing is
+    persisted unless the run passes, so a violation keeps failing until it is fixed.
+    """
+    with transaction.atomic():
+        checkpoint, _ = CoinInvariantCheckpoint.objects.select_for_update().get_or_create(name=CHECKPOINT_NAME)
+        previous = checkpoint.high_water_event_id
+        high_water = max(previous, _settled_event_id())
+        report = InvariantReport(
+            full=full,
+            checked_from_event_id=0 if full else previous,
+            high_water_event_id=previous,
+        )
+        _count_violations(report, report.checked_from_event_id)
+
+        stored = _stored_totals()
+        delta = _period_totals(previous, high_water)
+        if full:
+            verified = _period_totals(0, previous)
+            report.period_mismatches = [
+                f"{period}/{ruleset_version}"
+                for period, ruleset_version in sorted(set(verified) | set(stored))
+                if verified.get((period, ruleset_version)) != stored.get((period, ruleset_version))
+            ]
+            if report.period_mismatches:
+                report.failures.append(f"period_checksum_mismatches={len(report.period_mismatches)}")
+            stored = verified
+        report.counts["period_checksum_mismatches"] = len(report.period_mismatches)
+
+        if report.failures:
+            return report
+        _save_totals(_merge_totals(stored, delta), delta.keys())
+        checkpoint.high_water_event_id = high_water
+        if full:
+            checkpoint.last_full_check_at = timezone.now()
+        checkpoint.save()
+        report.high_water_event_id = high_water
+    return report
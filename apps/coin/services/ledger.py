@@ -4,8 +4,7 @@ from typing import Iterable, List, Sequence
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError, models, transaction
-from django.db.models import Case, F, Sum, When
+from django.db import IntegrityError, transaction
 
 from apps.coin.models import (
     COIN_CURRENCY,
@@ -20,6 +19,8 @@ from apps.coin.models import (
     CoinLedgerEntry,
     CoinLedgerEntryDirection,
 )
+from apps.coin.services.accounts import AccountMeta, get_account_meta
+from apps.coin.services.balances import apply_balance_deltas, get_projected_balance_cents
 from apps.payments.models import PaymentEvent, PaymentEventStatus
 from apps.users.models import User
 
@@ -65,56 +66,64 @@ def _validate_entries(entries: Sequence[dict]) -> None:
         )
         if invalid_system_keys:
             raise ValidationError("System account is not allowed.")
-        accounts = list(
-            CoinAccount.objects.filter(account_key__in=account_keys).values("account_key", "status", "is_system")
-        )
-        existing = {account["account_key"] for account in accounts}
+        accounts = list(get_account_meta(account_keys).values())
+        existing = {account.account_key for account in accounts}
         missing = sorted(account_keys - existing)
         if missing:
             raise ValidationError(f"Unknown account_key(s): {', '.join(missing)}")
         inactive = sorted(
-            account["account_key"]
+            account.account_key
             for account in accounts
-            if account["status"] != CoinAccountStatus.ACTIVE
+            if account.status != CoinAccountStatus.ACTIVE
         )
         if inactive:
             raise ValidationError("Coin account is not active.")
         disallowed = sorted(
-            account["account_key"]
+            account.account_key
             for account in accounts
-            if account["is_system"] and account["account_key"] not in SYSTEM_ACCOUNT_KEYS
+            if account.is_system and account.account_key not in SYSTEM_ACCOUNT_KEYS
         )
         if disallowed:
             raise ValidationError("System account is not allowed.")
 
 
-def get_or_create_user_account(user: User) -> CoinAccount:
-    account_key = CoinAccount.user_account_key(user.id)
-    account, _ = CoinAccount.objects.get_or_create(
-        user=user,
-        defaults={"account_key": account_key},
-    )
+def _check_user_account(account: CoinAccount | AccountMeta, account_key: str) -> None:
     if account.is_system:
         raise ValidationError("User coin accounts cannot be system accounts.")
     if account.account_key != account_key:
         raise ValidationError("Coin account key mismatch for user.")
     if account.status != CoinAccountStatus.ACTIVE:
         raise ValidationError("Coin account is not active.")
+
+
+def get_or_create_user_account(user: User) -> CoinAccount:
+    account_key = CoinAccount.user_account_key(user.id)
+    account, _ = CoinAccount.objects.get_or_create(
+        user=user,
+        defaults={"account_key": account_key},
+    )
+    _check_user_account(account, account_key)
     return account
 
 
+def get_user_account_key(user: User) -> str:
+    """
+    Account key of `user`'s active coin account, validated against the account cache.
+
+    Same checks as get_or_create_user_account without its query on the hot path; the
+    account is only created (through that function) when the cache has no row for it.
+    """
+    account_key = CoinAccount.user_account_key(user.id)
+    meta = get_account_meta([account_key]).get(account_key)
+    if meta is None or meta.user_id != user.id:
+        return get_or_create_user_account(user).account_key
+    _check_user_account(meta, account_key)
+    return account_key
+
+
 def get_balance_cents(account_key: str) -> int:
-    total = CoinLedgerEntry.objects.filter(account_key=account_key).aggregate(
-        total=Sum(
-            Case(
-                When(direction=CoinLedgerEntryDirection.CREDIT, then=F("amount_cents")),
-                When(direction=CoinLedgerEntryDirection.DEBIT, then=-F("amount_cents")),
-                default=0,
-                output_field=models.BigIntegerField(),
-            )
-        )
-    )["total"]
-    return int(total or 0)
+    """O(1) balance read from the CoinAccountBalance projection (seeded from the ledger on first use)."""
+    return get_projected_balance_cents(account_key)
 
 
 def post_event_and_entries(
@@ -126,7 +135,15 @@ def post_event_and_entries(
     note: str = "",
     idempotency_key: str | None = None,
     ruleset_version: str = "v1",
+    no_overdraft: Iterable[str] = (),
 ) -> CoinEvent:
+    """
+    Post a balanced event in one short transaction.
+
+    Debits on `no_overdraft` accounts fail with ValidationError("insufficient_funds")
+    instead of taking the balance below zero; the check is part of the balance UPDATE,
+    so callers need no account lock or separate balance read.
+    """
     if event_type == CoinEventType.MINT:
         if not idempotency_key or ":" not in idempotency_key:
             raise ValidationError("Mint events require a provider:event_id idempotency_key.")
@@ -154,8 +171,14 @@ def post_event_and_entries(
     )
 
     metadata = metadata or {}
+    deltas: dict[str, int] = {}
+    for entry in entry_list:
+        amount = int(entry["amount_cents"])
+        signed = amount if entry["direction"] == CoinLedgerEntryDirection.CREDIT else -amount
+        deltas[entry["account_key"]] = deltas.get(entry["account_key"], 0) + signed
 
     with transaction.atomic():
+        apply_balance_deltas(deltas, no_overdraft=frozenset(no_overdraft))
         event = CoinEvent.objects.create(
             event_type=event_type,
             created_by=created_by,
@@ -193,78 +216,68 @@ def create_transfer(
         raise ValidationError("Amount must be positive.")
     fee = 0
 
-    sender_account = get_or_create_user_account(sender)
-    receiver_account = get_or_create_user_account(receiver)
+    sender_key = get_user_account_key(sender)
+    receiver_key = get_user_account_key(receiver)
     total_debit = amount_cents
 
-    with transaction.atomic():
-        CoinAccount.objects.select_for_update().filter(id=sender_account.id).get()
-        balance = get_balance_cents(sender_account.account_key)
-        if balance < total_debit:
-            raise ValidationError("insufficient_funds")
-        event = post_event_and_entries(
-            event_type=CoinEventType.TRANSFER,
-            created_by=sender,
-            note=note,
-            metadata={
-                "sender_user_id": sender.id,
-                "to_user_id": receiver.id,
+    return post_event_and_entries(
+        event_type=CoinEventType.TRANSFER,
+        created_by=sender,
+        note=note,
+        metadata={
+            "sender_user_id": sender.id,
+            "to_user_id": receiver.id,
+            "amount_cents": amount_cents,
+            "fee_cents": fee,
+        },
+        entries=[
+            {
+                "account_key": sender_key,
+                "amount_cents": total_debit,
+                "currency": COIN_CURRENCY,
+                "direction": CoinLedgerEntryDirection.DEBIT,
+            },
+            {
+                "account_key": receiver_key,
                 "amount_cents": amount_cents,
-                "fee_cents": fee,
+                "currency": COIN_CURRENCY,
+                "direction": CoinLedgerEntryDirection.CREDIT,
             },
-            entries=[
-                {
-                    "account_key": sender_account.account_key,
-                    "amount_cents": total_debit,
-                    "currency": COIN_CURRENCY,
-                    "direction": CoinLedgerEntryDirection.DEBIT,
-                },
-                {
-                    "account_key": receiver_account.account_key,
-                    "amount_cents": amount_cents,
-                    "currency": COIN_CURRENCY,
-                    "direction": CoinLedgerEntryDirection.CREDIT,
-                },
-            ],
-        )
-    return event
+        ],
+        no_overdraft=[sender_key],
+    )
 
 
 def create_spend(*, user: User, amount_cents: int, reference: str, note: str = "") -> CoinEvent:
     if amount_cents <= 0:
         raise ValidationError("Amount must be positive.")
-    account = get_or_create_user_account(user)
+    account_key = get_user_account_key(user)
 
-    with transaction.atomic():
-        CoinAccount.objects.select_for_update().filter(id=account.id).get()
-        balance = get_balance_cents(account.account_key)
-        if balance < amount_cents:
-            raise ValidationError("insufficient_funds")
-        event = post_event_and_entries(
-            event_type=CoinEventType.SPEND,
-            created_by=user,
-            note=note,
-            metadata={
-                "user_id": user.id,
-                "reference": reference,
+    return post_event_and_entries(
+        event_type=CoinEventType.SPEND,
+        created_by=user,
+        note=note,
+        metadata={
+            "user_id": user.id,
+            "reference": reference,
+            "amount_cents": amount_cents,
+        },
+        entries=[
+            {
+                "account_key": account_key,
                 "amount_cents": amount_cents,
+                "currency": COIN_CURRENCY,
+                "direction": CoinLedgerEntryDirection.DEBIT,
             },
-            entries=[
-                {
-                    "account_key": account.account_key,
-                    "amount_cents": amount_cents,
-                    "currency": COIN_CURRENCY,
-                    "direction": CoinLedgerEntryDirection.DEBIT,
-                },
-                {
-                    "account_key": SYSTEM_ACCOUNT_REVENUE,
-                    "amount_cents": amount_cents,
-                    "currency": COIN_CURRENCY,
-                    "direction": CoinLedgerEntryDirection.CREDIT,
-                },
-            ],
-        )
-    return event
+            {
+                "account_key": SYSTEM_ACCOUNT_REVENUE,
+                "amount_cents": amount_cents,
+                "currency": COIN_CURRENCY,
+                "direction": CoinLedgerEntryDirection.CREDIT,
+            },
+        ],
+        no_overdraft=[account_key],
+    )
 
 
 def mint_for_payment(*, payment_event: PaymentEvent, metadata: dict | None = None) -> CoinEvent:
@@ -289,7 +302,7 @@ def mint_for_payment(*, payment_event: PaymentEvent, metadata: dict | None = Non
             payment_event.status = PaymentEventStatus.MINTED
             payment_event.save(update_fields=["minted_coin_event", "status", "updated_at"])
         return existing
-    account = get_or_create_user_account(payment_event.user)
+    account_key = get_user_account_key(payment_event.user)
     event_metadata = metadata or {}
     event_metadata.update(
         {
@@ -313,7 +326,7 @@ def mint_for_payment(*, payment_event: PaymentEvent, metadata: dict | None = Non
                         "direction": CoinLedgerEntryDirection.DEBIT,
                     },
                     {
-                        "account_key": account.account_key,
+                        "account_key": account_key,
                         "amount_cents": payment_event.amount_cents,
                         "currency": COIN_CURRENCY,
                         "direction": CoinLedgerEntryDirection.CREDIT,
@@ -5,14 +5,19 @@ import hashlib
 import io
 import json
 from dataclasses import dataclass
-from datetime import date
-from typing import Dict, Iterable, List, Tuple
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import BinaryIO, Dict, Iterable, List, Tuple
+
+from django.conf import settings
 
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import Count
 from django.utils import timezone
 
 from apps.coin.models import CoinLedgerEntry, MonthlyCoinSnapshot
+from libs.merkle import PartitionedMerkleBuilder, day_partition, encode_row, partition_root, row_inclusion_proof
 
 
 @dataclass
@@ -22,7 +27,10 @@ class CoinSnapshotResult:
     total_events: int
     total_entries: int
     total_volume_cents: int
-    csv_bytes: bytes
+    csv_bytes: bytes | None
+    csv_sha256: str
+    merkle_root: str
+    merkle_day_roots: Dict[str, str]
     snapshot: MonthlyCoinSnapshot | None
 
 
@@ -41,59 +49,73 @@ def parse_period(period: str) -> Tuple[date, date]:
     return start, end
 
 
+CSV_FIELDS = [
+    "id",
+    "event_id",
+    "event_type",
+    "account_key",
+    "direction",
+    "amount_cents",
+    "currency",
+    "entry_metadata",
+    "event_metadata",
+    "created_at",
+]
+DEFAULT_CHUNK_SIZE = 2000
+
+
 def _hash_ledger_rows(rows: Iterable[Dict[str, object]]) -> str:
     hasher = hashlib.sha256()
     for row in rows:
-        hasher.update(json.dumps(row, sort_keys=True).encode("utf-8"))
+        _update_ledger_hash(hasher, row)
     return hasher.hexdigest()
 
 
-def _serialize_entries(entries: List[CoinLedgerEntry]) -> Tuple[List[Dict[str, object]], str, bytes]:
-    ledger_rows: List[Dict[str, object]] = []
-    for entry in entries:
-        ledger_rows.append(
-            {
-                "id": entry.id,
-                "event_id": entry.event_id,
-                "event_type": entry.event.event_type,
-                "account_key": entry.account_key,
-                "direction": entry.direction,
-                "amount_cents": entry.amount_cents,
-                "currency": entry.currency,
-                "entry_metadata": entry.metadata,
-                "event_metadata": entry.event.metadata,
-                "created_at": entry.created_at.isoformat(),
-            }
-        )
-
-    ledger_hash = _hash_ledger_rows(ledger_rows)
-
-    buffer = io.StringIO()
-    writer = csv.DictWriter(
-        buffer,
-        fieldnames=[
-            "id",
-            "event_id",
-            "event_type",
-            "account_key",
-            "direction",
-            "amount_cents",
-            "currency",
-            "entry_metadata",
-            "event_metadata",
-            "created_at",
-        ],
+def _update_ledger_hash(hasher, row: Dict[str, object]) -> None:
+    hasher.update(encode_row(row))
+
+
+def _ledger_row(entry: CoinLedgerEntry) -> Dict[str, object]:
+    return {
+        "id": entry.id,
+        "event_id": entry.event_id,
+        "event_type": entry.event.event_type,
+        "account_key": entry.account_key,
+        "direction": entry.direction,
+        "amount_cents": entry.amount_cents,
+        "currency": entry.currency,
+        "entry_metadata": entry.metadata,
+        "event_metadata": entry.event.metadata,
+        "created_at": entry.created_at.isoformat(),
+    }
+
+
+class _HashingSink:
+    """Text sink for csv.writer that encodes, hashes and forwards to a binary stream."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream = stream
+        self.hasher = hashlib.sha256()
+
+    def write(self, text: str) -> int:
+        data = text.encode("utf-8")
+        self.hasher.update(data)
+        self.stream.write(data)
+        return len(text)
+
+
+def _period_bounds(period: str) -> Tuple[datetime, datetime]:
+    """The month's [start, end) in the current time zone, which day partitions (UTC) may straddle."""
+    start_date, end_date = parse_period(period)
+    start_dt = timezone.make_aware(timezone.datetime.combine(start_date, timezone.datetime.min.time()))
+    end_dt = timezone.make_aware(timezone.datetime.combine(end_date, timezone.datetime.min.time()))
+    return start_dt, end_dt
+
+
+def _month_entries(start_dt, end_dt, ruleset_version: str):
+    return CoinLedgerEntry.objects.select_related("event").filter(
+        created_at__gte=start_dt, created_at__lt=end_dt, event__ruleset_version=ruleset_version
     )
-    writer.writeheader()
-    for row in ledger_rows:
-        writer.writerow(
-            {
-                **row,
-                "entry_metadata": json.dumps(row["entry_metadata"], sort_keys=True),
-                "event_metadata": json.dumps(row["event_metadata"], sort_keys=True),
-            }
-        )
-    return ledger_rows, ledger_hash, buffer.getvalue().encode("utf-8")
 
 
 def generate_monthly_coin_snapshot(
@@ -101,20 +123,51 @@ def generate_monthly_coin_snapshot(
     period: str,
     ruleset_version: str = "v1",
     dry_run: bool = True,
+    csv_stream: BinaryIO | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int | None = None,
 ) -> CoinSnapshotResult:
-    start_date, end_date = parse_period(period)
-    start_dt = timezone.make_aware(timezone.datetime.combine(start_date, timezone.datetime.min.time()))
-    end_dt = timezone.make_aware(timezone.datetime.combine(end_date, timezone.datetime.min.time()))
-
-    entries = list(
-        CoinLedgerEntry.objects.select_related("event")
-        .filter(created_at__gte=start_dt, created_at__lt=end_dt, event__ruleset_version=ruleset_version)
-        .order_by("created_at", "id")
-    )
+    """
+    Stream the month's ledger, in (created_at, id) order, through the hash and the CSV.
+
+    Entries are read in chunks and never held all at once: the ledger hash, the CSV
+    digest and the totals are running aggregates. The CSV goes to `csv_stream` when one
+    is given (`csv_bytes` is then None); otherwise it is collected and returned in
+    `csv_bytes`. Snapshot closed months: rows added while the month is being read would
+    show up in the stream but not necessarily in the event count.
+
+    Next to the legacy flat `ledger_hash`, each UTC day's rows form a Merkle subtree
+    (hashed in `workers` processes, LEDGER_HASH_WORKERS by default) and the day roots
+    form `merkle_root`, so one day or one row can be verified on its own.
+    """
+    start_dt, end_dt = _period_bounds(period)
+    entries = _month_entries(start_dt, end_dt, ruleset_version)
+    buffer = io.BytesIO() if csv_stream is None else None
+    sink = _HashingSink(csv_stream if csv_stream is not None else buffer)  # type: ignore[arg-type]
+    writer = csv.DictWriter(sink, fieldnames=CSV_FIELDS)
+    writer.writeheader()
 
-    _, ledger_hash, csv_bytes = _serialize_entries(entries)
-    event_ids = {entry.event_id for entry in entries}
-    total_volume_cents = sum(entry.amount_cents for entry in entries)
+    ledger_hasher = hashlib.sha256()
+    total_entries = 0
+    total_volume_cents = 0
+    with PartitionedMerkleBuilder(workers if workers is not None else settings.LEDGER_HASH_WORKERS) as merkle:
+        for entry in entries.order_by("created_at", "id").iterator(chunk_size=chunk_size):
+            row = _ledger_row(entry)
+            encoded = encode_row(row)
+            ledger_hasher.update(encoded)
+            merkle.add(day_partition(entry.created_at), encoded)
+            writer.writerow(
+                {
+                    **row,
+                    "entry_metadata": json.dumps(row["entry_metadata"], sort_keys=True),
+                    "event_metadata": json.dumps(row["event_metadata"], sort_keys=True),
+                }
+            )
+            total_entries += 1
+            total_volume_cents += entry.amount_cents
+        merkle_root, merkle_day_roots = merkle.finish()
+    ledger_hash = ledger_hasher.hexdigest()
+    total_events = entries.aggregate(total=Count("event_id", distinct=True))["total"] or 0
 
     snapshot_obj: MonthlyCoinSnapshot | None = None
     if not dry_run:
@@ -123,18 +176,67 @@ def generate_monthly_coin_snapshot(
                 raise ValidationError("Snapshot already exists for this period.")
             snapshot_obj = MonthlyCoinSnapshot.objects.create(
                 period=period,
-                total_events=len(event_ids),
-                total_entries=len(entries),
+                total_events=total_events,
+                total_entries=total_entries,
                 total_volume_cents=total_volume_cents,
                 ledger_hash=ledger_hash,
+                merkle_root=merkle_root,
+                merkle_day_roots=merkle_day_roots,
             )
 
     return CoinSnapshotResult(
         period=period,
         ledger_hash=ledger_hash,
-        total_events=len(event_ids),
-        total_entries=len(entries),
+        total_events=total_events,
+        total_entries=total_entries,
         total_volume_cents=total_volume_cents,
-        csv_bytes=csv_bytes,
+        csv_bytes=buffer.getvalue() if buffer is not None else None,
+        csv_sha256=sink.hasher.hexdigest(),
+        merkle_root=merkle_root,
+        merkle_day_roots=merkle_day_roots,
         snapshot=snapshot_obj,
     )
+
+
+def entry_inclusion_proof(
+    snapshot: MonthlyCoinSnapshot, entry_id: int, ruleset_version: str = "v1"
+) -> Dict[str, object]:
+    """
+    Prove a ledger entry is part of `snapshot` by re-hashing only the entry's day.
+
+    Raises ValidationError when the snapshot has no Merkle root, the entry is outside
+    it, or the day's rows no longer hash to the stored day root.
+    """
+    if not snapshot.merkle_root:
+        raise ValidationError("Snapshot predates Merkle roots; only the flat ledger hash is available.")
+    entry = CoinLedgerEntry.objects.select_related("event").filter(id=entry_id).first()
+    if entry is None:
+        raise ValidationError(f"Ledger entry {entry_id} does not exist.")
+    day = day_partition(entry.created_at)
+    if day not in snapshot.merkle_day_roots:
+        raise ValidationError(f"Ledger entry {entry_id} is not in snapshot {snapshot.period}.")
+
+    # The first and last UTC days hold only the part that falls inside the month.
+    period_start, period_end = _period_bounds(snapshot.period)
+    day_start = datetime.fromisoformat(day).replace(tzinfo=dt_timezone.utc)
+    day_entries = _month_entries(
+        max(day_start, period_start), min(day_start + timedelta(days=1), period_end), ruleset_version
+    ).order_by("created_at", "id")
+    ids: List[int] = []
+    rows: List[bytes] = []
+    for day_entry in day_entries.iterator(chunk_size=DEFAULT_CHUNK_SIZE):
+        ids.append(day_entry.id)
+        rows.append(encode_row(_ledger_row(day_entry)))
+    if entry.id not in ids:
+        raise ValidationError(f"Ledger entry {entry_id} is not in snapshot {snapshot.period}.")
+    if partition_root(rows) != snapshot.merkle_day_roots[day]:
+        raise ValidationError(f"Ledger rows for {day} no longer match the snapshot day root.")
+
+    index = ids.index(entry.id)
+    return {
+        "period": snapshot.period,
+        "day": day,
+        "row": _ledger_row(entry),
+        "proof": row_inclusion_proof(rows, index, day, snapshot.merkle_day_roots),
+        "merkle_root": snapshot.merkle_root,
+    }
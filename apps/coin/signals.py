@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.coin.models import CoinAccount
+from apps.coin.services.accounts import invalidate_accounts
+
+
+@receiver(post_save, sender=CoinAccount)
+@receiver(post_delete, sender=CoinAccount)
+def invalidate_account_cache(sender, instance: CoinAccount, created: bool = False, **kwargs) -> None:
+    if created:
+        return
+    keys = [instance.account_key]
+    invalidate_accounts(keys)
+    # Again after commit: a concurrent reader may have cached the pre-commit row meanwhile.
+    transaction.on_commit(lambda: invalidate_accounts(keys))
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import hashlib
+
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.coin.models import CoinAccount, CoinAccountStatus
+from apps.coin.services.accounts import clear_local_cache, get_account_meta, invalidate_accounts
+from apps.coin.services.ledger import create_transfer, mint_for_payment
+from apps.payments.models import PaymentEvent, PaymentEventProvider, PaymentEventStatus
+from apps.users.models import User
+
+
+@pytest.fixture(autouse=True)
+def account_cache():
+    cache.clear()
+    clear_local_cache()
+    with override_settings(COIN_ACCOUNT_CACHE_ENABLED=True):
+        yield
+    cache.clear()
+    clear_local_cache()
+
+
+def _funded_pair(prefix: str) -> tuple[User, User]:
+    sender = User.objects.create_user(email=f"{prefix}1@example.com", password="pass1234", handle=f"{prefix}1", name="S")
+    receiver = User.objects.create_user(email=f"{prefix}2@example.com", password="pass1234", handle=f"{prefix}2", name="R")
+    provider_event_id = f"evt_{prefix}"
+    mint_for_payment(
+        payment_event=PaymentEvent.objects.create(
+            provider=PaymentEventProvider.STRIPE,
+            provider_event_id=provider_event_id,
+            event_type="checkout.session.completed",
+            user=sender,
+            amount_cents=1000,
+            status=PaymentEventStatus.RECEIVED,
+            raw_body_hash=hashlib.sha256(provider_event_id.encode("utf-8")).hexdigest(),
+            verified_at=timezone.now(),
+        )
+    )
+    return sender, receiver
+
+
+def _account_queries(queries) -> list[str]:
+    return [q["sql"] for q in queries.captured_queries if 'FROM "coin_coinaccount"' in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_warm_transfers_skip_account_queries():
+    sender, receiver = _funded_pair("ac")
+    create_transfer(sender=sender, receiver=receiver, amount_cents=100)
+
+    with CaptureQueriesContext(connection) as queries:
+        create_transfer(sender=sender, receiver=receiver, amount_cents=100)
+    assert _account_queries(queries) == []
+
+
+@pytest.mark.django_db
+def test_suspension_is_seen_by_the_next_posting():
+    sender, receiver = _funded_pair("as")
+    create_transfer(sender=sender, receiver=receiver, amount_cents=100)
+
+    account = CoinAccount.objects.get(user=receiver)
+    account.status = CoinAccountStatus.SUSPENDED
+    account.save(update_fields=["status", "updated_at"])
+
+    with pytest.raises(ValidationError, match="not active"):
+        create_transfer(sender=sender, receiver=receiver, amount_cents=100)
+
+
+@pytest.mark.django_db
+def test_entries_cached_before_a_generation_bump_are_not_served():
+    sender, _ = _funded_pair("ag")
+    key = CoinAccount.user_account_key(sender.id)
+    assert get_account_meta([key])[key].status == CoinAccountStatus.ACTIVE
+
+    # Another process changes the row; its signal bumps the shared generation.
+    CoinAccount.objects.filter(account_key=key).update(status=CoinAccountStatus.SUSPENDED)
+    invalidate_accounts(["user:0"])
+
+    assert get_account_meta([key])[key].status == CoinAccountStatus.SUSPENDED
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import hashlib
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from apps.coin.models import (
+    CoinAccount,
+    CoinAccountBalance,
+    CoinEvent,
+    CoinEventType,
+    CoinLedgerEntry,
+    CoinLedgerEntryDirection,
+    SYSTEM_ACCOUNT_MINT,
+    SYSTEM_ACCOUNT_REVENUE,
+)
+from apps.coin.services.balances import find_balance_mismatches, ledger_balances
+from apps.coin.services.ledger import create_spend, create_transfer, get_balance_cents, mint_for_payment
+from apps.payments.models import PaymentEvent, PaymentEventProvider, PaymentEventStatus
+from apps.users.models import User
+
+
+def _create_payment_event(*, user: User, amount_cents: int, provider_event_id: str) -> PaymentEvent:
+    return PaymentEvent.objects.create(
+        provider=PaymentEventProvider.STRIPE,
+        provider_event_id=provider_event_id,
+        event_type="checkout.session.completed",
+        user=user,
+        amount_cents=amount_cents,
+        status=PaymentEventStatus.RECEIVED,
+        raw_body_hash=hashlib.sha256(provider_event_id.encode("utf-8")).hexdigest(),
+        verified_at=timezone.now(),
+    )
+
+
+@pytest.mark.django_db
+def test_postings_keep_projection_in_sync_with_ledger():
+    sender = User.objects.create_user(email="b1@example.com", password="pass1234", handle="b1", name="B One")
+    receiver = User.objects.create_user(email="b2@example.com", password="pass1234", handle="b2", name="B Two")
+    mint_for_payment(payment_event=_create_payment_event(user=sender, amount_cents=2000, provider_event_id="evt_b1"))
+    create_transfer(sender=sender, receiver=receiver, amount_cents=700)
+    create_spend(user=sender, amount_cents=300, reference="product:test")
+
+    sender_key = CoinAccount.user_account_key(sender.id)
+    receiver_key = CoinAccount.user_account_key(receiver.id)
+    projected = dict(CoinAccountBalance.objects.values_list("account_key", "balance_cents"))
+    assert projected[sender_key] == 1000
+    assert projected[receiver_key] == 700
+    assert projected[SYSTEM_ACCOUNT_REVENUE] == 300
+    assert projected[SYSTEM_ACCOUNT_MINT] == -2000
+    assert get_balance_cents(sender_key) == ledger_balances([sender_key])[sender_key]
+    assert find_balance_mismatches() == []
+
+
+@pytest.mark.django_db
+def test_balance_read_seeds_projection_from_existing_ledger():
+    user = User.objects.create_user(email="b3@example.com", password="pass1234", handle="b3", name="B Three")
+    account_key = CoinAccount.user_account_key(user.id)
+    event = CoinEvent.objects.create(event_type=CoinEventType.TRANSFER)
+    CoinLedgerEntry.objects.create(
+        event=event,
+        account_key=account_key,
+        amount_cents=400,
+        currency="SLC",
+        direction=CoinLedgerEntryDirection.CREDIT,
+    )
+    assert not CoinAccountBalance.objects.filter(account_key=account_key).exists()
+
+    assert get_balance_cents(account_key) == 400
+    assert CoinAccountBalance.objects.get(account_key=account_key).balance_cents == 400
+
+
+@pytest.mark.django_db
+def test_rebuild_command_verifies_and_repairs_drift():
+    user = User.objects.create_user(email="b4@example.com", password="pass1234", handle="b4", name="B Four")
+    mint_for_payment(payment_event=_create_payment_event(user=user, amount_cents=500, provider_event_id="evt_b4"))
+    account_key = CoinAccount.user_account_key(user.id)
+    CoinAccountBalance.objects.filter(account_key=account_key).update(balance_cents=123)
+
+    with pytest.raises(CommandError):
+        call_command("coin_rebuild_balances", "--verify")
+    with pytest.raises(CommandError):
+        call_command("coin_invariant_check")
+
+    call_command("coin_rebuild_balances")
+
+    assert get_balance_cents(account_key) == 500
+    call_command("coin_rebuild_balances", "--verify")
+    call_command("coin_invariant_check")
+
+
+@pytest.mark.django_db
+def test_conditional_debit_rejects_overdraft_without_side_effects():
+    sender = User.objects.create_user(email="b9@example.com", password="pass1234", handle="b9", name="B Nine")
+    receiver = User.objects.create_user(email="b10@example.com", password="pass1234", handle="b10", name="B Ten")
+    mint_for_payment(payment_event=_create_payment_event(user=sender, amount_cents=500, provider_event_id="evt_b9"))
+    sender_key = CoinAccount.user_account_key(sender.id)
+    receiver_key = CoinAccount.user_account_key(receiver.id)
+    # The receiver has no projection row yet; the credit seeds it on demand.
+    CoinAccountBalance.objects.filter(account_key=receiver_key).delete()
+
+    create_transfer(sender=sender, receiver=receiver, amount_cents=500)
+    events_before = CoinEvent.objects.count()
+    with pytest.raises(ValidationError, match="insufficient_funds"):
+        create_transfer(sender=sender, receiver=receiver, amount_cents=1)
+    with pytest.raises(ValidationError, match="insufficient_funds"):
+        create_spend(user=sender, amount_cents=1, reference="product:test")
+
+    assert CoinEvent.objects.count() == events_before
+    assert get_balance_cents(sender_key) == 0
+    assert get_balance_cents(receiver_key) == 500
+    assert find_balance_mismatches() == []
+
+
+@pytest.mark.django_db
+def test_transfer_benchmark_command_smoke():
+    call_command("coin_transfer_benchmark", transfers=5, threads=1, force=True)
+    assert find_balance_mismatches() == []
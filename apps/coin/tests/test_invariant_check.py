@@ -2,10 +2,12 @@ from __future__ import annotations
 
 import hashlib
 import uuid
+from datetime import datetime, timezone as dt_timezone
 
 import pytest
 from django.core.management import call_command
 from django.core.management.base import CommandError
+from django.test import override_settings
 from django.utils import timezone
 
 from apps.coin.models import (
@@ -13,12 +15,15 @@ from apps.coin.models import (
     CoinAccountStatus,
     CoinEvent,
     CoinEventType,
+    CoinInvariantCheckpoint,
     CoinLedgerEntry,
     CoinLedgerEntryDirection,
+    CoinLedgerPeriodChecksum,
     SYSTEM_ACCOUNT_FEES,
     SYSTEM_ACCOUNT_MINT,
 )
 from apps.coin.services.ledger import mint_for_payment
+from apps.coin.services.snapshot import _month_entries, _period_bounds
 from apps.payments.models import PaymentEvent, PaymentEventProvider, PaymentEventStatus
 from apps.users.models import User
 
@@ -141,3 +146,73 @@ def test_invariant_check_allows_suspended_system_account():
         direction=CoinLedgerEntryDirection.DEBIT,
     )
     call_command("coin_invariant_check")
+
+
+@pytest.mark.django_db
+@override_settings(COIN_INVARIANT_SETTLE_MS=0)
+def test_incremental_check_only_covers_events_past_the_high_water_mark():
+    user = User.objects.create_user(email="incr@example.com", password="pass1234", handle="incr", name="Incr")
+    mint_for_payment(payment_event=_create_payment_event(user=user, amount_cents=700, provider_event_id="evt_incr_1"))
+    call_command("coin_invariant_check")
+
+    checkpoint = CoinInvariantCheckpoint.objects.get()
+    assert checkpoint.high_water_event_id >= CoinEvent.objects.order_by("-id").values_list("id", flat=True).first()
+    period_checksum = CoinLedgerPeriodChecksum.objects.get()
+    assert period_checksum.entry_count == CoinLedgerEntry.objects.count()
+
+    # A violation below the high-water mark is out of reach for incremental runs...
+    other = User.objects.create_user(email="incr2@example.com", password="pass1234", handle="incr2", name="Incr 2")
+    stale = CoinEvent.objects.create(event_type=CoinEventType.TRANSFER)
+    CoinLedgerEntry.objects.create(
+        event=stale,
+        account_key=CoinAccount.user_account_key(other.id),
+        amount_cents=10,
+        currency="SLC",
+        direction=CoinLedgerEntryDirection.CREDIT,
+    )
+    CoinInvariantCheckpoint.objects.update(high_water_event_id=stale.id)
+    call_command("coin_invariant_check")
+
+    # ...but new events are checked, and the full audit re-verifies everything.
+    mint_for_payment(payment_event=_create_payment_event(user=user, amount_cents=300, provider_event_id="evt_incr_2"))
+    call_command("coin_invariant_check")
+    with pytest.raises(CommandError, match="unbalanced_event_groups=1"):
+        call_command("coin_invariant_check", full=True)
+
+
+@pytest.mark.django_db
+@override_settings(COIN_INVARIANT_SETTLE_MS=0)
+def test_full_check_reports_period_checksum_drift():
+    user = User.objects.create_user(email="drift@example.com", password="pass1234", handle="drift", name="Drift")
+    mint_for_payment(payment_event=_create_payment_event(user=user, amount_cents=900, provider_event_id="evt_drift_1"))
+    call_command("coin_invariant_check", full=True)
+    assert CoinInvariantCheckpoint.objects.get().last_full_check_at is not None
+
+    CoinLedgerPeriodChecksum.objects.update(volume_cents=1)
+    call_command("coin_invariant_check")
+    with pytest.raises(CommandError, match="period_checksum_mismatches=1"):
+        call_command("coin_invariant_check", full=True)
+
+
+@pytest.mark.django_db
+@override_settings(COIN_INVARIANT_SETTLE_MS=0, TIME_ZONE="America/New_York")
+def test_period_checksums_follow_snapshot_months_and_rulesets():
+    user = User.objects.create_user(email="months@example.com", password="pass1234", handle="months", name="Months")
+    first = mint_for_payment(payment_event=_create_payment_event(user=user, amount_cents=400, provider_event_id="evt_m1"))
+    second = mint_for_payment(payment_event=_create_payment_event(user=user, amount_cents=600, provider_event_id="evt_m2"))
+    # Still February in New York, already March in UTC.
+    CoinLedgerEntry.objects.filter(event=first).update(
+        created_at=datetime(2026, 3, 1, 2, tzinfo=dt_timezone.utc)
+    )
+    CoinLedgerEntry.objects.filter(event=second).update(
+        created_at=datetime(2026, 3, 10, tzinfo=dt_timezone.utc)
+    )
+    CoinEvent.objects.filter(id=second.id).update(ruleset_version="v2")
+    call_command("coin_invariant_check")
+
+    rows = {(row.period, row.ruleset_version): row.entry_count for row in CoinLedgerPeriodChecksum.objects.all()}
+    assert rows == {
+        (period, ruleset): _month_entries(*_period_bounds(period), ruleset).count()
+        for period, ruleset in [("2026-02", "v1"), ("2026-03", "v2")]
+    }
+    call_command("coin_invariant_check", full=True)
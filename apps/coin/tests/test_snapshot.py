@@ -2,16 +2,21 @@ from __future__ import annotations
 
 import csv
 import io
+import json
+from datetime import datetime, timezone as dt_timezone
 
 import hashlib
 
 import pytest
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import override_settings
 from django.utils import timezone
 
 from apps.coin.models import CoinLedgerEntry, MonthlyCoinSnapshot
 from apps.coin.services.ledger import mint_for_payment
-from apps.coin.services.snapshot import generate_monthly_coin_snapshot
+from apps.coin.services.snapshot import _hash_ledger_rows, _ledger_row, generate_monthly_coin_snapshot
 from apps.payments.models import PaymentEvent, PaymentEventProvider, PaymentEventStatus
 from apps.users.models import User
 
@@ -65,3 +70,81 @@ def test_snapshot_immutability():
         snapshot.delete()
 
     assert MonthlyCoinSnapshot.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_streamed_snapshot_matches_materialized_hash_and_csv(tmp_path):
+    user = User.objects.create_user(email="snap3@example.com", password="pass1234", handle="snap3", name="Snap Three")
+    for index in range(5):
+        mint_for_payment(
+            payment_event=_create_payment_event(user=user, amount_cents=100 + index, provider_event_id=f"evt_s3_{index}")
+        )
+    period = timezone.now().strftime("%Y-%m")
+
+    entries = CoinLedgerEntry.objects.select_related("event").order_by("created_at", "id")
+    expected_hash = _hash_ledger_rows([_ledger_row(entry) for entry in entries])
+
+    in_memory = generate_monthly_coin_snapshot(period=period, dry_run=True)
+    with (tmp_path / "out.csv").open("wb") as stream:
+        streamed = generate_monthly_coin_snapshot(period=period, dry_run=True, csv_stream=stream, chunk_size=2)
+
+    assert in_memory.ledger_hash == streamed.ledger_hash == expected_hash
+    assert streamed.csv_bytes is None
+    assert (tmp_path / "out.csv").read_bytes() == in_memory.csv_bytes
+    assert streamed.csv_sha256 == hashlib.sha256(in_memory.csv_bytes).hexdigest()
+    assert streamed.total_entries == entries.count()
+    assert streamed.total_events == 5
+    assert streamed.total_volume_cents == sum(entry.amount_cents for entry in entries)
+
+    call_command("coin_snapshot_month", month=period, dry_run=True, output_dir=str(tmp_path / "cmd"))
+    assert (tmp_path / "cmd" / "snapshot.csv").read_bytes() == in_memory.csv_bytes
+    assert not (tmp_path / "cmd" / "snapshot.csv.partial").exists()
+
+
+@pytest.mark.django_db
+def test_snapshot_merkle_root_and_inclusion_proof(tmp_path):
+    user = User.objects.create_user(email="snap4@example.com", password="pass1234", handle="snap4", name="Snap Four")
+    for index in range(3):
+        mint_for_payment(
+            payment_event=_create_payment_event(user=user, amount_cents=200 + index, provider_event_id=f"evt_s4_{index}")
+        )
+    period = timezone.now().strftime("%Y-%m")
+
+    pooled = generate_monthly_coin_snapshot(period=period, dry_run=True, workers=2)
+    result = generate_monthly_coin_snapshot(period=period, dry_run=False, workers=1)
+    assert pooled.merkle_root == result.merkle_root
+    assert pooled.ledger_hash == result.ledger_hash
+    assert result.snapshot.merkle_root == result.merkle_root
+    assert list(result.snapshot.merkle_day_roots) == [timezone.now().date().isoformat()]
+
+    entry = CoinLedgerEntry.objects.order_by("created_at", "id")[2]
+    proof_path = tmp_path / "proof.json"
+    call_command("coin_snapshot_verify", month=period, entry_id=entry.id, output=str(proof_path))
+    call_command("coin_snapshot_verify", month=period, proof=str(proof_path))
+
+    document = json.loads(proof_path.read_text())
+    document["row"]["amount_cents"] += 1
+    proof_path.write_text(json.dumps(document))
+    with pytest.raises(CommandError):
+        call_command("coin_snapshot_verify", month=period, proof=str(proof_path))
+
+
+@pytest.mark.django_db
+@override_settings(TIME_ZONE="Asia/Tbilisi")
+def test_inclusion_proof_with_non_utc_month_bounds():
+    user = User.objects.create_user(email="snap5@example.com", password="pass1234", handle="snap5", name="Snap Five")
+    # Both land on UTC day 2026-09-30; in UTC+4 the first is September, the second October.
+    entries = {}
+    for period, hour in (("2026-09", 19), ("2026-10", 21)):
+        event = mint_for_payment(
+            payment_event=_create_payment_event(user=user, amount_cents=100 + hour, provider_event_id=f"evt_tz_{hour}")
+        )
+        CoinLedgerEntry.objects.filter(event=event).update(created_at=datetime(2026, 9, 30, hour, tzinfo=dt_timezone.utc))
+        entries[period] = CoinLedgerEntry.objects.filter(event=event).order_by("id").first()
+
+    for period, entry in entries.items():
+        result = generate_monthly_coin_snapshot(period=period, dry_run=False)
+        assert list(result.snapshot.merkle_day_roots) == ["2026-09-30"]
+        call_command("coin_snapshot_verify", month=period, entry_id=entry.id)
+    with pytest.raises(CommandError):
+        call_command("coin_snapshot_verify", month="2026-10", entry_id=entries["2026-09"].id)
@@ -18,7 +18,6 @@ from rest_framework.views import APIView
 from apps.coin.models import (
     COIN_CURRENCY,
     SYSTEM_ACCOUNT_REVENUE,
-    CoinAccount,
     CoinEvent,
     CoinEventType,
     CoinLedgerEntry,
@@ -41,6 +40,7 @@ from apps.coin.services.ledger import (
     create_transfer,
     get_balance_cents,
     get_or_create_user_account,
+    get_user_account_key,
     post_event_and_entries,
 )
 
@@ -168,8 +168,7 @@ class CoinTransferView(APIView):
             detail = exc.messages[0] if getattr(exc, "messages", None) else str(exc)
             return Response(self._error_payload(detail), status=status.HTTP_400_BAD_REQUEST)
 
-        sender_account = get_or_create_user_account(request.user)
-        sender_balance_cents = get_balance_cents(sender_account.account_key)
+        sender_balance_cents = get_balance_cents(get_user_account_key(request.user))
         return Response(
             {
                 "event_id": event.id,
@@ -217,8 +216,7 @@ class CoinSpendView(APIView):
             detail = exc.messages[0] if getattr(exc, "messages", None) else str(exc)
             return Response(self._error_payload(detail), status=status.HTTP_400_BAD_REQUEST)
 
-        account = get_or_create_user_account(request.user)
-        balance_cents = get_balance_cents(account.account_key)
+        balance_cents = get_balance_cents(get_user_account_key(request.user))
         return Response(
             {
                 "event_id": event.id,
@@ -316,7 +314,7 @@ class CoinPurchaseView(APIView):
         if total_price <= 0:
             return Response(self._error_payload("invalid_amount", "invalid_amount"), status=400)
 
-        account = get_or_create_user_account(request.user)
+        account_key = get_user_account_key(request.user)
         purchase_idempotency = f"purchase:{request.user.id}:{idempotency_key}"
         existing = CoinEvent.objects.filter(idempotency_key=purchase_idempotency).first()
         if existing:
@@ -327,7 +325,7 @@ class CoinPurchaseView(APIView):
                     status=status.HTTP_409_CONFLICT,
                 )
             entitlements = self._build_entitlements_payload(request.user)
-            balance = get_balance_cents(account.account_key)
+            balance = get_balance_cents(account_key)
             charged_slc = int(meta.get("total_price_slc") or total_price)
             return Response(
                 {
@@ -343,11 +341,6 @@ class CoinPurchaseView(APIView):
 
         try:
             with transaction.atomic():
-                CoinAccount.objects.select_for_update().filter(id=account.id).get()
-                balance = get_balance_cents(account.account_key)
-                if balance < total_price:
-                    return Response(self._error_payload("insufficient_funds", "insufficient_funds"), status=402)
-
                 event_meta = {
                     "user_id": request.user.id,
                     "product_code": product.code,
@@ -365,7 +358,7 @@ class CoinPurchaseView(APIView):
                         metadata=event_meta,
                         entries=[
                             {
-                                "account_key": account.account_key,
+                                "account_key": account_key,
                                 "amount_cents": total_price,
                                 "currency": COIN_CURRENCY,
                                 "direction": CoinLedgerEntryDirection.DEBIT,
@@ -377,6 +370,7 @@ class CoinPurchaseView(APIView):
                                 "direction": CoinLedgerEntryDirection.CREDIT,
                             },
                         ],
+                        no_overdraft=[account_key],
                     )
                 except IntegrityError:
                     event = CoinEvent.objects.filter(idempotency_key=purchase_idempotency).first()
@@ -409,10 +403,12 @@ class CoinPurchaseView(APIView):
                         premium.save(update_fields=["active_until", "updated_at"])
         except ValidationError as exc:
             detail = exc.messages[0] if getattr(exc, "messages", None) else str(exc)
+            if detail == "insufficient_funds":
+                return Response(self._error_payload(detail, detail), status=status.HTTP_402_PAYMENT_REQUIRED)
             return Response(self._error_payload(detail), status=status.HTTP_400_BAD_REQUEST)
 
         entitlements = self._build_entitlements_payload(request.user)
-        balance = get_balance_cents(account.account_key)
+        balance = get_balance_cents(account_key)
         return Response(
             {
                 "ok": True,
@@ -56,6 +56,8 @@ class Command(BaseCommand):
             "contributor_pool_cents": result.contributor_pool_cents,
             "total_points": result.total_points,
             "total_events": result.total_events,
+            "merkle_root": result.merkle_root,
+            "merkle_day_roots": result.merkle_day_roots,
         }
 
         manifest_path = base_dir / "manifest.json"
@@ -63,4 +65,8 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS(f"Wrote snapshot CSV to {csv_path.resolve()}"))
         self.stdout.write(self.style.SUCCESS(f"Wrote manifest to {manifest_path.resolve()}"))
-        self.stdout.write(self.style.SUCCESS(f"ledger_hash={result.ledger_hash} csv_sha256={csv_hash}"))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"ledger_hash={result.ledger_hash} csv_sha256={csv_hash} merkle_root={result.merkle_root}"
+            )
+        )
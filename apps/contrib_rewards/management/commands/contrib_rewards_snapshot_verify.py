@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.contrib_rewards.models import MonthlyRewardSnapshot
+from apps.contrib_rewards.services import event_inclusion_proof
+from libs.merkle import encode_row, verify_inclusion
+
+
+class Command(BaseCommand):
+    help = "Verify a single reward event's inclusion in a monthly rewards snapshot via its Merkle proof."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--month", required=True, help="Snapshot month in YYYY-MM format.")
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument("--event-id", type=int, help="Build and check the proof for this reward event.")
+        group.add_argument("--proof", type=str, help="Check a proof file written earlier with --output.")
+        parser.add_argument("--output", type=str, default=None, help="Write the built proof to this file.")
+
+    def handle(self, *args, **options):
+        month: str = options["month"]
+        snapshot = MonthlyRewardSnapshot.objects.filter(period=month).first()
+        if snapshot is None:
+            raise CommandError(f"No snapshot exists for {month}.")
+        if not snapshot.merkle_root:
+            raise CommandError("Snapshot predates Merkle roots; only the flat ledger hash is available.")
+
+        if options["proof"]:
+            try:
+                document = json.loads(Path(options["proof"]).read_text())
+                row, proof = document["row"], document["proof"]
+            except (OSError, ValueError, KeyError) as exc:
+                raise CommandError(f"Unreadable proof file: {exc}") from exc
+        else:
+            try:
+                document = event_inclusion_proof(snapshot, options["event_id"])
+            except Exception as exc:
+                raise CommandError(str(exc)) from exc
+            row, proof = document["row"], document["proof"]
+            if options["output"]:
+                Path(options["output"]).write_text(json.dumps(document, sort_keys=True, indent=2))
+                self.stdout.write(self.style.SUCCESS(f"Wrote proof to {Path(options['output']).resolve()}"))
+
+        if not verify_inclusion(encode_row(row), proof, snapshot.merkle_root):
+            raise CommandError(f"Reward event {row.get('id')} is NOT included in snapshot {month}.")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reward event {row.get('id')} is included in snapshot {month} (merkle_root={snapshot.merkle_root})"
+            )
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contrib_rewards', '0004_rename_contrib_re_account__77dc1d_idx_contrib_rew_account_142ee6_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlyrewardsnapshot',
+            name='merkle_day_roots',
+            field=models.JSONField(blank=True, default=dict, help_text='Merkle root per UTC day (YYYY-MM-DD).'),
+        ),
+        migrations.AddField(
+            model_name='monthlyrewardsnapshot',
+            name='merkle_root',
+            field=models.CharField(blank=True, default='', help_text='Root over the day roots.', max_length=64),
+        ),
+    ]
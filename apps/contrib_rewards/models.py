@@ -145,6 +145,8 @@ class MonthlyRewardSnapshot(BaseModel):
     total_points = models.IntegerField(default=0)
     total_events = models.PositiveIntegerField(default=0)
     ledger_hash = models.CharField(max_length=128, help_text="SHA256 hash of ordered ledger for auditing.")
+    merkle_root = models.CharField(max_length=64, blank=True, default="", help_text="Root over the day roots.")
+    merkle_day_roots = models.JSONField(default=dict, blank=True, help_text="Merkle root per UTC day (YYYY-MM-DD).")
     dispute_window_ends_at = models.DateTimeField()
 
     class Meta:
@@ -6,13 +6,16 @@ import io
 import json
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
 from typing import Dict, Iterable, List, Tuple
 
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.utils import timezone
 
 from apps.contrib_rewards.models import ContributorProfile, MonthlyRewardSnapshot, Payout, RewardEvent, PayoutStatus
+from libs.merkle import PartitionedMerkleBuilder, day_partition, encode_row, partition_root, row_inclusion_proof
 
 
 @dataclass
@@ -33,6 +36,8 @@ class RewardComputation:
     total_events: int
     payouts: List[PayoutLine]
     csv_bytes: bytes
+    merkle_root: str
+    merkle_day_roots: Dict[str, str]
     snapshot: MonthlyRewardSnapshot | None
 
 
@@ -57,25 +62,34 @@ def parse_period(period: str) -> Tuple[date, date]:
 def _hash_ledger_rows(rows: Iterable[Dict[str, object]]) -> str:
     hasher = hashlib.sha256()
     for row in rows:
-        hasher.update(json.dumps(row, sort_keys=True).encode("utf-8"))
+        hasher.update(encode_row(row))
     return hasher.hexdigest()
 
 
-def _serialize_events_for_audit(events: List[RewardEvent]) -> Tuple[List[Dict[str, object]], str, bytes]:
-    ledger_rows: List[Dict[str, object]] = []
-    for event in events:
-        ledger_rows.append(
-            {
-                "id": event.id,
-                "contributor_id": event.contributor_id,
-                "event_type": event.event_type,
-                "points": event.points,
-                "occurred_at": event.occurred_at.isoformat(),
-                "reference": event.reference,
-                "metadata": event.metadata,
-            }
-        )
+def _event_row(event: RewardEvent) -> Dict[str, object]:
+    return {
+        "id": event.id,
+        "contributor_id": event.contributor_id,
+        "event_type": event.event_type,
+        "points": event.points,
+        "occurred_at": event.occurred_at.isoformat(),
+        "reference": event.reference,
+        "metadata": event.metadata,
+    }
+
+
+def _merkle_roots(
+    events: List[RewardEvent], ledger_rows: List[Dict[str, object]], workers: int
+) -> Tuple[str, Dict[str, str]]:
+    """Merkle root over per-UTC-day subtrees of the ledger rows, days hashed in `workers` processes."""
+    with PartitionedMerkleBuilder(workers) as merkle:
+        for event, row in zip(events, ledger_rows):
+            merkle.add(day_partition(event.occurred_at), encode_row(row))
+        return merkle.finish()
+
 
+def _serialize_events_for_audit(events: List[RewardEvent]) -> Tuple[List[Dict[str, object]], str, bytes]:
+    ledger_rows = [_event_row(event) for event in events]
     ledger_hash = _hash_ledger_rows(ledger_rows)
 
     buffer = io.StringIO()
@@ -123,6 +137,14 @@ def _allocate_pool(contributor_points: Dict[int, int], pool_cents: int) -> Dict[
     return base_allocations
 
 
+def _period_bounds(period: str) -> Tuple[datetime, datetime]:
+    """The month's [start, end) in the current time zone, which day partitions (UTC) may straddle."""
+    start_date, end_date = parse_period(period)
+    start_dt = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+    end_dt = timezone.make_aware(datetime.combine(end_date, datetime.min.time()))
+    return start_dt, end_dt
+
+
 def calculate_monthly_rewards(
     period: str,
     revenue_cents: int,
@@ -130,11 +152,9 @@ def calculate_monthly_rewards(
     pool_percent: int = 50,
     dispute_window_days: int = 7,
     dry_run: bool = False,
+    workers: int | None = None,
 ) -> RewardComputation:
-    start_date, end_date = parse_period(period)
-    start_dt = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
-    end_dt = timezone.make_aware(datetime.combine(end_date, datetime.min.time()))
-
+    start_dt, end_dt = _period_bounds(period)
     events = list(
         RewardEvent.objects.select_related("contributor", "contributor__user")
         .filter(occurred_at__gte=start_dt, occurred_at__lt=end_dt)
@@ -145,6 +165,9 @@ def calculate_monthly_rewards(
         contributor_points[event.contributor_id] = contributor_points.get(event.contributor_id, 0) + event.points
 
     ledger_rows, ledger_hash, csv_bytes = _serialize_events_for_audit(events)
+    merkle_root, merkle_day_roots = _merkle_roots(
+        events, ledger_rows, workers if workers is not None else settings.LEDGER_HASH_WORKERS
+    )
     total_points = sum(contributor_points.values())
     total_events = len(events)
 
@@ -169,7 +192,7 @@ def calculate_monthly_rewards(
         if MonthlyRewardSnapshot.objects.filter(period=period).exists():
             raise ValidationError(f"Snapshot for period {period} already exists. Use a new period or rollback explicitly.")
 
-        dispute_window_end = timezone.make_aware(datetime.combine(end_date, datetime.min.time())) + timedelta(days=dispute_window_days)
+        dispute_window_end = end_dt + timedelta(days=dispute_window_days)
         with transaction.atomic():
             snapshot_obj = MonthlyRewardSnapshot.objects.create(
                 period=period,
@@ -179,6 +202,8 @@ def calculate_monthly_rewards(
                 total_points=total_points,
                 total_events=total_events,
                 ledger_hash=ledger_hash,
+                merkle_root=merkle_root,
+                merkle_day_roots=merkle_day_roots,
                 dispute_window_ends_at=dispute_window_end,
             )
             payout_models = [
@@ -204,5 +229,49 @@ def calculate_monthly_rewards(
         total_events=total_events,
         payouts=payouts,
         csv_bytes=csv_bytes,
+        merkle_root=merkle_root,
+        merkle_day_roots=merkle_day_roots,
         snapshot=snapshot_obj,
     )
+
+
+def event_inclusion_proof(snapshot: MonthlyRewardSnapshot, event_id: int) -> Dict[str, object]:
+    """
+    Prove a reward event is part of `snapshot` by re-hashing only the event's day.
+
+    Raises ValidationError when the snapshot has no Merkle root, the event is outside
+    it, or the day's events no longer hash to the stored day root.
+    """
+    if not snapshot.merkle_root:
+        raise ValidationError("Snapshot predates Merkle roots; only the flat ledger hash is available.")
+    event = RewardEvent.objects.filter(id=event_id).first()
+    if event is None:
+        raise ValidationError(f"Reward event {event_id} does not exist.")
+    day = day_partition(event.occurred_at)
+    if day not in snapshot.merkle_day_roots:
+        raise ValidationError(f"Reward event {event_id} is not in snapshot {snapshot.period}.")
+
+    # The first and last UTC days hold only the part that falls inside the month.
+    period_start, period_end = _period_bounds(snapshot.period)
+    day_start = datetime.fromisoformat(day).replace(tzinfo=dt_timezone.utc)
+    day_events = list(
+        RewardEvent.objects.filter(
+            occurred_at__gte=max(day_start, period_start),
+            occurred_at__lt=min(day_start + timedelta(days=1), period_end),
+        ).order_by("occurred_at", "id")
+    )
+    ids = [day_event.id for day_event in day_events]
+    if event.id not in ids:
+        raise ValidationError(f"Reward event {event_id} is not in snapshot {snapshot.period}.")
+    rows = [encode_row(_event_row(day_event)) for day_event in day_events]
+    if partition_root(rows) != snapshot.merkle_day_roots[day]:
+        raise ValidationError(f"Reward events for {day} no longer match the snapshot day root.")
+
+    index = ids.index(event.id)
+    return {
+        "period": snapshot.period,
+        "day": day,
+        "row": _event_row(event),
+        "proof": row_inclusion_proof(rows, index, day, snapshot.merkle_day_roots),
+        "merkle_root": snapshot.merkle_root,
+    }
@@ -3,6 +3,7 @@ from __future__ import annotations
 import json
 import logging
 from functools import lru_cache
+from typing import Iterable
 
 from django.conf import settings
 from redis import Redis
@@ -17,16 +18,71 @@ def get_redis_client() -> Redis:
     return Redis.from_url(url)
 
 
+# Appends the event to the channel's stream, then publishes it with the stream entry id
+# spliced in as "event_id" so clients can resume with ?last_event_id= after a reconnect.
+# ARGV[4] is the serialized payload minus its opening brace, prefixed with "," unless empty.
+_STREAM_PUBLISH_LUA = """
+local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[2], '*', 'tail', ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('PUBLISH', ARGV[1], '{"event_id":"' .. id .. '"' .. ARGV[4])
+return id
+"""
+
+
+def stream_key(channel: str) -> str:
+    return f"realtime:stream:{channel}"
+
+
+def _is_streamed(channel: str) -> bool:
+    return channel.startswith("user:") and bool(getattr(settings, "REALTIME_STREAMS_ENABLED", True))
+
+
+def _stream_tail(message: str) -> str:
+    rest = message[1:]
+    return rest if rest == "}" else "," + rest
+
+
 def publish_event(channel: str, payload: dict) -> bool:
+    return publish_many([channel], payload) == 1
+
+
+def publish_many(channels: Iterable[str], payload: dict) -> int:
+    """
+    Publish one payload to many channels: serialized once, sent as a single pipeline.
+
+    Per-user channels are also appended to a capped Redis Stream so the realtime gateway
+    can replay what a reconnecting client missed. Returns the number of channels
+    published to (0 on Redis failure).
+    """
+    unique_channels = list(dict.fromkeys(channels))
+    if not unique_channels:
+        return 0
+    message = json.dumps(payload)
     try:
         client = get_redis_client()
-        client.publish(channel, json.dumps(payload))
-        return True
+        pipe = client.pipeline(transaction=False)
+        script = None
+        for channel in unique_channels:
+            if _is_streamed(channel):
+                script = script or client.register_script(_STREAM_PUBLISH_LUA)
+                script(
+                    keys=[stream_key(channel)],
+                    args=[
+                        channel,
+                        getattr(settings, "REALTIME_STREAM_MAXLEN", 200),
+                        getattr(settings, "REALTIME_STREAM_TTL_SECONDS", 86400),
+                        _stream_tail(message),
+                    ],
+                    client=pipe,
+                )
+            else:
+                pipe.publish(channel, message)
+        pipe.execute()
+        return len(unique_channels)
     except RedisError as exc:  # pragma: no cover - log and continue
-        logger.warning("Failed to publish event on %s: %s", channel, exc)
-        return False
+        logger.warning("Failed to publish event on %d channels: %s", len(unique_channels), exc)
+        return 0
 
 
 def publish_events(channels: list[str], payload: dict) -> None:
-    for channel in channels:
-        publish_event(channel, payload)
+    publish_many(channels, payload)
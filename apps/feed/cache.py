@@ -1,9 +1,19 @@
 from __future__ import annotations
 
+import struct
+from dataclasses import dataclass, field
+from datetime import datetime
 from typing import Any
 
+from django.conf import settings
 from django.core.cache import cache
 
+from apps.feed.timelines import datetime_to_score, score_to_datetime
+
+# One pool entry: static score (float64), created_at in epoch microseconds, post id.
+_POOL_ENTRY = struct.Struct("<dqq")
+_POOL_HEADER = struct.Struct("<qI")
+
 
 class FeedCache:
     """
@@ -40,3 +50,73 @@ class FeedCache:
         for mode in ("for_you", "for_you_videos", "following"):
             key = FeedCache.make_key(user_id, mode, None)
             cache.delete(key)
+
+
+@dataclass
+class RankedPool:
+    """
+    A user's ranked For You candidate pool: (static_score, created_at, post_id) per post.
+
+    Recency is the only time-dependent ranking term, so the pool can be re-ranked for any
+    reference time without touching the database.
+    """
+
+    as_of: datetime
+    size: int
+    entries: list[tuple[float, int, int]] = field(default_factory=list)
+
+    def to_bytes(self) -> bytes:
+        header = _POOL_HEADER.pack(datetime_to_score(self.as_of), self.size)
+        return header + b"".join(_POOL_ENTRY.pack(*entry) for entry in self.entries)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "RankedPool":
+        as_of_us, size = _POOL_HEADER.unpack_from(raw, 0)
+        body = memoryview(raw)[_POOL_HEADER.size :]
+        entries = [tuple(entry) for entry in _POOL_ENTRY.iter_unpack(body)]
+        return cls(as_of=score_to_datetime(as_of_us), size=size, entries=entries)
+
+    def covers(self, as_of: datetime, size: int) -> bool:
+        """Whether the entries up to `as_of` are still the `size` newest candidates at that time."""
+        if len(self.entries) < self.size:
+            return True  # Never trimmed, so nothing older was evicted.
+        cutoff = datetime_to_score(as_of)
+        return sum(1 for entry in self.entries if entry[1] <= cutoff) >= size
+
+    def merge(self, new_entries: list[tuple[float, int, int]], as_of: datetime) -> None:
+        """Add freshly scored posts and keep the `size` newest entries."""
+        by_id = {entry[2]: entry for entry in self.entries}
+        by_id.update({entry[2]: entry for entry in new_entries})
+        self.entries = sorted(by_id.values(), key=lambda entry: (entry[1], entry[2]), reverse=True)[: self.size]
+        self.as_of = as_of
+
+
+class RankedPoolCache:
+    """Per-user ranked candidate pools for the For You feeds, stored packed with a short TTL."""
+
+    @staticmethod
+    def make_key(user_id: int, mode: str) -> str:
+        return f"feed:pool:{mode}:{user_id}"
+
+    @staticmethod
+    def ttl_seconds() -> int:
+        return int(getattr(settings, "FEED_RANKED_POOL_TTL_SECONDS", 300))
+
+    @staticmethod
+    def get(user_id: int, mode: str) -> RankedPool | None:
+        raw: Any = cache.get(RankedPoolCache.make_key(user_id, mode))
+        if not isinstance(raw, (bytes, bytearray)) or len(raw) < _POOL_HEADER.size:
+            return None
+        try:
+            return RankedPool.from_bytes(bytes(raw))
+        except struct.error:
+            return None
+
+    @staticmethod
+    def set(user_id: int, mode: str, pool: RankedPool) -> None:
+        cache.set(RankedPoolCache.make_key(user_id, mode), pool.to_bytes(), RankedPoolCache.ttl_seconds())
+
+    @staticmethod
+    def invalidate(user_id: int) -> None:
+        for mode in ("for_you", "for_you_videos"):
+            cache.delete(RankedPoolCache.make_key(user_id, mode))
@@ -4,6 +4,7 @@ import logging
 from typing import Iterable, List, Sequence
 from urllib.parse import parse_qs, urlparse
 
+import numpy as np
 from django.core.cache import cache
 from django.utils import timezone
 
@@ -14,10 +15,20 @@ from apps.matrix.feed_insights import get_daily_feed_insight as get_matrix_feed_
 from apps.mentor.services.feed_insights import get_daily_feed_insight as get_mentor_feed_insight
 from apps.social.models import Follow, Post, Timeline, PostVisibility
 from apps.social.serializers import PostSerializer
+from apps.feed.cache import RankedPool, RankedPoolCache
+from apps.feed.cursors import RankCursor, decode_cursor, decode_rank_cursor, encode_cursor, encode_rank_cursor
 from apps.feed.rank import (
     FEED_RANKING_CONFIG_FOR_YOU,
     FEED_RANKING_CONFIG_FOR_YOU_VIDEOS,
-    score_post_for_user,
+    FeedRankingConfig,
+    recency_decay_batch,
+    static_scores_batch,
+)
+from apps.feed.timelines import (
+    datetime_to_score,
+    following_posts_filter,
+    read_following_entries,
+    score_to_datetime,
 )
 
 logger = logging.getLogger(__name__)
@@ -173,55 +184,156 @@ def _insert_insights(post_items: Sequence[dict], user=None) -> list[dict]:
 
 def compose_following_feed(user, cursor: str | None = None, limit: int = 20, serializer_context: dict | None = None):
     """
-    Chronological feed for followed users (and user's own posts) using timeline entries.
+    Chronological feed for followed users (and user's own posts).
+
+    Entries come from the hybrid fan-out timeline store; pagination is keyset-based on
+    (created_at, id) so deep pages cost the same as the first one. Raises ValueError
+    for a malformed cursor.
     """
-    queryset = (
-        Timeline.objects.filter(user=user)
-        .select_related("post", "post__author", "post__author__settings")
-        .select_related("post__video")
-        .prefetch_related("post__media", "post__images")
-        .order_by("-created_at")
-    )
-    entries, next_cursor = _slice_with_cursor(queryset, cursor=cursor, limit=limit)
-    items = compose_home_feed_items(entries, serializer_context=serializer_context, user=user)
+    before = None
+    if cursor:
+        cursor_dt, cursor_id = decode_cursor(cursor)
+        before = (datetime_to_score(cursor_dt), cursor_id)
+
+    followee_ids = set(Follow.objects.filter(follower=user).values_list("followee_id", flat=True))
+    entries = read_following_entries(user.id, before=before, limit=limit + 1, followee_ids=followee_ids)
+    has_next = len(entries) > limit
+    entries = entries[:limit]
+
+    # Re-check visibility at read time so unfollows and visibility edits apply immediately.
+    posts_by_id = {
+        post.id: post
+        for post in Post.objects.filter(
+            following_posts_filter(user.id, followee_ids),
+            id__in=[post_id for _, post_id in entries],
+        )
+        .select_related("author", "author__settings", "video")
+        .prefetch_related("media", "images")
+    }
+    posts = [posts_by_id[post_id] for _, post_id in entries if post_id in posts_by_id]
+    items = compose_home_feed_items(posts, serializer_context=serializer_context, user=user)
+    next_cursor = None
+    if has_next and entries:
+        last_score, last_id = entries[-1]
+        next_cursor = encode_cursor(score_to_datetime(last_score), last_id)
     return items, next_cursor
 
 
-def compose_for_you_feed(user, cursor: str | None = None, limit: int = 20, serializer_context: dict | None = None):
-    """
-    Ranked feed using simple scoring over recent posts.
-    """
-    # candidate pool: recent posts visible to the user
-    followee_ids = set(
-        Follow.objects.filter(follower=user).values_list("followee_id", flat=True)
-    )
+def _candidate_filter(user, followee_ids: set[int], extra_filter: Q | None) -> Q:
     visibility_filter = (
         Q(visibility=PostVisibility.PUBLIC)
         | Q(author=user)
         | (Q(visibility=PostVisibility.FOLLOWERS) & Q(author_id__in=followee_ids))
     )
-    candidate_limit = max(limit * 3, limit + 10)
-    candidates = list(
-        Post.objects.filter(visibility_filter)
-        .select_related("author", "author__settings", "video")
-        .prefetch_related("media", "images")
-        .order_by("-created_at")[:candidate_limit]
-    )
+    if extra_filter is not None:
+        visibility_filter = extra_filter & visibility_filter
+    return visibility_filter
+
 
-    scored = [
-        (post, score_post_for_user(user, post, FEED_RANKING_CONFIG_FOR_YOU, followee_ids=followee_ids))
-        for post in candidates
+def _score_candidates(user, queryset, limit: int, config: FeedRankingConfig, followee_ids: set[int]):
+    posts = list(queryset.select_related("video").order_by("-created_at", "-id")[:limit])
+    static_scores = static_scores_batch(user, posts, config, followee_ids=followee_ids)
+    return [
+        (static_score, datetime_to_score(post.created_at), post.id)
+        for static_score, post in zip(static_scores.tolist(), posts)
     ]
-    scored.sort(key=lambda pair: pair[1], reverse=True)
 
-    offset = _parse_cursor(cursor)
-    page_slice = scored[offset : offset + limit + 1]
+
+def _load_pool(user, mode: str, config: FeedRankingConfig, candidate_filter: Q, followee_ids, as_of, size):
+    """
+    Return the user's ranked candidate pool, building or incrementally refreshing it.
+
+    A cached pool only needs the posts created since it was last refreshed; those are
+    scored and merged, so the full candidate query runs once per TTL window. A scroll
+    pinned to an older `as_of` whose candidates a later refresh trimmed away gets a
+    pool ranked afresh for its own clock, which is not cached over the shared one.
+    """
+    pool = RankedPoolCache.get(user.id, mode)
+    if pool is not None and pool.size >= size:
+        if as_of > pool.as_of:
+            fresh = Post.objects.filter(candidate_filter, created_at__gt=pool.as_of, created_at__lte=as_of)
+            pool.merge(_score_candidates(user, fresh, size, config, followee_ids), as_of)
+            RankedPoolCache.set(user.id, mode, pool)
+        elif not pool.covers(as_of, size):
+            candidates = Post.objects.filter(candidate_filter, created_at__lte=as_of)
+            return RankedPool(as_of=as_of, size=size, entries=_score_candidates(user, candidates, size, config, followee_ids))
+        return pool
+    candidates = Post.objects.filter(candidate_filter, created_at__lte=as_of)
+    pool = RankedPool(as_of=as_of, size=size, entries=_score_candidates(user, candidates, size, config, followee_ids))
+    RankedPoolCache.set(user.id, mode, pool)
+    return pool
+
+
+def _rank_page(
+    user,
+    cursor: str | None,
+    limit: int,
+    config: FeedRankingConfig,
+    mode: str,
+    extra_filter: Q | None = None,
+) -> tuple[list[Post], str | None]:
+    """
+    Rank the candidate pool and return the page after `cursor` plus the next cursor.
+
+    Cursors are keyset positions over (score, created_at, id) and pin the ranking clock,
+    so later pages re-rank the same pool identically and never re-read skipped rows.
+    Raises ValueError for a malformed cursor.
+    """
+    rank_cursor = decode_rank_cursor(cursor) if cursor else None
+    as_of = rank_cursor.as_of if rank_cursor else timezone.now()
+
+    followee_ids = set(
+        Follow.objects.filter(follower=user).values_list("followee_id", flat=True)
+    )
+    candidate_filter = _candidate_filter(user, followee_ids, extra_filter)
+    candidate_limit = max(limit * 3, limit + 10)
+    pool = _load_pool(user, mode, config, candidate_filter, followee_ids, as_of, candidate_limit)
+
+    # A pool refreshed after this cursor was issued also holds newer posts; skip them.
+    entries = [entry for entry in pool.entries if entry[1] <= datetime_to_score(as_of)][:candidate_limit]
+    static_scores = np.array([entry[0] for entry in entries], dtype=np.float64)
+    created_us = np.array([entry[1] for entry in entries], dtype=np.int64)
+    post_ids = np.array([entry[2] for entry in entries], dtype=np.int64)
+    scores = config.recency_weight * recency_decay_batch(created_us, as_of) + static_scores
+
+    keep = np.ones(len(entries), dtype=bool)
+    if rank_cursor is not None:
+        cursor_us = datetime_to_score(rank_cursor.created_at)
+        keep = (scores < rank_cursor.score) | (
+            (scores == rank_cursor.score)
+            & ((created_us < cursor_us) | ((created_us == cursor_us) & (post_ids < rank_cursor.id)))
+        )
+    # lexsort keys run last-to-first: score, then created_at, then id; reversed for descending.
+    order = np.lexsort((post_ids, created_us, scores))[::-1]
+    order = order[keep[order]][: limit + 1]
+    ranked = [
+        (float(scores[i]), score_to_datetime(int(created_us[i])), int(post_ids[i]))
+        for i in order.tolist()
+    ]
+
+    page_slice = ranked[: limit + 1]
     has_next = len(page_slice) > limit
+    page_slice = page_slice[:limit]
+    next_cursor = None
     if has_next:
-        page_slice = page_slice[:limit]
-    posts_page = [pair[0] for pair in page_slice]
+        score, created_at, post_id = page_slice[-1]
+        next_cursor = encode_rank_cursor(RankCursor(score=score, created_at=created_at, id=post_id, as_of=as_of))
+
+    posts_by_id = {
+        post.id: post
+        for post in Post.objects.filter(candidate_filter, id__in=[row[2] for row in page_slice])
+        .select_related("author", "author__settings", "video")
+        .prefetch_related("media", "images")
+    }
+    return [posts_by_id[row[2]] for row in page_slice if row[2] in posts_by_id], next_cursor
+
+
+def compose_for_you_feed(user, cursor: str | None = None, limit: int = 20, serializer_context: dict | None = None):
+    """
+    Ranked feed using simple scoring over recent posts.
+    """
+    posts_page, next_cursor = _rank_page(user, cursor, limit, FEED_RANKING_CONFIG_FOR_YOU, mode="for_you")
     items = compose_home_feed_items(posts_page, serializer_context=serializer_context, user=user)
-    next_cursor = str(offset + limit) if has_next else None
     return items, next_cursor
 
 
@@ -237,37 +349,14 @@ def compose_for_you_videos_feed(
     - Applies existing ranking but excludes insight insertions.
     - Returns typed items with type="post" only.
     """
-    followee_ids = set(
-        Follow.objects.filter(follower=user).values_list("followee_id", flat=True)
-    )
-    visibility_filter = (
-        Q(video__isnull=False)
-        & (
-            Q(visibility=PostVisibility.PUBLIC)
-            | Q(author=user)
-            | (Q(visibility=PostVisibility.FOLLOWERS) & Q(author_id__in=followee_ids))
-        )
-    )
-    candidate_limit = max(limit * 3, limit + 10)
-    candidates = list(
-        Post.objects.filter(visibility_filter)
-        .select_related("author", "author__settings", "video")
-        .prefetch_related("media", "images")
-        .order_by("-created_at")[:candidate_limit]
+    posts_page, next_cursor = _rank_page(
+        user,
+        cursor,
+        limit,
+        FEED_RANKING_CONFIG_FOR_YOU_VIDEOS,
+        mode="for_you_videos",
+        extra_filter=Q(video__isnull=False),
     )
-
-    scored = [
-        (post, score_post_for_user(user, post, FEED_RANKING_CONFIG_FOR_YOU_VIDEOS, followee_ids=followee_ids))
-        for post in candidates
-    ]
-    scored.sort(key=lambda pair: pair[1], reverse=True)
-
-    offset = _parse_cursor(cursor)
-    page_slice = scored[offset : offset + limit + 1]
-    has_next = len(page_slice) > limit
-    if has_next:
-        page_slice = page_slice[:limit]
-    posts_page = [pair[0] for pair in page_slice]
     post_data = PostSerializer(
         posts_page,
         many=True,
@@ -277,23 +366,4 @@ def compose_for_you_videos_feed(
         {"type": "post", "id": post["id"], "post": post}
         for post in post_data
     ]
-    next_cursor = str(offset + limit) if has_next else None
     return items, next_cursor
-
-
-def _parse_cursor(cursor: str | None) -> int:
-    if not cursor:
-        return 0
-    try:
-        return max(0, int(cursor))
-    except ValueError:
-        return 0
-
-
-def _slice_with_cursor(queryset, cursor: str | None, limit: int):
-    offset = _parse_cursor(cursor)
-    slice_qs = list(queryset[offset : offset + limit + 1])
-    has_next = len(slice_qs) > limit
-    entries = slice_qs[:limit]
-    next_cursor = str(offset + limit) if has_next else None
-    return entries, next_cursor
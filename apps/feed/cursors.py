@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+def _isoformat(value: datetime) -> str:
+    return value.astimezone(dt_timezone.utc).isoformat()
+
+
+def _parse_ts(ts_raw) -> datetime:
+    if not isinstance(ts_raw, str):
+        raise ValueError("Invalid cursor.")
+    dt = parse_datetime(ts_raw)
+    if dt is None:
+        raise ValueError("Invalid cursor.")
+    if timezone.is_naive(dt):
+        return timezone.make_aware(dt, dt_timezone.utc)
+    return dt.astimezone(dt_timezone.utc)
+
+
+def _encode(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _decode(cursor_raw: str) -> dict:
+    padding = "=" * (-len(cursor_raw) % 4)
+    try:
+        decoded = base64.urlsafe_b64decode(cursor_raw + padding)
+        payload = json.loads(decoded.decode("utf-8"))
+    except (ValueError, json.JSONDecodeError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.") from None
+    if not isinstance(payload, dict) or not isinstance(payload.get("id"), int):
+        raise ValueError("Invalid cursor.")
+    return payload
+
+
+def encode_cursor(created_at: datetime, entry_id: int) -> str:
+    return _encode({"ts": _isoformat(created_at), "id": entry_id})
+
+
+def decode_cursor(cursor_raw: str) -> tuple[datetime, int]:
+    """Decode an opaque chronological feed cursor; raises ValueError when it is malformed."""
+    payload = _decode(cursor_raw)
+    return _parse_ts(payload.get("ts")), payload["id"]
+
+
+@dataclass(frozen=True)
+class RankCursor:
+    """
+    Position in a ranked feed: the last item's (score, created_at, id) plus the
+    reference time scores were computed at, so later pages rank with the same clock.
+    """
+
+    score: float
+    created_at: datetime
+    id: int
+    as_of: datetime
+
+    @property
+    def key(self) -> tuple[float, datetime, int]:
+        return (self.score, self.created_at, self.id)
+
+
+def encode_rank_cursor(cursor: RankCursor) -> str:
+    return _encode(
+        {
+            "s": cursor.score,
+            "ts": _isoformat(cursor.created_at),
+            "id": cursor.id,
+            "at": _isoformat(cursor.as_of),
+        }
+    )
+
+
+def decode_rank_cursor(cursor_raw: str) -> RankCursor:
+    """Decode an opaque ranked feed cursor; raises ValueError when it is malformed."""
+    payload = _decode(cursor_raw)
+    score = payload.get("s")
+    if isinstance(score, bool) or not isinstance(score, (int, float)):
+        raise ValueError("Invalid cursor.")
+    return RankCursor(
+        score=float(score),
+        created_at=_parse_ts(payload.get("ts")),
+        id=payload["id"],
+        as_of=_parse_ts(payload.get("at")),
+    )
@@ -2,7 +2,10 @@ from __future__ import annotations
 
 import math
 from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from typing import Sequence
 
+import numpy as np
 from django.utils import timezone
 from django.core.exceptions import ObjectDoesNotExist
 
@@ -47,15 +50,18 @@ FEED_RANKING_CONFIG_FOR_YOU_VIDEOS = FeedRankingConfig(
 )
 
 
-def compute_recency_score(post) -> float:
+def compute_recency_score(post, now=None) -> float:
     """
     Exponential decay over time so fresh posts dominate while older high-signal posts can still surface.
+    `now` pins the reference time so every page of a ranked feed decays against the same clock.
     """
     created_at = getattr(post, "created_at", None)
     if not created_at:
         return 0.0
+    return recency_decay(created_at, now or timezone.now())
 
-    now = timezone.now()
+
+def recency_decay(created_at, now) -> float:
     age_hours = max(0.0, (now - created_at).total_seconds() / 3600.0)
     # exp(-ln(2) * t / half_life) halves the score every RECENCY_HALF_LIFE_HOURS.
     decay = math.exp(-math.log(2) * age_hours / RECENCY_HALF_LIFE_HOURS)
@@ -114,18 +120,16 @@ def compute_daily_energy_alignment(user, post) -> float:
     return 0.0
 
 
-def score_post_for_user(user, post, config: FeedRankingConfig, followee_ids: set[int] | None = None) -> float:
+def compute_static_score(user, post, config: FeedRankingConfig, followee_ids: set[int] | None = None) -> float:
     """
-    Configurable ranking score combining recency, engagement, relationship, and future hooks.
+    Every ranking term except recency. It does not change as the post ages, so ranked
+    candidate pools can cache it and re-rank later with combine_score alone.
     """
-    recency = compute_recency_score(post)
     like_score, comment_score = compute_engagement_score(post)
     relationship = compute_follow_relationship_score(user, post, followee_ids=followee_ids or set())
     video_flag = compute_video_flag(post)
-
-    score = (
-        config.recency_weight * recency
-        + config.like_weight * like_score
+    return float(
+        config.like_weight * like_score
         + config.comment_weight * comment_score
         + config.follow_author_weight * relationship
         + config.video_bonus_weight * video_flag
@@ -133,4 +137,116 @@ def score_post_for_user(user, post, config: FeedRankingConfig, followee_ids: set
         + config.daily_energy_alignment_weight * compute_daily_energy_alignment(user, post)
         + config.base_engagement_bias
     )
-    return float(score)
+
+
+def combine_score(config: FeedRankingConfig, recency: float, static_score: float) -> float:
+    return float(config.recency_weight * recency + static_score)
+
+
+def score_post_for_user(
+    user,
+    post,
+    config: FeedRankingConfig,
+    followee_ids: set[int] | None = None,
+    now=None,
+) -> float:
+    """
+    Configurable ranking score combining recency, engagement, relationship, and future hooks.
+    """
+    return combine_score(
+        config,
+        compute_recency_score(post, now=now),
+        compute_static_score(user, post, config, followee_ids=followee_ids),
+    )
+
+
+# --- Batch scoring -------------------------------------------------------------------------
+# Arithmetic runs elementwise in NumPy in the same operation order as the scalar functions
+# above. exp/log1p go through libm (math) because NumPy's SIMD kernels can differ in the last
+# ulp; log1p only sees a handful of distinct engagement counts, so it is applied per unique value.
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _epoch_us(value: datetime) -> int:
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _log1p_unique(values: np.ndarray) -> np.ndarray:
+    if values.size == 0:
+        return values.astype(np.float64)
+    uniques, inverse = np.unique(values, return_inverse=True)
+    table = np.array([math.log1p(value) for value in uniques.tolist()], dtype=np.float64)
+    return table[inverse.reshape(-1)]
+
+
+def recency_decay_batch(created_us: np.ndarray, now: datetime, has_created: np.ndarray | None = None) -> np.ndarray:
+    """Vector form of recency_decay for created_at values given in epoch microseconds."""
+    created_us = np.asarray(created_us, dtype=np.int64)
+    age_us = np.int64(_epoch_us(now)) - created_us
+    age_hours = np.maximum(0.0, (age_us / 1_000_000) / 3600.0)
+    exponent = -math.log(2) * age_hours / RECENCY_HALF_LIFE_HOURS
+    decay = np.array([math.exp(value) for value in exponent.tolist()], dtype=np.float64)
+    if has_created is not None:
+        decay = np.where(has_created, decay, 0.0)
+    return decay
+
+
+def static_scores_batch(
+    user,
+    posts: Sequence,
+    config: FeedRankingConfig,
+    followee_ids: set[int] | None = None,
+) -> np.ndarray:
+    """compute_static_score for many posts at once; element i equals the scalar result for posts[i]."""
+    followee_ids = followee_ids or set()
+    count = len(posts)
+    likes = np.fromiter((max(0, getattr(p, "like_count", 0) or 0) for p in posts), dtype=np.float64, count=count)
+    comments = np.fromiter((max(0, getattr(p, "comment_count", 0) or 0) for p in posts), dtype=np.float64, count=count)
+    authors = np.fromiter((getattr(p, "author_id", None) or 0 for p in posts), dtype=np.int64, count=count)
+    video = np.fromiter((compute_video_flag(p) for p in posts), dtype=np.float64, count=count)
+
+    normalizer = math.log1p(ENGAGEMENT_NORMALIZER)
+    like_score = np.minimum(_log1p_unique(likes) / normalizer, 1.0)
+    comment_score = np.minimum(_log1p_unique(comments * COMMENT_ENGAGEMENT_MULTIPLIER) / normalizer, 1.0)
+    relationship = np.isin(authors, np.fromiter(followee_ids, dtype=np.int64)).astype(np.float64)
+
+    # Alignment hooks are per-post Python calls; skip them when their weight is zero.
+    matrix = np.zeros(count)
+    if config.matrix_alignment_weight:
+        matrix = np.fromiter((compute_matrix_alignment(user, p) for p in posts), dtype=np.float64, count=count)
+    energy = np.zeros(count)
+    if config.daily_energy_alignment_weight:
+        energy = np.fromiter((compute_daily_energy_alignment(user, p) for p in posts), dtype=np.float64, count=count)
+
+    return (
+        config.like_weight * like_score
+        + config.comment_weight * comment_score
+        + config.follow_author_weight * relationship
+        + config.video_bonus_weight * video
+        + config.matrix_alignment_weight * matrix
+        + config.daily_energy_alignment_weight * energy
+        + config.base_engagement_bias
+    )
+
+
+def score_posts_batch(
+    user,
+    posts: Sequence,
+    config: FeedRankingConfig,
+    followee_ids: set[int] | None = None,
+    now: datetime | None = None,
+) -> np.ndarray:
+    """
+    Score many posts in one pass with a single reference time.
+
+    Returns a float64 array numerically identical to calling score_post_for_user per post.
+    """
+    now = now or timezone.now()
+    count = len(posts)
+    created = [getattr(p, "created_at", None) for p in posts]
+    has_created = np.fromiter((value is not None for value in created), dtype=bool, count=count)
+    created_us = np.fromiter((_epoch_us(value) if value else 0 for value in created), dtype=np.int64, count=count)
+    recency = recency_decay_batch(created_us, now, has_created=has_created)
+    return config.recency_weight * recency + static_scores_batch(user, posts, config, followee_ids=followee_ids)
@@ -1,22 +1,69 @@
 from __future__ import annotations
 
+import logging
 from typing import Iterable
 
 from django.db import transaction
+from redis.exceptions import RedisError
 
+from apps.feed import timelines
 from apps.social.models import Follow, Post, Timeline
 
+logger = logging.getLogger(__name__)
 
-def fan_out_post(post: Post) -> None:
-    followers = Follow.objects.filter(followee=post.author).values_list("follower_id", flat=True)
-    _bulk_timeline_entries(post, followers)
+_TIMELINE_BULK_BATCH_SIZE = 1000
+
+
+def record_author_timeline_entry(post: Post) -> None:
     Timeline.objects.update_or_create(user=post.author, post=post, defaults={"score": 1.0})
 
 
+def fan_out_post(post: Post) -> dict:
+    """
+    Hybrid fan-out for a new post; runs in a worker, outside the author's request.
+
+    Authors below FEED_FANOUT_FOLLOWER_THRESHOLD push the post into every active
+    follower's capped Redis timeline. Larger authors are marked as pull authors and
+    merged into followers' feeds at read time. An author dropping back below the
+    threshold has their followers' timelines dropped, as those were built without them.
+    The legacy Timeline table behind /feed/home/ still gets a row for every follower of
+    every author (pull authors included), written in batches here; it grows as before.
+    """
+    follower_count = Follow.objects.filter(followee_id=post.author_id).count()
+    is_pull = follower_count >= timelines.fanout_follower_threshold()
+    pushed = 0
+    if timelines.timelines_enabled():
+        try:
+            if timelines.mark_pull_author(post.author_id, is_pull):
+                timelines.invalidate_timelines(_follower_ids(post.author_id))
+            recipients = [post.author_id]
+            if not is_pull and timelines.visible_to_followers(post):
+                recipients = _follower_ids(post.author_id, include=[post.author_id])
+            pushed = timelines.push_post(post, recipients)
+        except RedisError as exc:
+            logger.warning("Timeline fan-out failed for post %s: %s", post.id, exc)
+
+    _bulk_timeline_entries(post, _follower_ids(post.author_id))
+    return {"followers": follower_count, "pull": is_pull, "timelines_pushed": pushed}
+
+
+def _follower_ids(author_id: int, include: Iterable[int] = ()) -> Iterable[int]:
+    yield from include
+    yield from (
+        Follow.objects.filter(followee_id=author_id)
+        .values_list("follower_id", flat=True)
+        .iterator(chunk_size=_TIMELINE_BULK_BATCH_SIZE)
+    )
+
+
 def _bulk_timeline_entries(post: Post, user_ids: Iterable[int]) -> None:
-    with transaction.atomic():
-        entries = [
-            Timeline(user_id=user_id, post=post, score=1.0)
-            for user_id in user_ids
-        ]
-        Timeline.objects.bulk_create(entries, ignore_conflicts=True)
+    batch: list[Timeline] = []
+    for user_id in user_ids:
+        batch.append(Timeline(user_id=user_id, post=post, score=1.0))
+        if len(batch) >= _TIMELINE_BULK_BATCH_SIZE:
+            with transaction.atomic():
+                Timeline.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        with transaction.atomic():
+            Timeline.objects.bulk_create(batch, ignore_conflicts=True)
@@ -10,12 +10,21 @@ from django.utils import timezone
 from apps.matching.services.feed_insights import compute_soulmatch_payload
 from apps.matrix.feed_insights import compute_matrix_payload
 from apps.mentor.services.feed_insights import compute_mentor_payload
-from apps.social.models import Timeline
+from apps.feed.services import fan_out_post
+from apps.social.models import Post, Timeline
 from services.reco.jobs import rebuild_user_timeline
 
 logger = logging.getLogger(__name__)
 
 
+@shared_task
+def fan_out_post_task(post_id: int) -> dict:
+    post = Post.objects.filter(id=post_id).first()
+    if post is None:
+        return {"followers": 0, "pull": False, "timelines_pushed": 0}
+    return fan_out_post(post)
+
+
 @shared_task
 def prune_old_timeline_entries(days: int = 30) -> int:
     cutoff = timezone.now() - timedelta(days=days)
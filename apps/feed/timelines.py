@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone as dt_timezone
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+from redis.exceptions import RedisError
+
+from apps.core.pubsub import get_redis_client
+from apps.social.models import Follow, Post, PostVisibility
+
+logger = logging.getLogger(__name__)
+
+# (score, post_id) where score is the post's created_at in epoch microseconds.
+# Microseconds fit in a double's 53-bit mantissa, so ZSET scores round-trip exactly.
+TimelineEntry = Tuple[int, int]
+
+PULL_AUTHORS_KEY = "feed:timeline:pull_authors"
+# Placeholder member so an empty-but-materialized timeline still exists in Redis.
+_SENTINEL_MEMBER = "0"
+_SENTINEL_SCORE = -1
+_FANOUT_CHUNK_SIZE = 1000
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# ZADD only into a timeline that is still materialized, then trim and refresh its TTL.
+# EXISTS and ZADD must be atomic: a key expiring in between would be recreated without
+# its sentinel or TTL and then read as a complete timeline holding a single post.
+# Rank 0 is the sentinel (lowest score); keep it plus the newest ARGV[3] posts.
+_PUSH_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+  return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+redis.call('ZREMRANGEBYRANK', KEYS[1], 1, -(tonumber(ARGV[3]) + 1))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+
+def timelines_enabled() -> bool:
+    return bool(getattr(settings, "FEED_TIMELINES_ENABLED", True))
+
+
+def timeline_max_entries() -> int:
+    return max(1, int(getattr(settings, "FEED_TIMELINE_MAX_ENTRIES", 800)))
+
+
+def timeline_ttl_seconds() -> int:
+    return max(60, int(getattr(settings, "FEED_TIMELINE_TTL_SECONDS", 7 * 24 * 3600)))
+
+
+def fanout_follower_threshold() -> int:
+    return max(1, int(getattr(settings, "FEED_FANOUT_FOLLOWER_THRESHOLD", 5000)))
+
+
+def timeline_key(user_id: int) -> str:
+    return f"feed:timeline:{user_id}"
+
+
+def datetime_to_score(value: datetime) -> int:
+    delta = value.astimezone(dt_timezone.utc) - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def score_to_datetime(score: int) -> datetime:
+    seconds, micros = divmod(int(score), 1_000_000)
+    return datetime.fromtimestamp(seconds, tz=dt_timezone.utc).replace(microsecond=micros)
+
+
+def visible_to_followers(post: Post) -> bool:
+    return post.visibility in (PostVisibility.PUBLIC, PostVisibility.FOLLOWERS)
+
+
+def _keyset_filter(before: Optional[TimelineEntry]) -> Q:
+    if before is None:
+        return Q()
+    before_dt = score_to_datetime(before[0])
+    return Q(created_at__lt=before_dt) | Q(created_at=before_dt, id__lt=before[1])
+
+
+def _entries_from_queryset(queryset, limit: int) -> List[TimelineEntry]:
+    rows = queryset.order_by("-created_at", "-id").values_list("created_at", "id")[:limit]
+    return [(datetime_to_score(created_at), post_id) for created_at, post_id in rows]
+
+
+def following_posts_filter(user_id: int, followee_ids: Iterable[int]) -> Q:
+    """Posts that belong on a user's following feed: own posts plus followees' non-private posts."""
+    return Q(author_id=user_id) | (
+        Q(author_id__in=list(followee_ids))
+        & Q(visibility__in=[PostVisibility.PUBLIC, PostVisibility.FOLLOWERS])
+    )
+
+
+def _decode_entries(raw: Sequence) -> List[TimelineEntry]:
+    entries: List[TimelineEntry] = []
+    for member, score in raw:
+        if isinstance(member, bytes):
+            member = member.decode("utf-8", errors="ignore")
+        try:
+            post_id = int(member)
+        except (TypeError, ValueError):
+            continue
+        if post_id:
+            entries.append((int(score), post_id))
+    return entries
+
+
+def push_post(post: Post, follower_ids: Iterable[int]) -> int:
+    """
+    Fan-out-on-write: add the post to the timelines of followers that have a live timeline.
+
+    Followers without a materialized timeline are skipped; their timeline is rebuilt from the
+    database on their next read. Returns the number of timelines updated.
+    """
+    client = get_redis_client()
+    script = client.register_script(_PUSH_LUA)
+    args = [str(post.id), datetime_to_score(post.created_at), timeline_max_entries(), timeline_ttl_seconds()]
+    updated = 0
+    chunk: List[int] = []
+
+    def _flush(user_ids: List[int]) -> int:
+        pipe = client.pipeline(transaction=False)
+        for user_id in user_ids:
+            script(keys=[timeline_key(user_id)], args=args, client=pipe)
+        return sum(int(pushed or 0) for pushed in pipe.execute())
+
+    for user_id in follower_ids:
+        chunk.append(user_id)
+        if len(chunk) >= _FANOUT_CHUNK_SIZE:
+            updated += _flush(chunk)
+            chunk = []
+    if chunk:
+        updated += _flush(chunk)
+    return updated
+
+
+def mark_pull_author(author_id: int, is_pull: bool) -> bool:
+    """Record whether the author is merged by pull; True when the author just flipped pull -> push."""
+    client = get_redis_client()
+    if is_pull:
+        client.sadd(PULL_AUTHORS_KEY, author_id)
+        return False
+    return bool(client.srem(PULL_AUTHORS_KEY, author_id))
+
+
+def invalidate_timelines(user_ids: Iterable[int]) -> int:
+    """
+    Drop many materialized timelines, e.g. every follower's once an author flips from pull
+    to push: those timelines were built without the author's posts and pushes only extend
+    them, so the earlier posts would otherwise never return while the user stays active.
+    """
+    client = get_redis_client()
+    dropped = 0
+    chunk: List[int] = []
+    for user_id in user_ids:
+        chunk.append(user_id)
+        if len(chunk) >= _FANOUT_CHUNK_SIZE:
+            dropped += client.delete(*(timeline_key(uid) for uid in chunk))
+            chunk = []
+    if chunk:
+        dropped += client.delete(*(timeline_key(uid) for uid in chunk))
+    return dropped
+
+
+def _pull_author_ids(client, followee_ids: set[int]) -> set[int]:
+    if not followee_ids:
+        return set()
+    members = client.smembers(PULL_AUTHORS_KEY) or set()
+    pull_ids = set()
+    for member in members:
+        if isinstance(member, bytes):
+            member = member.decode("utf-8", errors="ignore")
+        try:
+            pull_ids.add(int(member))
+        except (TypeError, ValueError):
+            continue
+    return pull_ids & followee_ids
+
+
+def _materialize(client, user_id: int, push_followee_ids: set[int]) -> None:
+    key = timeline_key(user_id)
+    # Create the key before reading the database, and never DELETE it afterwards: a post
+    # committed before this point is in the query below, and one pushed after it lands in
+    # the ZSET (pushes skip missing keys), so neither can fall between the two.
+    pipe = client.pipeline(transaction=True)
+    pipe.zadd(key, {_SENTINEL_MEMBER: _SENTINEL_SCORE})
+    pipe.expire(key, timeline_ttl_seconds())
+    pipe.execute()
+    max_entries = timeline_max_entries()
+    entries = _entries_from_queryset(
+        Post.objects.filter(following_posts_filter(user_id, push_followee_ids)),
+        max_entries,
+    )
+    pipe = client.pipeline(transaction=True)
+    if entries:
+        pipe.zadd(key, {str(post_id): score for score, post_id in entries})
+    pipe.zremrangebyrank(key, 1, -(max_entries + 1))
+    pipe.expire(key, timeline_ttl_seconds())
+    pipe.execute()
+
+
+def _read_pushed(
+    client, user_id: int, before: Optional[TimelineEntry], limit: int
+) -> Tuple[List[TimelineEntry], Optional[TimelineEntry]]:
+    """
+    Pushed entries older than `before`, plus the oldest retained entry when the timeline
+    is at its cap (older posts were trimmed and must come from the database).
+    """
+    key = timeline_key(user_id)
+    pipe = client.pipeline(transaction=False)
+    if before is None:
+        pipe.zrevrangebyscore(key, "+inf", 0, start=0, num=limit, withscores=True)
+    else:
+        # Same-score entries older than the cursor id, then strictly older scores.
+        pipe.zrevrangebyscore(key, before[0], before[0], withscores=True)
+        pipe.zrevrangebyscore(key, f"({before[0]}", 0, start=0, num=limit, withscores=True)
+    pipe.zcard(key)
+    # Rank 0 is the sentinel, so rank 1 is the oldest post.
+    pipe.zrange(key, 1, 1, withscores=True)
+    pipe.expire(key, timeline_ttl_seconds())
+    results = pipe.execute()
+    size, oldest = results[-3], _decode_entries(results[-2])
+    trimmed_below = oldest[0] if oldest and int(size) > timeline_max_entries() else None
+    if before is None:
+        return sorted(_decode_entries(results[0]), reverse=True), trimmed_below
+    same_score = [entry for entry in _decode_entries(results[0]) if entry[1] < before[1]]
+    same_score.sort(reverse=True)
+    return (same_score + sorted(_decode_entries(results[1]), reverse=True))[:limit], trimmed_below
+
+
+def _read_pulled(pull_author_ids: set[int], before: Optional[TimelineEntry], limit: int) -> List[TimelineEntry]:
+    if not pull_author_ids:
+        return []
+    queryset = Post.objects.filter(
+        Q(author_id__in=pull_author_ids, visibility__in=[PostVisibility.PUBLIC, PostVisibility.FOLLOWERS])
+        & _keyset_filter(before)
+    )
+    return _entries_from_queryset(queryset, limit)
+
+
+def _read_from_database(user_id: int, followee_ids: set[int], before: Optional[TimelineEntry], limit: int):
+    queryset = Post.objects.filter(following_posts_filter(user_id, followee_ids) & _keyset_filter(before))
+    return _entries_from_queryset(queryset, limit)
+
+
+def read_following_entries(
+    user_id: int,
+    before: Optional[TimelineEntry] = None,
+    limit: int = 20,
+    followee_ids: Optional[set[int]] = None,
+) -> List[TimelineEntry]:
+    """
+    Return up to `limit` (score, post_id) entries older than `before`, newest first.
+
+    Pushed entries come from the user's capped Redis timeline; posts by high-follower
+    authors are pulled from the database and merged at read time. Pages that run past
+    the oldest entry of a full timeline continue from the database, so the whole
+    followed history stays reachable. Falls back to a database-only read when Redis is
+    disabled or unavailable.
+    """
+    if followee_ids is None:
+        followee_ids = set(Follow.objects.filter(follower_id=user_id).values_list("followee_id", flat=True))
+    if not timelines_enabled():
+        return _read_from_database(user_id, followee_ids, before, limit)
+    try:
+        client = get_redis_client()
+        pull_ids = _pull_author_ids(client, followee_ids)
+        if not client.exists(timeline_key(user_id)):
+            _materialize(client, user_id, followee_ids - pull_ids)
+        pushed, trimmed_below = _read_pushed(client, user_id, before, limit)
+    except RedisError as exc:
+        logger.warning("Timeline read failed for user %s, using database: %s", user_id, exc)
+        return _read_from_database(user_id, followee_ids, before, limit)
+
+    if len(pushed) < limit and trimmed_below is not None:
+        resume = trimmed_below if before is None or trimmed_below < before else before
+        pushed += _read_from_database(user_id, followee_ids - pull_ids, resume, limit - len(pushed))
+    merged = {post_id: score for score, post_id in pushed}
+    for score, post_id in _read_pulled(pull_ids, before, limit):
+        merged.setdefault(post_id, score)
+    return sorted(((score, post_id) for post_id, score in merged.items()), reverse=True)[:limit]
+
+
+def invalidate_timeline(user_id: int) -> None:
+    """Drop a user's materialized timeline (e.g. after follow/unfollow); it is rebuilt on next read."""
+    if not timelines_enabled():
+        return
+    try:
+        get_redis_client().delete(timeline_key(user_id))
+    except RedisError as exc:
+        logger.warning("Failed to invalidate timeline for user %s: %s", user_id, exc)
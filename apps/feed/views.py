@@ -6,6 +6,7 @@ import time
 from django.conf import settings
 from django.core.cache import cache
 from django.utils import timezone
+from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
@@ -13,12 +14,14 @@ from rest_framework.views import APIView
 
 from apps.feed.composer import compose_for_you_feed, compose_for_you_videos_feed, compose_following_feed
 from apps.feed.cache import FeedCache
+from apps.feed.cursors import decode_cursor, decode_rank_cursor
 
 logger = logging.getLogger(__name__)
 
 
 class BaseFeedView(APIView):
     permission_classes = [IsAuthenticated]
+    cursor_decoder = staticmethod(decode_rank_cursor)
 
     def _pagination_params(self, request: Request) -> tuple[int, str | None]:
         default_limit = int(getattr(settings, "REST_FRAMEWORK", {}).get("PAGE_SIZE", 20))
@@ -30,6 +33,16 @@ class BaseFeedView(APIView):
         cursor = request.query_params.get("cursor")
         return limit, cursor
 
+    def _cursor_is_valid(self, cursor: str | None) -> bool:
+        # Decode up front: a ValueError raised while composing is a server error, not a bad cursor.
+        if not cursor:
+            return True
+        try:
+            self.cursor_decoder(cursor)
+        except ValueError:
+            return False
+        return True
+
     def _serializer_context(self, request: Request) -> dict:
         return {"request": request}
 
@@ -37,6 +50,8 @@ class BaseFeedView(APIView):
 class ForYouFeedView(BaseFeedView):
     def get(self, request: Request, *args, **kwargs) -> Response:  # type: ignore[override]
         limit, cursor = self._pagination_params(request)
+        if not self._cursor_is_valid(cursor):
+            return Response({"detail": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
         cache_hit = FeedCache.get(request.user.id, "for_you", cursor)
         if cache_hit is not None:
             logger.info("feed cache hit", extra={"user_id": request.user.id, "mode": "for_you", "cursor": cursor})
@@ -60,8 +75,12 @@ class ForYouFeedView(BaseFeedView):
 
 
 class FollowingFeedView(BaseFeedView):
+    cursor_decoder = staticmethod(decode_cursor)
+
     def get(self, request: Request, *args, **kwargs) -> Response:  # type: ignore[override]
         limit, cursor = self._pagination_params(request)
+        if not self._cursor_is_valid(cursor):
+            return Response({"detail": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
         cache_hit = FeedCache.get(request.user.id, "following", cursor)
         if cache_hit is not None:
             logger.info("feed cache hit", extra={"user_id": request.user.id, "mode": "following", "cursor": cursor})
@@ -92,6 +111,8 @@ class FollowingFeedView(BaseFeedView):
 class ForYouVideosFeedView(BaseFeedView):
     def get(self, request: Request, *args, **kwargs) -> Response:  # type: ignore[override]
         limit, cursor = self._pagination_params(request)
+        if not self._cursor_is_valid(cursor):
+            return Response({"detail": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
         cache_hit = FeedCache.get(request.user.id, "for_you_videos", cursor)
         if cache_hit is not None:
             logger.info(
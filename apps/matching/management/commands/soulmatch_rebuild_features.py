@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from apps.matching.services.features import refresh_features_many
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = "Rebuild precomputed SoulmatchFeatures rows for all users (idempotent)."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--batch-size", type=int, default=1000, help="Users processed per batch.")
+
+    def handle(self, *args, **options) -> None:
+        batch_size = max(1, min(int(options.get("batch_size") or 1000), 10000))
+        last_id = 0
+        total = 0
+
+        while True:
+            user_ids = list(
+                User.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not user_ids:
+                break
+            refresh_features_many(user_ids)
+            total += len(user_ids)
+            last_id = user_ids[-1]
+            self.stdout.write(f"processed_up_to_user_id={last_id} rebuilt={len(user_ids)}")
+
+        self.stdout.write(self.style.SUCCESS(f"soulmatch_rebuild_features complete: rebuilt={total}"))
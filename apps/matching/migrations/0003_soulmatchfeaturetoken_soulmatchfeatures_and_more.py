@@ -0,0 +1,57 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:40
+
+import django.db.models.deletion
+import libs.idgen
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0002_rename_matching_soul_pai_2847a3_idx_matching_so_pair_ke_a9bca2_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SoulmatchFeatureToken',
+            fields=[
+                ('id', models.BigIntegerField(default=libs.idgen.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('dimension', models.CharField(max_length=32)),
+                ('token', models.CharField(max_length=255)),
+                ('bit', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SoulmatchFeatures',
+            fields=[
+                ('id', models.BigIntegerField(default=libs.idgen.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('version', models.PositiveSmallIntegerField(default=1)),
+                ('has_profile', models.BooleanField(default=False)),
+                ('element', models.PositiveSmallIntegerField(default=0)),
+                ('venus_element', models.PositiveSmallIntegerField(default=0)),
+                ('mars_element', models.PositiveSmallIntegerField(default=0)),
+                ('attachment', models.PositiveSmallIntegerField(default=0)),
+                ('values_bits', models.TextField(blank=True, default='0')),
+                ('lifestyle_bits', models.TextField(blank=True, default='0')),
+                ('love_language_bits', models.TextField(blank=True, default='0')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='soulmatch_features', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='soulmatchfeaturetoken',
+            constraint=models.UniqueConstraint(fields=('dimension', 'token'), name='matching_feature_token_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='soulmatchfeaturetoken',
+            constraint=models.UniqueConstraint(fields=('dimension', 'bit'), name='matching_feature_bit_uniq'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from django.conf import settings
 from django.db import models
 
 from apps.core.models import BaseModel
@@ -21,3 +22,47 @@ class SoulMatchResult(BaseModel):
     def __str__(self) -> str:  # pragma: no cover - debug helper
         return f"SoulMatchResult<{self.pair_key}:{self.rules_version}>"
 
+
+
+class SoulmatchFeatureToken(BaseModel):
+    """Append-only vocabulary mapping free-form profile tokens to bit positions per dimension."""
+
+    dimension = models.CharField(max_length=32)
+    token = models.CharField(max_length=255)
+    bit = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["dimension", "token"], name="matching_feature_token_uniq"),
+            models.UniqueConstraint(fields=["dimension", "bit"], name="matching_feature_bit_uniq"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - debug helper
+        return f"{self.dimension}:{self.token}={self.bit}"
+
+
+class SoulmatchFeatures(BaseModel):
+    """
+    Compact per-user scoring inputs derived from UserProfile + NatalChart.
+
+    Maintained by apps.matching.signals; bitsets are hex-encoded ints over
+    SoulmatchFeatureToken bit positions.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="soulmatch_features",
+    )
+    version = models.PositiveSmallIntegerField(default=1)
+    has_profile = models.BooleanField(default=False)
+    element = models.PositiveSmallIntegerField(default=0)
+    venus_element = models.PositiveSmallIntegerField(default=0)
+    mars_element = models.PositiveSmallIntegerField(default=0)
+    attachment = models.PositiveSmallIntegerField(default=0)
+    values_bits = models.TextField(default="0", blank=True)
+    lifestyle_bits = models.TextField(default="0", blank=True)
+    love_language_bits = models.TextField(default="0", blank=True)
+
+    def __str__(self) -> str:  # pragma: no cover - debug helper
+        return f"SoulmatchFeatures<{self.user_id}>"
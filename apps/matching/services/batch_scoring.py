@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+
+from apps.matching.models import SoulMatchResult
+from apps.matching.services.soulmatch import calculate_soulmatch_many
+from apps.users.models import User
+
+_PAYLOAD_META_KEYS = ("pair_key", "rules_version", "user_a_id", "user_b_id")
+
+
+def pair_key(user_a_id: int, user_b_id: int) -> str:
+    return f"{min(user_a_id, user_b_id)}:{max(user_a_id, user_b_id)}"
+
+
+def _default_rules_version() -> str:
+    return getattr(settings, "MATCH_RULES_VERSION", "v1")
+
+
+def load_cached_scores(
+    user: User,
+    candidate_ids: Iterable[int],
+    rules_version: str | None = None,
+) -> Tuple[Dict[int, Dict[str, object]], List[int]]:
+    """
+    Read SoulMatchResult rows for (user, candidate) pairs in one query.
+
+    Returns (results_by_candidate_id, missing_candidate_ids).
+    """
+    rules_version = rules_version or _default_rules_version()
+    keys = {candidate_id: pair_key(user.id, candidate_id) for candidate_id in candidate_ids if candidate_id != user.id}
+    if not keys:
+        return {}, []
+    payloads = dict(
+        SoulMatchResult.objects.filter(rules_version=rules_version, pair_key__in=set(keys.values())).values_list(
+            "pair_key", "payload_json"
+        )
+    )
+    results: Dict[int, Dict[str, object]] = {}
+    missing: List[int] = []
+    for candidate_id, key in keys.items():
+        payload = payloads.get(key)
+        if not payload:
+            missing.append(candidate_id)
+            continue
+        result = {k: v for k, v in payload.items() if k not in _PAYLOAD_META_KEYS}
+        # pair_key is symmetric; always report the candidate as the matched user.
+        result["user_id"] = candidate_id
+        results[candidate_id] = result
+    return results, missing
+
+
+def score_candidates(
+    user: User,
+    candidate_ids: Iterable[int],
+    rules_version: str | None = None,
+) -> Dict[int, Dict[str, object]]:
+    """
+    Score a user against many candidates in-process, using SoulMatchResult as a read-through cache.
+
+    Cache misses are scored in one batch pass and persisted with a single bulk insert,
+    so the request never waits on the Celery broker.
+    """
+    rules_version = rules_version or _default_rules_version()
+    results, missing = load_cached_scores(user, candidate_ids, rules_version)
+    if not missing:
+        return results
+
+    computed = calculate_soulmatch_many(user, missing)
+    SoulMatchResult.objects.bulk_create(
+        [
+            SoulMatchResult(
+                pair_key=pair_key(user.id, candidate_id),
+                rules_version=rules_version,
+                score=float(result.get("score", 0)),
+                payload_json={
+                    "pair_key": pair_key(user.id, candidate_id),
+                    "rules_version": rules_version,
+                    "user_a_id": user.id,
+                    "user_b_id": candidate_id,
+                    **result,
+                },
+            )
+            for candidate_id, result in computed.items()
+        ],
+        ignore_conflicts=True,
+    )
+    results.update(computed)
+    return results
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+
+from apps.astro.models import NatalChart
+from apps.matching.models import SoulmatchFeatures, SoulmatchFeatureToken
+from apps.matching.services.soulmatch import (
+    ELEMENTS_BY_SIGN,
+    SoulmatchScores,
+    _dominant_element,
+    _generate_tags,
+    _non_empty_profile,
+)
+from apps.profile.models import UserProfile
+
+FEATURES_VERSION = 1
+
+DIMENSION_VALUES = "values"
+DIMENSION_LIFESTYLE = "preferred_lifestyle"
+DIMENSION_LOVE_LANGUAGE = "love_language"
+
+ELEMENT_NONE = 0
+# Sign present on the chart but not one of the twelve known signs.
+ELEMENT_UNKNOWN_SIGN = 5
+ELEMENT_CODES = {"fire": 1, "earth": 2, "air": 3, "water": 4}
+_GOOD_ELEMENT_PAIRS = {
+    (ELEMENT_CODES["fire"], ELEMENT_CODES["air"]),
+    (ELEMENT_CODES["air"], ELEMENT_CODES["fire"]),
+    (ELEMENT_CODES["water"], ELEMENT_CODES["earth"]),
+    (ELEMENT_CODES["earth"], ELEMENT_CODES["water"]),
+}
+
+ATTACHMENT_NONE = 0
+ATTACHMENT_SECURE = 1
+ATTACHMENT_ANXIOUS = 2
+ATTACHMENT_AVOIDANT = 3
+ATTACHMENT_OTHER = 4
+_ATTACHMENT_CODES = {
+    "secure": ATTACHMENT_SECURE,
+    "anxious": ATTACHMENT_ANXIOUS,
+    "avoidant": ATTACHMENT_AVOIDANT,
+}
+
+_MAX_TOKEN_LENGTH = 255
+
+
+@dataclass(frozen=True)
+class CandidateFeatures:
+    has_profile: bool = False
+    element: int = ELEMENT_NONE
+    venus_element: int = ELEMENT_NONE
+    mars_element: int = ELEMENT_NONE
+    attachment: int = ATTACHMENT_NONE
+    values_bits: int = 0
+    lifestyle_bits: int = 0
+    love_language_bits: int = 0
+
+    @classmethod
+    def from_row(cls, row: SoulmatchFeatures) -> "CandidateFeatures":
+        return cls(
+            has_profile=row.has_profile,
+            element=row.element,
+            venus_element=row.venus_element,
+            mars_element=row.mars_element,
+            attachment=row.attachment,
+            values_bits=int(row.values_bits or "0", 16),
+            lifestyle_bits=int(row.lifestyle_bits or "0", 16),
+            love_language_bits=int(row.love_language_bits or "0", 16),
+        )
+
+
+def _normalize_token(token: str) -> str:
+    if len(token) <= _MAX_TOKEN_LENGTH:
+        return token
+    return "sha256:" + hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _assign_bit(dimension: str, token: str) -> int:
+    for _ in range(5):
+        existing = (
+            SoulmatchFeatureToken.objects.filter(dimension=dimension, token=token).values_list("bit", flat=True).first()
+        )
+        if existing is not None:
+            return existing
+        top = SoulmatchFeatureToken.objects.filter(dimension=dimension).aggregate(top=Max("bit"))["top"]
+        next_bit = 0 if top is None else top + 1
+        try:
+            with transaction.atomic():
+                SoulmatchFeatureToken.objects.create(dimension=dimension, token=token, bit=next_bit)
+            return next_bit
+        except IntegrityError:
+            continue
+    raise RuntimeError(f"Could not assign feature bit for {dimension}:{token}")
+
+
+def token_bits(dimension: str, tokens: Iterable, known: Optional[Dict[str, int]] = None) -> int:
+    """Bitmask of `tokens`; `known` is a preloaded token -> bit map for the dimension, extended in place."""
+    normalized = {_normalize_token(str(token)) for token in tokens or []}
+    if not normalized:
+        return 0
+    if known is None:
+        known = dict(
+            SoulmatchFeatureToken.objects.filter(dimension=dimension, token__in=normalized).values_list("token", "bit")
+        )
+    mask = 0
+    for token in sorted(normalized):
+        bit = known.get(token)
+        if bit is None:
+            bit = known[token] = _assign_bit(dimension, token)
+        mask |= 1 << bit
+    return mask
+
+
+_TOKEN_DIMENSIONS = {
+    DIMENSION_VALUES: "values",
+    DIMENSION_LIFESTYLE: "preferred_lifestyle",
+    DIMENSION_LOVE_LANGUAGE: "love_language",
+}
+
+
+def _vocabulary(profiles: Iterable[UserProfile]) -> Dict[str, Dict[str, int]]:
+    """Bits of every token the profiles use, per dimension, in one query."""
+    wanted: Dict[str, set] = {dimension: set() for dimension in _TOKEN_DIMENSIONS}
+    for profile in profiles:
+        for dimension, attr in _TOKEN_DIMENSIONS.items():
+            wanted[dimension].update(_normalize_token(str(token)) for token in getattr(profile, attr, None) or [])
+    vocabulary: Dict[str, Dict[str, int]] = {dimension: {} for dimension in _TOKEN_DIMENSIONS}
+    tokens = set().union(*wanted.values())
+    if tokens:
+        rows = SoulmatchFeatureToken.objects.filter(dimension__in=list(wanted), token__in=tokens)
+        for dimension, token, bit in rows.values_list("dimension", "token", "bit"):
+            if token in wanted[dimension]:
+                vocabulary[dimension][token] = bit
+    return vocabulary
+
+
+def _sign_element(chart: Optional[NatalChart], planet: str) -> int:
+    if not chart:
+        return ELEMENT_NONE
+    sign = chart.planets.get(planet, {}).get("sign")
+    if not sign:
+        return ELEMENT_NONE
+    element = ELEMENTS_BY_SIGN.get(sign)
+    return ELEMENT_CODES[element] if element else ELEMENT_UNKNOWN_SIGN
+
+
+def _attachment_code(style: Optional[str]) -> int:
+    if not style:
+        return ATTACHMENT_NONE
+    return _ATTACHMENT_CODES.get(style, ATTACHMENT_OTHER)
+
+
+def build_features(
+    profile: UserProfile | None,
+    chart: NatalChart | None,
+    vocabulary: Optional[Dict[str, Dict[str, int]]] = None,
+) -> CandidateFeatures:
+    profile = _non_empty_profile(profile)
+    element = _dominant_element(chart)
+    vocabulary = vocabulary or {}
+
+    def bits(dimension: str) -> int:
+        tokens = getattr(profile, _TOKEN_DIMENSIONS[dimension], None) or []
+        return token_bits(dimension, tokens, vocabulary.get(dimension)) if profile else 0
+
+    return CandidateFeatures(
+        has_profile=profile is not None,
+        element=ELEMENT_CODES[element] if element else ELEMENT_NONE,
+        venus_element=_sign_element(chart, "venus"),
+        mars_element=_sign_element(chart, "mars"),
+        attachment=_attachment_code(getattr(profile, "attachment_style", None)) if profile else ATTACHMENT_NONE,
+        values_bits=bits(DIMENSION_VALUES),
+        lifestyle_bits=bits(DIMENSION_LIFESTYLE),
+        love_language_bits=bits(DIMENSION_LOVE_LANGUAGE),
+    )
+
+
+def _feature_values(features: CandidateFeatures) -> Dict[str, object]:
+    return {
+        "version": FEATURES_VERSION,
+        "has_profile": features.has_profile,
+        "element": features.element,
+        "venus_element": features.venus_element,
+        "mars_element": features.mars_element,
+        "attachment": features.attachment,
+        "values_bits": format(features.values_bits, "x"),
+        "lifestyle_bits": format(features.lifestyle_bits, "x"),
+        "love_language_bits": format(features.love_language_bits, "x"),
+    }
+
+
+def store_features(user_id: int, features: CandidateFeatures) -> None:
+    SoulmatchFeatures.objects.update_or_create(user_id=user_id, defaults=_feature_values(features))
+
+
+def refresh_user_features(user_id: int) -> CandidateFeatures:
+    profile = UserProfile.objects.filter(user_id=user_id).first()
+    chart = NatalChart.objects.filter(user_id=user_id).first()
+    features = build_features(profile, chart)
+    store_features(user_id, features)
+    return features
+
+
+def refresh_features_many(user_ids: Iterable[int]) -> Dict[int, CandidateFeatures]:
+    """Rebuild and upsert features for many users in a fixed number of queries (new tokens aside)."""
+    ids = list(dict.fromkeys(user_ids))
+    profiles = {profile.user_id: profile for profile in UserProfile.objects.filter(user_id__in=ids)}
+    charts = {chart.user_id: chart for chart in NatalChart.objects.filter(user_id__in=ids)}
+    vocabulary = _vocabulary(profiles.values())
+    features = {
+        user_id: build_features(profiles.get(user_id), charts.get(user_id), vocabulary) for user_id in ids
+    }
+    if features:
+        SoulmatchFeatures.objects.bulk_create(
+            [SoulmatchFeatures(user_id=user_id, **_feature_values(row)) for user_id, row in features.items()],
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=[*_feature_values(CandidateFeatures()), "updated_at"],
+        )
+    return features
+
+
+def load_features(user_ids: Iterable[int]) -> Dict[int, CandidateFeatures]:
+    """Load features for many users in one query, building (and storing) any missing or stale rows."""
+    ids = list(dict.fromkeys(user_ids))
+    rows = SoulmatchFeatures.objects.filter(user_id__in=ids, version=FEATURES_VERSION)
+    features = {row.user_id: CandidateFeatures.from_row(row) for row in rows}
+    missing = [user_id for user_id in ids if user_id not in features]
+    if missing:
+        features.update(refresh_features_many(missing))
+    return features
+
+
+def _overlap_bits(bits_a: int, bits_b: int, max_points: float) -> float:
+    if not bits_a and not bits_b:
+        return max_points / 2
+    if not bits_a or not bits_b:
+        return max_points / 3
+    common = (bits_a & bits_b).bit_count()
+    unique = (bits_a | bits_b).bit_count()
+    ratio = common / unique if unique else 0
+    return round(ratio * max_points, 2)
+
+
+def _astro_from_features(a: CandidateFeatures, b: CandidateFeatures) -> float:
+    if not a.element or not b.element:
+        return 0.0
+    if a.element == b.element:
+        return 35.0
+    if (a.element, b.element) in _GOOD_ELEMENT_PAIRS:
+        return 30.0
+    if a.venus_element and b.mars_element and a.venus_element == b.mars_element:
+        return 25.0
+    return 15.0
+
+
+def _attachment_from_codes(a: int, b: int) -> float:
+    if not a or not b:
+        return 5.0
+    if a == ATTACHMENT_SECURE or b == ATTACHMENT_SECURE:
+        return 8.0
+    if {a, b} == {ATTACHMENT_ANXIOUS, ATTACHMENT_AVOIDANT}:
+        return 2.0
+    return 5.0
+
+
+def score_features(user_b_id: int, a: CandidateFeatures, b: CandidateFeatures) -> Dict[str, object]:
+    """Bitset equivalent of calculate_soulmatch; returns the same payload shape and numbers."""
+    psych_score = 0.0
+    lifestyle_score = 0.0
+    if a.has_profile and b.has_profile:
+        values_score = _overlap_bits(a.values_bits, b.values_bits, max_points=15)
+        psych_score = min(values_score + _attachment_from_codes(a.attachment, b.attachment), 20.0)
+        lifestyle = _overlap_bits(a.lifestyle_bits, b.lifestyle_bits, max_points=10)
+        love_lang = _overlap_bits(a.love_language_bits, b.love_language_bits, max_points=5)
+        lifestyle_score = min(lifestyle + love_lang, 10.0)
+
+    scores = SoulmatchScores(
+        astro=_astro_from_features(a, b),
+        psychology=psych_score,
+        lifestyle=lifestyle_score,
+    )
+    return {
+        "user_id": user_b_id,
+        "score": scores.total,
+        "components": {
+            "astro": scores.astro,
+            "matrix": scores.matrix,
+            "psychology": scores.psychology,
+            "lifestyle": scores.lifestyle,
+        },
+        "tags": _generate_tags(scores),
+    }
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 
 from apps.astro.models import NatalChart
 from apps.profile.models import UserProfile
@@ -133,20 +133,24 @@ def _generate_tags(scores: SoulmatchScores) -> List[str]:
     return tags or ["neutral"]
 
 
-def calculate_soulmatch(user_a: User, user_b: User) -> Dict[str, object]:
-    if user_a.id == user_b.id:
-        raise ValueError("Cannot compute SoulMatch for the same user.")
-
-    profile_a = UserProfile.objects.filter(user_id=user_a.id).first()
-    profile_b = UserProfile.objects.filter(user_id=user_b.id).first()
-    if profile_a and profile_a.is_empty():
-        profile_a = None
-    if profile_b and profile_b.is_empty():
-        profile_b = None
-    chart_a = getattr(user_a, "natal_chart", None)
-    chart_b = getattr(user_b, "natal_chart", None)
-
-    dominant_a = _dominant_element(chart_a)
+def _non_empty_profile(profile: UserProfile | None) -> UserProfile | None:
+    if profile and profile.is_empty():
+        return None
+    return profile
+
+
+def score_soulmatch(
+    user_b_id: int,
+    *,
+    profile_a: UserProfile | None,
+    profile_b: UserProfile | None,
+    chart_a: NatalChart | None,
+    chart_b: NatalChart | None,
+    dominant_a: Optional[str] = None,
+) -> Dict[str, object]:
+    """Pure scoring step shared by the single-pair and batch entry points (no queries)."""
+    if dominant_a is None:
+        dominant_a = _dominant_element(chart_a)
     dominant_b = _dominant_element(chart_b)
     astro_score = _astro_score(dominant_a, dominant_b, chart_a, chart_b)
     psych_score = _psychology_score(profile_a, profile_b)
@@ -158,8 +162,8 @@ def calculate_soulmatch(user_a: User, user_b: User) -> Dict[str, object]:
         lifestyle=lifestyle_score,
     )
 
-    result = {
-        "user_id": user_b.id,
+    return {
+        "user_id": user_b_id,
         "score": scores.total,
         "components": {
             "astro": scores.astro,
@@ -169,4 +173,39 @@ def calculate_soulmatch(user_a: User, user_b: User) -> Dict[str, object]:
         },
         "tags": _generate_tags(scores),
     }
-    return result
+
+
+def calculate_soulmatch(user_a: User, user_b: User) -> Dict[str, object]:
+    if user_a.id == user_b.id:
+        raise ValueError("Cannot compute SoulMatch for the same user.")
+
+    profile_a = _non_empty_profile(UserProfile.objects.filter(user_id=user_a.id).first())
+    profile_b = _non_empty_profile(UserProfile.objects.filter(user_id=user_b.id).first())
+    chart_a = getattr(user_a, "natal_chart", None)
+    chart_b = getattr(user_b, "natal_chart", None)
+
+    return score_soulmatch(
+        user_b.id,
+        profile_a=profile_a,
+        profile_b=profile_b,
+        chart_a=chart_a,
+        chart_b=chart_b,
+    )
+
+
+def calculate_soulmatch_many(user: User, candidate_ids: Iterable[int]) -> Dict[int, Dict[str, object]]:
+    """
+    Score one user against many candidates in a single pass.
+
+    Reads the precomputed SoulmatchFeatures rows (one query) and scores each
+    pair with integer/bitset operations; results match calculate_soulmatch
+    pair by pair.
+    """
+    from apps.matching.services.features import load_features, score_features
+
+    ids = [candidate_id for candidate_id in dict.fromkeys(candidate_ids) if candidate_id != user.id]
+    if not ids:
+        return {}
+    features = load_features([user.id, *ids])
+    features_a = features[user.id]
+    return {candidate_id: score_features(candidate_id, features_a, features[candidate_id]) for candidate_id in ids}
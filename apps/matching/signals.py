@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.astro.models import NatalChart
+from apps.matching.tasks import soulmatch_refresh_features_task
+from apps.profile.models import UserProfile
+from apps.users.models import User
+
+
+def _user_deleted(origin) -> bool:
+    """True when the delete cascades from the user, whose features row goes with it."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, User)
+
+
+def _schedule_refresh(user_id: int) -> None:
+    # After commit, so the worker never reads (and stores features for) uncommitted rows.
+    transaction.on_commit(lambda: soulmatch_refresh_features_task.delay(user_id))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_save, sender=NatalChart)
+def refresh_features_on_save(sender, instance, **kwargs) -> None:
+    _schedule_refresh(instance.user_id)
+
+
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_delete, sender=NatalChart)
+def refresh_features_on_delete(sender, instance, origin=None, **kwargs) -> None:
+    if origin is not None and _user_deleted(origin):
+        return
+    _schedule_refresh(instance.user_id)
@@ -6,15 +6,14 @@ from django.db import IntegrityError, transaction
 from django.contrib.auth import get_user_model
 
 from apps.matching.models import SoulMatchResult
+from apps.matching.services.batch_scoring import pair_key as _pair_key
+from apps.matching.services.batch_scoring import score_candidates
+from apps.matching.services.features import refresh_user_features
 from apps.matching.services.soulmatch import calculate_soulmatch
 
 User = get_user_model()
 
 
-def _pair_key(user_a_id: int, user_b_id: int) -> str:
-    return f"{min(user_a_id, user_b_id)}:{max(user_a_id, user_b_id)}"
-
-
 def _result_from_payload(payload: dict[str, object]) -> dict[str, object]:
     result = dict(payload)
     for key in ("pair_key", "rules_version", "user_a_id", "user_b_id"):
@@ -64,3 +63,22 @@ def calculate_soulmatch_task(user_a_id: int, user_b_id: int) -> dict[str, object
 def soulmatch_compute_score_task(user_a_id: int, user_b_id: int, rules_version: str | None = None) -> dict[str, object]:
     rules_version = rules_version or getattr(settings, "MATCH_RULES_VERSION", "v1")
     return _compute_and_store(user_a_id, user_b_id, rules_version)
+
+
+@shared_task
+def soulmatch_precompute_candidates_task(
+    user_id: int,
+    candidate_ids: list[int],
+    rules_version: str | None = None,
+) -> dict[str, object]:
+    """Warm SoulMatchResult for a recommendations request; clients poll the endpoint afterwards."""
+    rules_version = rules_version or getattr(settings, "MATCH_RULES_VERSION", "v1")
+    user = User.objects.get(id=user_id)
+    results = score_candidates(user, candidate_ids, rules_version)
+    return {"user_id": user_id, "rules_version": rules_version, "scored": len(results)}
+
+
+@shared_task
+def soulmatch_refresh_features_task(user_id: int) -> None:
+    if User.objects.filter(id=user_id).exists():
+        refresh_user_features(user_id)
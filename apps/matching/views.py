@@ -4,8 +4,8 @@ import random
 
 import logging
 
-from celery import group
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import FieldDoesNotExist
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
@@ -13,11 +13,12 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from apps.matching.serializers import SoulmatchResultSerializer, SoulmatchUserSerializer
+from apps.matching.services.batch_scoring import load_cached_scores, score_candidates
 from apps.matching.services.personalization import get_following_ids, personalization_adjustment
 from apps.matching.services.recommendations_v2 import assign_lens, diversify, explanation_for
 from apps.matching.services.timing import evaluate_timing
 from apps.matching.services.soulmatch import calculate_soulmatch
-from apps.matching.tasks import soulmatch_compute_score_task
+from apps.matching.tasks import soulmatch_compute_score_task, soulmatch_precompute_candidates_task
 from apps.core_platform.async_mode import should_run_async
 from apps.users.models import Block, Mute, User
 from apps.profile.models import UserProfile
@@ -32,6 +33,18 @@ def _get_profile(user: User) -> UserProfile | None:
     return profile
 
 
+def _profiles_by_user_id(user_ids: list[int]) -> dict[int, UserProfile]:
+    return {
+        profile.user_id: profile
+        for profile in UserProfile.objects.filter(user_id__in=user_ids)
+        if not profile.is_empty()
+    }
+
+
+def _precompute_lock_key(user_id: int, rules_version: str) -> str:
+    return f"soulmatch:precompute:{user_id}:{rules_version}"
+
+
 def _get_location_value(user: User, profile: UserProfile | None) -> str | None:
     return None
 
@@ -162,8 +175,9 @@ class SoulmatchRecommendationsView(APIView):
         }
         eligible_candidates: list[User] = []
         if mode == "dating":
+            candidate_profiles = _profiles_by_user_id([candidate.id for candidate in candidates])
             for candidate in candidates:
-                candidate_profile = _get_profile(candidate)
+                candidate_profile = candidate_profiles.get(candidate.id)
                 if not candidate_profile or not candidate_profile.gender or not candidate_profile.orientation:
                     continue
                 eligible_candidates.append(candidate)
@@ -173,11 +187,32 @@ class SoulmatchRecommendationsView(APIView):
         batch_results: list[dict[str, object] | None] = []
         if eligible_candidates:
             rules_version = getattr(settings, "MATCH_RULES_VERSION", "v1")
-            task_group = group(
-                soulmatch_compute_score_task.s(current_user.id, candidate.id, rules_version=rules_version)
-                for candidate in eligible_candidates
-            )
-            batch_results = task_group.apply_async().get()
+            candidate_ids = [candidate.id for candidate in eligible_candidates]
+            if should_run_async(request):
+                # Precompute-then-poll: serve from SoulMatchResult when warm, otherwise
+                # enqueue one batch task and let the client retry instead of blocking.
+                scores, missing_ids = load_cached_scores(current_user, candidate_ids, rules_version)
+                if missing_ids:
+                    lock_key = _precompute_lock_key(current_user.id, rules_version)
+                    task_id = cache.get(lock_key)
+                    if not task_id:
+                        task_id = soulmatch_precompute_candidates_task.apply_async(
+                            args=[current_user.id, missing_ids],
+                            kwargs={"rules_version": rules_version},
+                        ).id
+                        cache.set(lock_key, task_id, timeout=60)
+                    return Response(
+                        {
+                            "status": "pending",
+                            "task_id": task_id,
+                            "rules_version": rules_version,
+                            "pending_count": len(missing_ids),
+                        },
+                        status=status.HTTP_202_ACCEPTED,
+                    )
+            else:
+                scores = score_candidates(current_user, candidate_ids, rules_version)
+            batch_results = [scores.get(candidate_id) for candidate_id in candidate_ids]
 
         for candidate, result in zip(eligible_candidates, batch_results):
             if not candidate or not candidate.id:
@@ -5,3 +5,9 @@ class MessagingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.messaging"
     verbose_name = "Messaging"
+
+    def ready(self) -> None:
+        try:
+            import apps.messaging.signals  # noqa: F401
+        except ImportError:
+            pass
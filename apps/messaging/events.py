@@ -4,10 +4,15 @@ from datetime import datetime
 from typing import Iterable
 
 from apps.core.pubsub import publish_events
+from .membership import get_thread_member_ids
 from .models import Message, Thread
 from apps.users.models import User
 
 
+def _member_channels(thread_id: int, exclude_user_id: int | None = None) -> list[str]:
+    return [f"user:{uid}" for uid in set(get_thread_member_ids(thread_id)) if uid != exclude_user_id]
+
+
 def _serialize_message(message: Message) -> dict:
     from .serializers import MessageSerializer
 
@@ -27,8 +32,7 @@ def publish_message_event(message: Message) -> None:
         "type": "message:new",
         "payload": _serialize_message(message),
     }
-    user_ids: Iterable[int] = message.thread.members.values_list("user_id", flat=True)
-    channels = [f"user:{user_id}" for user_id in set(user_ids)]
+    channels = _member_channels(message.thread_id)
     if channels:
         publish_events(channels, payload)
 
@@ -45,8 +49,7 @@ def publish_message_status_event(message: Message) -> None:
             "client_uuid": message.client_uuid,
         },
     }
-    user_ids: Iterable[int] = message.thread.members.values_list("user_id", flat=True)
-    channels = [f"user:{user_id}" for user_id in set(user_ids)]
+    channels = _member_channels(message.thread_id)
     if channels:
         publish_events(channels, payload)
 
@@ -62,8 +65,7 @@ def publish_message_reaction_event(message: Message, emoji: str, user_id: int, a
             "action": action,
         },
     }
-    user_ids: Iterable[int] = message.thread.members.values_list("user_id", flat=True)
-    channels = [f"user:{user_id}" for user_id in set(user_ids)]
+    channels = _member_channels(message.thread_id)
     if channels:
         publish_events(channels, payload)
 
@@ -78,8 +80,7 @@ def publish_typing_event(thread: Thread, user: User, is_typing: bool) -> None:
         "is_typing": is_typing,
         "timestamp": datetime.utcnow().isoformat() + "Z",
     }
-    user_ids: Iterable[int] = thread.members.values_list("user_id", flat=True)
-    channels = [f"user:{uid}" for uid in set(user_ids) if uid != user.id]  # don't echo to sender
+    channels = _member_channels(thread.id, exclude_user_id=user.id)  # don't echo to sender
     if channels:
         publish_events(channels, payload)
 
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from django.db.models import BigIntegerField, Case, Count, F, OuterRef, Q, QuerySet, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Message, ThreadMember
+
+PREVIEW_LENGTH = 120
+
+
+def preview_text(body: str | None, limit: int = PREVIEW_LENGTH) -> str:
+    if not body:
+        return ""
+    text = body.strip()
+    if len(text) <= limit:
+        return text
+    return text[: limit - 3] + "..."
+
+
+def record_message(message: Message) -> int:
+    """
+    Advance the inbox row of every member of the message's thread in a single UPDATE.
+
+    The last-message columns only move forward (snowflake ids are time ordered), so a
+    message that commits late never replaces a newer one. Every member, the sender
+    included, gets one more unread message: unread means newer than the member's
+    last read message, as the per-thread count always did.
+    """
+    newer = Q(last_message_id__isnull=True) | Q(last_message_id__lt=message.id)
+    return ThreadMember.objects.filter(thread_id=message.thread_id).update(
+        last_message_id=Case(
+            When(newer, then=Value(message.id, output_field=BigIntegerField())), default=F("last_message_id")
+        ),
+        last_message_preview=Case(
+            When(newer, then=Value(preview_text(message.body))), default=F("last_message_preview")
+        ),
+        last_activity_at=Case(When(newer, then=Value(message.created_at)), default=F("last_activity_at")),
+        unread_count=F("unread_count") + 1,
+    )
+
+
+def _unread_messages() -> Subquery:
+    return Subquery(
+        Message.objects.filter(
+            thread_id=OuterRef("thread_id"),
+            id__gt=Coalesce(OuterRef("last_read_message_id"), Value(0, output_field=BigIntegerField())),
+        )
+        .order_by()
+        .values("thread_id")
+        .annotate(total=Count("id"))
+        .values("total")[:1]
+    )
+
+
+def refresh_unread(members: QuerySet[ThreadMember]) -> int:
+    """Recount unread messages (newer than the member's last read message) for `members`."""
+    return members.update(unread_count=Coalesce(_unread_messages(), Value(0)))
+
+
+def refresh_thread(thread_id: int) -> None:
+    """Rebuild every member's inbox row of a thread, e.g. after messages were deleted."""
+    members = ThreadMember.objects.filter(thread_id=thread_id)
+    latest = Message.objects.filter(thread_id=thread_id).order_by("-id").only("id", "body", "created_at").first()
+    if latest is None:
+        members.update(last_message=None, last_message_preview="")
+    else:
+        members.update(
+            last_message_id=latest.id,
+            last_message_preview=preview_text(latest.body),
+            last_activity_at=latest.created_at,
+        )
+    refresh_unread(members)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from typing import List
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import ThreadMember
+
+THREAD_MEMBERS_TTL_SECONDS = 300
+
+
+def _cache_key(thread_id: int) -> str:
+    return f"messaging:thread_members:{thread_id}"
+
+
+def get_thread_member_ids(thread_id: int) -> List[int]:
+    """Member user ids for a thread, cached until membership changes (see signals)."""
+    key = _cache_key(thread_id)
+    cached = cache.get(key)
+    if isinstance(cached, list):
+        return cached
+    member_ids = list(ThreadMember.objects.filter(thread_id=thread_id).values_list("user_id", flat=True))
+    if member_ids:
+        cache.set(key, member_ids, THREAD_MEMBERS_TTL_SECONDS)
+    return member_ids
+
+
+def invalidate_thread_members(thread_id: int) -> None:
+    key = _cache_key(thread_id)
+    cache.delete(key)
+    # Again after commit: a concurrent reader may have cached the pre-commit membership meanwhile.
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,75 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import BigIntegerField, Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _preview(body):
+    text = (body or "").strip()
+    return text if len(text) <= 120 else text[:117] + "..."
+
+
+def backfill_inbox(apps, schema_editor):
+    Message = apps.get_model("messaging", "Message")
+    ThreadMember = apps.get_model("messaging", "ThreadMember")
+    ThreadMember.objects.update(last_activity_at=F("created_at"))
+    thread_ids = ThreadMember.objects.values_list("thread_id", flat=True).distinct()
+    for thread_id in thread_ids.iterator():
+        latest = Message.objects.filter(thread_id=thread_id).order_by("-id").first()
+        if latest is not None:
+            ThreadMember.objects.filter(thread_id=thread_id).update(
+                last_message_id=latest.id,
+                last_message_preview=_preview(latest.body),
+                last_activity_at=latest.created_at,
+            )
+    unread = (
+        Message.objects.filter(
+            thread_id=OuterRef("thread_id"),
+            id__gt=Coalesce(OuterRef("last_read_message_id"), Value(0, output_field=BigIntegerField())),
+        )
+        .order_by()
+        .values("thread_id")
+        .annotate(total=Count("id"))
+        .values("total")[:1]
+    )
+    ThreadMember.objects.update(unread_count=Coalesce(Subquery(unread), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0006_alter_message_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='threadmember',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='threadmember',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='messaging.message'),
+        ),
+        migrations.AddField(
+            model_name='threadmember',
+            name='last_message_preview',
+            field=models.CharField(blank=True, default='', max_length=120),
+        ),
+        migrations.AddField(
+            model_name='threadmember',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='threadmember',
+            index=models.Index(fields=['user', '-last_activity_at', '-id'], name='threadmember_inbox_idx'),
+        ),
+        migrations.RunPython(backfill_inbox, reverse_code=migrations.RunPython.noop),
+    ]
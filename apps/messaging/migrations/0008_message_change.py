@@ -0,0 +1,30 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:34
+
+import django.db.models.deletion
+import libs.idgen
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0007_thread_member_inbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageChange',
+            fields=[
+                ('id', models.BigIntegerField(default=libs.idgen.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('message_id', models.BigIntegerField()),
+                ('type', models.CharField(choices=[('status', 'Status'), ('reactions', 'Reactions'), ('delete', 'Delete')], max_length=16)),
+                ('thread', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='messaging.thread')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['thread', 'id'], name='messagechange_thread_idx')],
+            },
+        ),
+    ]
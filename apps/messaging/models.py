@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from django.db import models
+from django.utils import timezone
 
 from apps.core.models import BaseModel
 
@@ -29,6 +30,12 @@ class MessageAttachmentType(models.TextChoices):
     VIDEO = "video", "Video"
 
 
+class MessageChangeType(models.TextChoices):
+    STATUS = "status", "Status"
+    REACTIONS = "reactions", "Reactions"
+    DELETE = "delete", "Delete"
+
+
 class Thread(BaseModel):
     is_group = models.BooleanField(default=False)
     created_by = models.ForeignKey("users.User", on_delete=models.CASCADE, related_name="created_threads")
@@ -45,9 +52,18 @@ class ThreadMember(BaseModel):
     last_read_message = models.ForeignKey(
         "Message", on_delete=models.SET_NULL, related_name="readers", null=True, blank=True
     )
+    # Inbox projection, kept current by apps.messaging.inbox so listing threads needs no
+    # per-thread message queries.
+    last_message = models.ForeignKey(
+        "Message", on_delete=models.SET_NULL, related_name="+", null=True, blank=True
+    )
+    last_message_preview = models.CharField(max_length=120, blank=True, default="")
+    last_activity_at = models.DateTimeField(default=timezone.now)
+    unread_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = ("thread", "user")
+        indexes = [models.Index(fields=["user", "-last_activity_at", "-id"], name="threadmember_inbox_idx")]
 
 
 class Message(BaseModel):
@@ -94,3 +110,20 @@ class MessageReaction(BaseModel):
     class Meta:
         ordering = ["created_at"]
         unique_together = ("message", "user", "emoji")
+
+
+class MessageChange(BaseModel):
+    """
+    Append-only log of changes to existing messages, read by thread sync.
+
+    The snowflake id doubles as the sync version; new messages need no row since their
+    own ids already order them. `message_id` is not a foreign key so deletions survive.
+    """
+
+    thread = models.ForeignKey(Thread, on_delete=models.CASCADE, related_name="changes")
+    message_id = models.BigIntegerField()
+    type = models.CharField(max_length=16, choices=MessageChangeType.choices)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["thread", "id"], name="messagechange_thread_idx")]
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from redis.exceptions import RedisError
+
+from apps.core.pubsub import get_redis_client
+
+from .models import MessageReaction
+
+logger = logging.getLogger(__name__)
+
+# Placeholder field so a message with no reactions is still cached.
+_SENTINEL_FIELD = "_"
+
+# Fill a missing hash from database counts, unless it was filled meanwhile or a reaction
+# changed since the reader sampled the version (ARGV[1], "" when absent): the counts
+# it loaded may predate that reaction and would otherwise stick for the whole TTL.
+_FILL_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+  return 0
+end
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+  return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# Drop the cached counters and bump the version so in-flight fills are rejected.
+_INVALIDATE_LUA = """
+redis.call('DEL', KEYS[1])
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return 1
+"""
+
+Summary = List[dict]
+
+
+def counters_enabled() -> bool:
+    return bool(getattr(settings, "MESSAGING_REACTION_COUNTERS_ENABLED", True))
+
+
+def counters_ttl_seconds() -> int:
+    return max(60, int(getattr(settings, "MESSAGING_REACTION_COUNTERS_TTL_SECONDS", 24 * 3600)))
+
+
+def counters_key(message_id: int) -> str:
+    return f"messaging:reactions:{message_id}"
+
+
+def version_key(message_id: int) -> str:
+    return f"messaging:reactions:{message_id}:version"
+
+
+def _decode(value) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+def _counts_from_database(message_ids: List[int], user_id: Optional[int]) -> tuple[Dict[int, Dict[str, int]], set]:
+    """Per-message emoji counts and the caller's (message_id, emoji) pairs in one grouped query."""
+    rows = (
+        MessageReaction.objects.filter(message_id__in=message_ids)
+        .values("message_id", "emoji")
+        .annotate(count=Count("id"), mine=Count("id", filter=Q(user_id=user_id or 0)))
+        .order_by("message_id", "emoji")
+    )
+    counts: Dict[int, Dict[str, int]] = {message_id: {} for message_id in message_ids}
+    mine = set()
+    for row in rows:
+        counts[row["message_id"]][row["emoji"]] = row["count"]
+        if row["mine"]:
+            mine.add((row["message_id"], row["emoji"]))
+    return counts, mine
+
+
+def _counts_from_redis(message_ids: List[int]) -> tuple[Dict[int, Dict[str, int]], Dict[int, str]]:
+    """Cached counters for the messages that have them (misses are left out), plus every version."""
+    pipe = get_redis_client().pipeline(transaction=False)
+    for message_id in message_ids:
+        pipe.hgetall(counters_key(message_id))
+        pipe.get(version_key(message_id))
+    results = pipe.execute()
+    cached: Dict[int, Dict[str, int]] = {}
+    versions: Dict[int, str] = {}
+    for message_id, fields, version in zip(message_ids, results[0::2], results[1::2]):
+        versions[message_id] = "" if version is None else _decode(version)
+        if not fields:
+            continue
+        cached[message_id] = {
+            _decode(emoji): int(count) for emoji, count in fields.items() if _decode(emoji) != _SENTINEL_FIELD
+        }
+    return cached, versions
+
+
+def _store_counters(counts: Dict[int, Dict[str, int]], versions: Dict[int, str]) -> None:
+    client = get_redis_client()
+    script = client.register_script(_FILL_LUA)
+    ttl = counters_ttl_seconds()
+    pipe = client.pipeline(transaction=False)
+    for message_id, emoji_counts in counts.items():
+        fields = [item for pair in {_SENTINEL_FIELD: 0, **emoji_counts}.items() for item in pair]
+        script(
+            keys=[counters_key(message_id), version_key(message_id)],
+            args=[versions.get(message_id, ""), ttl, *fields],
+            client=pipe,
+        )
+    pipe.execute()
+
+
+def reaction_summaries(message_ids: Iterable[int], user_id: Optional[int] = None) -> Dict[int, Summary]:
+    """
+    Emoji counts and "reacted by me" flags for a page of messages.
+
+    Without counters this is a single grouped query. With counters enabled, counts come
+    from each message's Redis hash; only the caller's own reactions (and any cache
+    misses, which are then written back) are read from the database.
+    """
+    ids = list(dict.fromkeys(message_ids))
+    if not ids:
+        return {}
+    counts: Dict[int, Dict[str, int]] = {}
+    mine: set = set()
+    if counters_enabled():
+        versions: Optional[Dict[int, str]] = None
+        try:
+            counts, versions = _counts_from_redis(ids)
+        except RedisError as exc:
+            logger.warning("Reaction counter read failed, using database: %s", exc)
+            counts = {}
+        missing = [message_id for message_id in ids if message_id not in counts]
+        if missing:
+            loaded, mine = _counts_from_database(missing, user_id)
+            counts.update(loaded)
+            if versions is not None:
+                try:
+                    _store_counters(loaded, versions)
+                except RedisError as exc:
+                    logger.warning("Reaction counter write failed: %s", exc)
+        cached = [message_id for message_id in ids if message_id not in missing]
+        if user_id and cached:
+            mine.update(
+                MessageReaction.objects.filter(message_id__in=cached, user_id=user_id).values_list(
+                    "message_id", "emoji"
+                )
+            )
+    else:
+        counts, mine = _counts_from_database(ids, user_id)
+
+    return {
+        message_id: [
+            {"emoji": emoji, "count": count, "reacted_by_current_user": (message_id, emoji) in mine}
+            for emoji, count in counts.get(message_id, {}).items()
+            if count > 0
+        ]
+        for message_id in ids
+    }
+
+
+def invalidate_reaction_counters(message_id: int) -> None:
+    """
+    Drop a message's cached counters once the current transaction commits.
+
+    The next read rebuilds them from the database. Invalidating instead of incrementing
+    means a fill racing the reaction can neither miss it nor count it twice.
+    """
+    if not counters_enabled():
+        return
+
+    def _invalidate() -> None:
+        try:
+            client = get_redis_client()
+            script = client.register_script(_INVALIDATE_LUA)
+            script(keys=[counters_key(message_id), version_key(message_id)], args=[counters_ttl_seconds()])
+        except RedisError as exc:
+            logger.warning("Reaction counter invalidation failed for message %s: %s", message_id, exc)
+
+    transaction.on_commit(_invalidate)
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 from typing import List
-from django.db.models import Count
 
 from django.db import transaction
 from django.utils import timezone
@@ -15,7 +14,10 @@ from apps.notifications.consumers import notify_thread_message
 from apps.moderation.autoflag import auto_report_message
 
 from .events import publish_message_event
+from .inbox import preview_text
+from .membership import invalidate_thread_members
 from .models import Message, MessageAttachment, Thread, ThreadMember
+from .reactions import reaction_summaries
 
 
 from apps.messaging.models import MessageStatus
@@ -97,6 +99,8 @@ class ThreadSerializer(serializers.ModelSerializer):
                 [ThreadMember(thread=thread, user_id=member_id) for member_id in member_ids],
                 ignore_conflicts=True,
             )
+            # bulk_create skips post_save, so drop any cached membership explicitly.
+            invalidate_thread_members(thread.id)
             if initial_message:
                 message = Message.objects.create(thread=thread, sender=user, body=initial_message)
                 thread.updated_at = timezone.now()
@@ -116,58 +120,28 @@ class ThreadSerializer(serializers.ModelSerializer):
             if getattr(member, "user", None) and member.user_id != user_id
         ]
 
-    def get_last_message(self, obj: Thread) -> dict | None:
-        body = getattr(obj, "last_message_body", None)
-        created_at = getattr(obj, "last_message_created_at", None)
-        if body is not None or created_at is not None:
-            if body is None and created_at is None:
-                return None
-            return {"body": body, "created_at": created_at}
-        last_message = obj.messages.order_by("-created_at").values("body", "created_at").first()
-        return last_message
-
-    def get_unread_count(self, obj: Thread) -> int:
+    def _membership(self, obj: Thread) -> ThreadMember | None:
         request = self.context.get("request")
         if not request or not request.user.is_authenticated:
-            return 0
-        membership = next(
+            return None
+        return next(
             (member for member in obj.members.all() if member.user_id == request.user.id),
             None,
         )
-        if not membership:
-            return 0
-        last_read = membership.last_read_message
-        message_qs = obj.messages.all()
-        # A message is unread for a user if its id is greater than that user's last_read_message_id.
-        if not last_read:
-            return message_qs.count()
-        return message_qs.filter(id__gt=last_read.id).count()
 
+    def get_last_message(self, obj: Thread) -> dict | None:
+        membership = self._membership(obj)
+        if not membership or not membership.last_message_id:
+            return None
+        return {"body": membership.last_message_preview, "created_at": membership.last_activity_at}
 
-def aggregate_reactions(message: Message, current_user_id: int | None = None) -> list[dict]:
-    emoji_counts = list(message.reactions.values("emoji").annotate(count=Count("id")))
-    reacted_emojis: set[str] = set()
-    if current_user_id:
-        reacted_emojis = set(
-            message.reactions.filter(user_id=current_user_id).values_list("emoji", flat=True)
-        )
-    return [
-        {
-            "emoji": entry["emoji"],
-            "count": entry["count"],
-            "reacted_by_current_user": entry["emoji"] in reacted_emojis,
-        }
-        for entry in emoji_counts
-    ]
+    def get_unread_count(self, obj: Thread) -> int:
+        membership = self._membership(obj)
+        return membership.unread_count if membership else 0
 
 
-def _preview_text(body: str | None, limit: int = 120) -> str:
-    if not body:
-        return ""
-    text = body.strip()
-    if len(text) <= limit:
-        return text
-    return text[: limit - 3] + "..."
+def aggregate_reactions(message: Message, current_user_id: int | None = None) -> list[dict]:
+    return reaction_summaries([message.id], current_user_id)[message.id]
 
 
 class MessageAttachmentSerializer(serializers.ModelSerializer):
@@ -186,6 +160,17 @@ class MessageAttachmentSerializer(serializers.ModelSerializer):
             return None
 
 
+class MessageListSerializer(serializers.ListSerializer):
+    """Loads reaction summaries for the whole page before serializing each message."""
+
+    def to_representation(self, data) -> list:  # type: ignore[override]
+        messages = list(data.all() if hasattr(data, "all") else data)
+        request = self.context.get("request")
+        user_id = request.user.id if request and request.user.is_authenticated else None
+        self.context["reaction_summaries"] = reaction_summaries([m.id for m in messages], user_id)
+        return super().to_representation(messages)
+
+
 class MessageSerializer(serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
     attachments = MessageAttachmentSerializer(many=True, read_only=True)
@@ -201,6 +186,7 @@ class MessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Message
+        list_serializer_class = MessageListSerializer
         fields = [
             "id",
             "thread",
@@ -272,6 +258,9 @@ class MessageSerializer(serializers.ModelSerializer):
         return attrs
 
     def get_reactions(self, obj: Message) -> list[dict]:
+        summaries = self.context.get("reaction_summaries")
+        if summaries is not None and obj.id in summaries:
+            return summaries[obj.id]
         request = self.context.get("request")
         user_id = request.user.id if request and request.user.is_authenticated else None
         return aggregate_reactions(obj, current_user_id=user_id)
@@ -280,10 +269,11 @@ class MessageSerializer(serializers.ModelSerializer):
         target = getattr(obj, "reply_to", None)
         if not target:
             return None
-        has_attachments = target.attachments.exists()
+        # all() rather than exists() so a prefetch of reply_to__attachments is reused.
+        has_attachments = bool(target.attachments.all())
         return {
             "id": str(target.id),
             "sender_id": target.sender_id,
-            "text_preview": _preview_text(target.body),
+            "text_preview": preview_text(target.body),
             "has_attachments": has_attachments,
         }
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .inbox import record_message
+from .membership import invalidate_thread_members
+from .models import Message, ThreadMember
+
+
+@receiver(post_save, sender=ThreadMember)
+@receiver(post_delete, sender=ThreadMember)
+def invalidate_thread_member_cache(sender, instance: ThreadMember, **kwargs) -> None:
+    invalidate_thread_members(instance.thread_id)
+
+
+@receiver(post_save, sender=Message)
+def update_thread_inbox(sender, instance: Message, created: bool, **kwargs) -> None:
+    if created:
+        record_message(instance)
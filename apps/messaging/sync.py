@@ -0,0 +1,149 @@
+"""
+Cursor-paginated thread sync.
+
+A client keeps one opaque `version` per thread (a snowflake id). Each page holds the
+new messages and the changes to older messages (status, reactions, deletions) whose
+versions are greater than the one sent, oldest first, with several changes to the
+same message collapsed into one record carrying the current state.
+
+Change records are kept for `MESSAGING_SYNC_RETENTION_DAYS`; a version older than that
+can no longer be brought up to date and the client has to sync again from version 0.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Iterable
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from apps.users.models import User
+from apps.users.querysets import with_user_relationship_meta
+from libs.idgen import min_id_for_timestamp
+
+from .models import Message, MessageChange, MessageChangeType, Thread
+from .reactions import reaction_summaries
+
+
+class SyncVersionExpired(Exception):
+    """The version predates the retained change log."""
+
+
+def record_changes(thread_id: int, message_ids: Iterable[int], change_type: str) -> None:
+    changes = [
+        MessageChange(thread_id=thread_id, message_id=message_id, type=change_type)
+        for message_id in dict.fromkeys(message_ids)
+    ]
+    if changes:
+        MessageChange.objects.bulk_create(changes)
+
+
+def version_for_timestamp(timestamp_ms: int) -> int:
+    """The version that sorts after every id generated at or before `timestamp_ms`."""
+    return min_id_for_timestamp(timestamp_ms + 1) - 1
+
+
+def _settled_version() -> int:
+    return version_for_timestamp(int(time.time() * 1000) - settings.MESSAGING_SYNC_SETTLE_MS)
+
+
+def _retention_cutoff_ms() -> int:
+    return int(time.time() * 1000) - settings.MESSAGING_SYNC_RETENTION_DAYS * 24 * 3600 * 1000
+
+
+def retention_horizon() -> int:
+    """The oldest version a client can still resume from."""
+    return min_id_for_timestamp(_retention_cutoff_ms())
+
+
+def prune_changes() -> int:
+    """Delete change records older than the retention horizon."""
+    deleted, _ = MessageChange.objects.filter(id__lt=retention_horizon()).delete()
+    return deleted
+
+
+def message_queryset(user: Any) -> Any:
+    """Messages with everything MessageSerializer reads loaded in a fixed number of queries."""
+    senders = with_user_relationship_meta(User.objects.select_related("settings"), user)
+    return Message.objects.select_related("reply_to", "reply_to__sender").prefetch_related(
+        Prefetch("sender", queryset=senders),
+        "attachments",
+        "reply_to__attachments",
+    )
+
+
+def _status_record(message: Message) -> dict:
+    return {
+        "status": message.status,
+        "delivered_at": message.delivered_at.isoformat() if message.delivered_at else None,
+        "read_at": message.read_at.isoformat() if message.read_at else None,
+    }
+
+
+def sync_page(thread: Thread, version: int, limit: int, user: Any) -> tuple[list[Message], list[dict], int, bool]:
+    """
+    Return `(messages, changes, next_version, has_more)` for everything after `version`.
+
+    A full page advances the version to its last record. Once the client has caught up
+    the version stops at the settle horizon, so a record whose transaction committed
+    after a younger one is sent again on the next call rather than skipped; clients
+    apply records idempotently.
+
+    Raises `SyncVersionExpired` for a non-zero version older than the retention horizon,
+    since the changes after it may already have been pruned.
+    """
+    if 0 < version < retention_horizon():
+        raise SyncVersionExpired
+    new_ids = list(
+        Message.objects.filter(thread=thread, id__gt=version).order_by("id").values_list("id", flat=True)[: limit + 1]
+    )
+    change_rows = list(
+        MessageChange.objects.filter(thread=thread, id__gt=version)
+        .order_by("id")
+        .values_list("id", "message_id", "type")[: limit + 1]
+    )
+    records = sorted([(message_id, message_id, None) for message_id in new_ids] + change_rows)
+    has_more = len(records) > limit
+    records = records[:limit]
+    if has_more:
+        next_version = records[-1][0]
+    else:
+        next_version = max(version, _settled_version())
+
+    page_new = [message_id for _, message_id, change_type in records if change_type is None]
+    latest: dict[tuple[int, str], int] = {}
+    for record_version, message_id, change_type in records:
+        if change_type is not None:
+            latest[(message_id, change_type)] = record_version
+    deleted = {message_id for (message_id, change_type) in latest if change_type == MessageChangeType.DELETE}
+    # New messages are sent whole, so later changes to them in the same page are redundant.
+    skip = deleted | set(page_new)
+    touched = {message_id for (message_id, _) in latest if message_id not in skip}
+
+    messages = list(message_queryset(user).filter(thread=thread, id__in=page_new).order_by("id"))
+    current: dict[int, Message] = {}
+    if touched:
+        current = {message.id: message for message in Message.objects.filter(thread=thread, id__in=touched)}
+    reacted = [
+        message_id
+        for (message_id, change_type) in latest
+        if change_type == MessageChangeType.REACTIONS and message_id in current
+    ]
+    reactions = reaction_summaries(reacted, getattr(user, "id", None))
+
+    changes: list[dict] = []
+    for (message_id, change_type), record_version in sorted(latest.items(), key=lambda item: item[1]):
+        record: dict = {"type": change_type, "id": str(message_id), "version": str(record_version)}
+        if change_type == MessageChangeType.DELETE:
+            changes.append(record)
+            continue
+        message = current.get(message_id)
+        if message is None:
+            continue
+        if change_type == MessageChangeType.STATUS:
+            record.update(_status_record(message))
+        else:
+            record["reactions"] = reactions[message_id]
+        changes.append(record)
+    return messages, changes, next_version, has_more
@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from celery import shared_task
+
+from .sync import prune_changes
+
+
+@shared_task
+def prune_message_changes() -> int:
+    return prune_changes()
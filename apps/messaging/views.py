@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
 from django.db import transaction
-from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models import Count, Q, prefetch_related_objects
 from django.http import QueryDict
 from django.shortcuts import get_object_or_404
 from django.utils.decorators import method_decorator
@@ -14,6 +17,8 @@ from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from apps.feed.cursors import decode_cursor, encode_cursor
+
 from .events import (
     publish_member_left_event,
     publish_message_event,
@@ -23,8 +28,11 @@ from .events import (
 )
 from apps.messaging.models import MessageAttachmentType, MessageStatus
 from apps.notifications.consumers import notify_thread_message
-from .models import Message, MessageAttachment, MessageReaction, Thread, ThreadMember
+from .inbox import refresh_thread, refresh_unread
+from .models import Message, MessageAttachment, MessageChangeType, MessageReaction, Thread, ThreadMember
+from .reactions import invalidate_reaction_counters
 from .serializers import MessageSerializer, ThreadSerializer, aggregate_reactions
+from .sync import SyncVersionExpired, record_changes, sync_page, version_for_timestamp
 from .typing import get_typing_users, start_typing, stop_typing
 from apps.moderation.autoflag import auto_report_message
 from apps.users.models import Block, User
@@ -151,28 +159,66 @@ class ThreadViewSet(viewsets.ModelViewSet):
     pagination_class = None
 
     def get_queryset(self):  # type: ignore[override]
-        last_message_subquery = Message.objects.filter(thread=OuterRef("pk")).order_by("-created_at")
         return (
             Thread.objects.filter(members__user=self.request.user)
-            .annotate(
-                last_message_body=Subquery(last_message_subquery.values("body")[:1]),
-                last_message_created_at=Subquery(last_message_subquery.values("created_at")[:1]),
-            )
             .select_related("created_by")
-            .prefetch_related("members__user", "members__last_read_message")
+            .prefetch_related("members__user")
             .distinct()
         )
 
     def get_object(self):  # type: ignore[override]
         lookup_value = self.kwargs.get(self.lookup_field or "pk")
-        queryset = Thread.objects.select_related("created_by").prefetch_related(
-            "members__user", "members__last_read_message"
-        )
+        queryset = Thread.objects.select_related("created_by").prefetch_related("members__user")
         thread = get_object_or_404(queryset, pk=lookup_value)
         if not thread.members.filter(user=self.request.user).exists():
             raise PermissionDenied("Not a member of this thread")
         return thread
 
+    def list(self, request: Request, *args, **kwargs) -> Response:  # type: ignore[override]
+        """
+        The inbox, most recent activity first, read from the caller's membership rows.
+
+        Passing `limit` or `cursor` switches to keyset pages of `{"results", "next_cursor"}`;
+        without either the full list is returned as before.
+        """
+        memberships = (
+            ThreadMember.objects.filter(user=request.user)
+            .select_related("thread__created_by")
+            .order_by("-last_activity_at", "-id")
+        )
+        if request.query_params.get("search", "").strip():
+            matching = self.filter_queryset(self.get_queryset()).values("pk")
+            memberships = memberships.filter(thread_id__in=matching)
+
+        limit_raw = request.query_params.get("limit")
+        cursor_raw = request.query_params.get("cursor")
+        paginate = limit_raw is not None or cursor_raw is not None
+        if paginate:
+            try:
+                limit = max(1, min(int(limit_raw or 20), 100))
+            except ValueError:
+                return Response({"detail": "Invalid limit."}, status=status.HTTP_400_BAD_REQUEST)
+            if cursor_raw:
+                try:
+                    cursor_dt, cursor_id = decode_cursor(cursor_raw)
+                except ValueError:
+                    return Response({"detail": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+                memberships = memberships.filter(
+                    Q(last_activity_at__lt=cursor_dt) | Q(last_activity_at=cursor_dt, id__lt=cursor_id)
+                )
+            memberships = memberships[:limit]
+
+        rows = list(memberships)
+        threads = [row.thread for row in rows]
+        prefetch_related_objects(threads, "members__user")
+        data = self.get_serializer(threads, many=True).data
+        if not paginate:
+            return Response(data)
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = encode_cursor(rows[-1].last_activity_at, rows[-1].id)
+        return Response({"results": data, "next_cursor": next_cursor})
+
     def perform_create(self, serializer: ThreadSerializer) -> None:  # type: ignore[override]
         serializer.save()
 
@@ -197,15 +243,15 @@ class ThreadViewSet(viewsets.ModelViewSet):
         if not target_message:
             return Response(status=status.HTTP_204_NO_CONTENT)
 
-        membership = ThreadMember.objects.filter(thread=thread, user=request.user).first()
+        membership_qs = ThreadMember.objects.filter(thread=thread, user=request.user)
+        membership = membership_qs.first()
         current_last_read_id = membership.last_read_message_id if membership else None
         if current_last_read_id and current_last_read_id >= target_message.id:
             last_read_id = current_last_read_id
         else:
             last_read_id = target_message.id
-            ThreadMember.objects.filter(thread=thread, user=request.user).update(
-                last_read_message=target_message
-            )
+            membership_qs.update(last_read_message=target_message)
+        refresh_unread(membership_qs)
 
         now = timezone.now()
         unread_messages = list(
@@ -220,6 +266,7 @@ class ThreadViewSet(viewsets.ModelViewSet):
                 msg.delivered_at = now
             msg.save(update_fields=["status", "delivered_at", "read_at", "updated_at"])
             publish_message_status_event(msg)
+        record_changes(thread.id, [msg.id for msg in unread_messages], MessageChangeType.STATUS)
 
         return Response({"status": "read", "last_read_message_id": str(last_read_id)})
 
@@ -288,7 +335,7 @@ class ThreadViewSet(viewsets.ModelViewSet):
             .annotate(member_total=Count("members", distinct=True))
             .filter(member_total=2)
             .select_related("created_by")
-            .prefetch_related("members__user", "members__last_read_message")
+            .prefetch_related("members__user")
             .first()
         )
         if thread:
@@ -322,25 +369,50 @@ class ThreadViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["get"], url_path="sync")
     def sync(self, request: Request, pk: str | None = None) -> Response:
+        """
+        Page through everything that happened in the thread after `version`.
+
+        `since` is still accepted as a message id or a timestamp. Messages come back whole
+        in `messages`; status, reaction and deletion deltas for older messages in `changes`.
+        Call again with `next_version` while `has_more` is true. A version older than the
+        retained change log gets 410 with `resync_required`; start over from version 0.
+        """
         thread = self.get_object()
-        since = request.query_params.get("since")
-        queryset = (
-            thread.messages.select_related("sender", "reply_to", "reply_to__sender")
-            .prefetch_related("attachments", "reply_to__attachments")
-            .order_by("created_at")
-        )
-        if since:
+        params = request.query_params
+        raw_version = params.get("version") or params.get("since")
+        version = 0
+        if raw_version:
             try:
-                since_id = int(since)
-                queryset = queryset.filter(id__gt=since_id)
+                version = int(raw_version)
             except (TypeError, ValueError):
-                parsed = parse_datetime(since)
-                if parsed:
-                    if timezone.is_naive(parsed):
-                        parsed = timezone.make_aware(parsed, timezone=timezone.utc)
-                    queryset = queryset.filter(created_at__gt=parsed)
-        serializer = MessageSerializer(queryset, many=True, context={"request": request})
-        return Response({"messages": serializer.data})
+                parsed = parse_datetime(raw_version)
+                if parsed is None:
+                    return Response({"detail": "Invalid version."}, status=status.HTTP_400_BAD_REQUEST)
+                if timezone.is_naive(parsed):
+                    parsed = timezone.make_aware(parsed, dt_timezone.utc)
+                version = version_for_timestamp(int(parsed.timestamp() * 1000))
+        try:
+            limit = int(params.get("limit", settings.MESSAGING_SYNC_PAGE_SIZE))
+        except ValueError:
+            return Response({"detail": "Invalid limit."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.MESSAGING_SYNC_MAX_PAGE_SIZE))
+
+        try:
+            messages, changes, next_version, has_more = sync_page(thread, max(0, version), limit, request.user)
+        except SyncVersionExpired:
+            return Response(
+                {"detail": "Version is too old, sync again from the start.", "resync_required": True},
+                status=status.HTTP_410_GONE,
+            )
+        serializer = MessageSerializer(messages, many=True, context={"request": request})
+        return Response(
+            {
+                "messages": serializer.data,
+                "changes": changes,
+                "next_version": str(next_version),
+                "has_more": has_more,
+            }
+        )
 
 
 @method_decorator(ratelimit(key="user", rate="60/min", method="POST", block=True), name="create")
@@ -373,6 +445,13 @@ class MessageViewSet(viewsets.ModelViewSet):
         status_code = status.HTTP_201_CREATED
         return Response(serializer.data, status=status_code, headers=self.get_success_headers(serializer.data))
 
+    def perform_destroy(self, instance: Message) -> None:  # type: ignore[override]
+        thread_id, instance_id = instance.thread_id, instance.id
+        with transaction.atomic():
+            instance.delete()
+            record_changes(thread_id, [instance_id], MessageChangeType.DELETE)
+            refresh_thread(thread_id)
+
     @action(detail=True, methods=["get", "post"], url_path="reactions")
     def reactions(self, request: Request, pk: str | None = None) -> Response:
         message = self.get_object()
@@ -389,9 +468,14 @@ class MessageViewSet(viewsets.ModelViewSet):
         existing = MessageReaction.objects.filter(message=message, user=request.user, emoji=emoji)
         action_value = "removed" if existing.exists() else "added"
         if action_value == "removed":
-            existing.delete()
+            deleted, _ = existing.delete()
+            delta = -deleted
         else:
             MessageReaction.objects.create(message=message, user=request.user, emoji=emoji)
+            delta = 1
+        if delta:
+            invalidate_reaction_counters(message.id)
+        record_changes(message.thread_id, [message.id], MessageChangeType.REACTIONS)
 
         reactions = aggregate_reactions(message, current_user_id=request.user.id)
         publish_message_reaction_event(message, emoji, request.user.id, action_value)
@@ -413,6 +497,7 @@ class MessageViewSet(viewsets.ModelViewSet):
             if not message.delivered_at:
                 message.delivered_at = now
             message.save(update_fields=["status", "delivered_at", "updated_at"])
+            record_changes(message.thread_id, [message.id], MessageChangeType.STATUS)
             publish_message_status_event(message)
 
         serializer = MessageSerializer(message, context={"request": request})
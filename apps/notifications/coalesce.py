@@ -0,0 +1,76 @@
+"""
+Debounced message pushes.
+
+The first message for a (user, thread) pair opens a window and schedules one flush;
+messages arriving inside the window only bump the pending counter. The flush sends a
+single push for everything collected ("3 new messages"). Both sides run as MULTI
+transactions, so a message lands either in the flush it races with or in a new window.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+
+from apps.core.pubsub import get_redis_client
+
+
+def coalesce_window_seconds() -> int:
+    return max(0, int(getattr(settings, "NOTIFICATIONS_PUSH_COALESCE_SECONDS", 10)))
+
+
+def pending_key(user_id: int, thread_id: int) -> str:
+    return f"notifications:push:pending:{user_id}:{thread_id}"
+
+
+def scheduled_key(user_id: int, thread_id: int) -> str:
+    return f"notifications:push:scheduled:{user_id}:{thread_id}"
+
+
+def _safety_ttl(window: int) -> int:
+    # Outlives any sane task delay; if a flush is lost the pair unblocks on its own.
+    return max(60, window * 10)
+
+
+def queue_message_push(user_ids: Iterable[int], thread_id: int, message_id: int, window: int) -> List[int]:
+    """Add a message to each user's pending push; returns the users whose flush must be scheduled now."""
+    ids = list(dict.fromkeys(user_ids))
+    if not ids:
+        return []
+    ttl = _safety_ttl(window)
+    pipe = get_redis_client().pipeline(transaction=True)
+    for user_id in ids:
+        key = pending_key(user_id, thread_id)
+        pipe.hincrby(key, "count", 1)
+        pipe.hset(key, "last_message_id", message_id)
+        pipe.expire(key, ttl)
+        pipe.set(scheduled_key(user_id, thread_id), 1, nx=True, ex=ttl)
+    results = pipe.execute()
+    return [user_id for user_id, opened in zip(ids, results[3::4]) if opened]
+
+
+def take_pending(user_ids: Iterable[int], thread_id: int) -> Dict[int, Tuple[int, int]]:
+    """Atomically read and clear pending pushes; maps user id to (message count, last message id)."""
+    ids = list(dict.fromkeys(user_ids))
+    if not ids:
+        return {}
+    pipe = get_redis_client().pipeline(transaction=True)
+    for user_id in ids:
+        pipe.hgetall(pending_key(user_id, thread_id))
+        pipe.delete(pending_key(user_id, thread_id), scheduled_key(user_id, thread_id))
+    results = pipe.execute()
+    pending: Dict[int, Tuple[int, int]] = {}
+    for user_id, fields in zip(ids, results[0::2]):
+        decoded = {
+            (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+            for k, v in (fields or {}).items()
+        }
+        try:
+            count = int(decoded["count"])
+            last_message_id = int(decoded["last_message_id"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if count > 0:
+            pending[user_id] = (count, last_message_id)
+    return pending
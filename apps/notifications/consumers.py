@@ -1,24 +1,29 @@
 from __future__ import annotations
 
+import logging
+
 from django.contrib.auth import get_user_model
 from django.db.models import Q
+from redis.exceptions import RedisError
 
 from apps.messaging.models import Message
 from apps.users.models import Block, Mute
+from .coalesce import coalesce_window_seconds, queue_message_push
 from .services import NotificationPayload, dispatch_notification
-from .tasks import notify_new_message as notify_new_message_task
+from .tasks import flush_message_pushes, notify_new_message as notify_new_message_task
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+# Recipients per push task; a large group fans out over a few tasks, not one per member.
+PUSH_BATCH_SIZE = 500
 
 
 def notify_thread_message(message: Message) -> None:
     thread = message.thread
     sender_id = message.sender_id
-    members = list(
-        thread.members.exclude(user_id=sender_id)
-        .select_related("user", "user__settings")
-        .prefetch_related("user__devices")
-    )
+    members = list(thread.members.exclude(user_id=sender_id).select_related("user", "user__settings"))
     if not members:
         return
 
@@ -36,7 +41,7 @@ def notify_thread_message(message: Message) -> None:
     )
 
     recipients: list[User] = []
-    push_targets: list[User] = []
+    push_target_ids: list[int] = []
     for member in members:
         user = member.user  # type: ignore[attr-defined]
         if not user:
@@ -45,7 +50,7 @@ def notify_thread_message(message: Message) -> None:
             continue
         recipients.append(user)
         if user.id not in muted_recipient_ids:
-            push_targets.append(user)
+            push_target_ids.append(user.id)
 
     payload = NotificationPayload(
         type="message:new",
@@ -56,5 +61,26 @@ def notify_thread_message(message: Message) -> None:
     )
     if recipients:
         dispatch_notification(recipients, payload, send_push=False)
-    for user in push_targets:
-        notify_new_message_task.delay(user.id, thread.id, message.id)
+    if push_target_ids:
+        schedule_message_pushes(push_target_ids, thread.id, message.id)
+
+
+def schedule_message_pushes(user_ids: list[int], thread_id: int, message_id: int) -> None:
+    """
+    Coalesce pushes per (user, thread) over NOTIFICATIONS_PUSH_COALESCE_SECONDS.
+
+    Only users without an open window get a (delayed) flush task. With coalescing off, or
+    if Redis is unavailable, every recipient is pushed right away.
+    """
+    window = coalesce_window_seconds()
+    if window:
+        try:
+            due = queue_message_push(user_ids, thread_id, message_id, window)
+        except RedisError as exc:
+            logger.warning("Push coalescing failed for thread %s, sending immediately: %s", thread_id, exc)
+        else:
+            for start in range(0, len(due), PUSH_BATCH_SIZE):
+                flush_message_pushes.apply_async((due[start : start + PUSH_BATCH_SIZE], thread_id), countdown=window)
+            return
+    for start in range(0, len(user_ids), PUSH_BATCH_SIZE):
+        notify_new_message_task.delay(user_ids[start : start + PUSH_BATCH_SIZE], thread_id, message_id)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, List
+
+from django.db.models import BigIntegerField, Count, Exists, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from apps.messaging.models import Message, ThreadMember
+from apps.notifications.models import Notification
+from apps.users.models import Block, Device, Mute
+
+from .services import NotificationPayload, devices_by_provider, push_eligible_user_ids, send_provider_batch
+
+DIGEST_TYPE = "digest:messages"
+_CHUNK_SIZE = 500
+
+
+def digest_payload(thread_count: int, message_count: int) -> NotificationPayload:
+    noun = "message" if message_count == 1 else "messages"
+    threads = "conversation" if thread_count == 1 else "conversations"
+    return NotificationPayload(
+        type=DIGEST_TYPE,
+        payload={
+            "thread_count": thread_count,
+            "message_count": message_count,
+            "text": f"{message_count} unread {noun} in {thread_count} {threads}",
+        },
+    )
+
+
+def _send_chunk(rows: List[dict]) -> None:
+    payloads = {row["user_id"]: digest_payload(row["threads"], row["messages"]) for row in rows}
+    Notification.objects.bulk_create(
+        [Notification(user_id=user_id, type=p.type, payload=p.payload) for user_id, p in payloads.items()]
+    )
+    per_user: Dict[int, Dict[str, List[Device]]] = {}
+    for provider, devices in devices_by_provider(push_eligible_user_ids(payloads)).items():
+        for device in devices:
+            per_user.setdefault(device.user_id, {}).setdefault(provider, []).append(device)
+    for user_id, providers in per_user.items():
+        for provider, devices in providers.items():
+            send_provider_batch(provider, devices, payloads[user_id])
+
+
+def _pushable_unread() -> Subquery:
+    """Unread messages of the member's thread that a per-message push would have announced."""
+    member_id = OuterRef(OuterRef("user_id"))
+    sender_id = OuterRef("sender_id")
+    return Subquery(
+        Message.objects.filter(
+            thread_id=OuterRef("thread_id"),
+            id__gt=Coalesce(OuterRef("last_read_message_id"), Value(0, output_field=BigIntegerField())),
+        )
+        .exclude(sender_id=OuterRef("user_id"))
+        .exclude(Exists(Mute.objects.filter(user_id=member_id, target_id=sender_id)))
+        .exclude(
+            Exists(
+                Block.objects.filter(
+                    Q(user_id=member_id, target_id=sender_id) | Q(user_id=sender_id, target_id=member_id)
+                )
+            )
+        )
+        .order_by()
+        .values("thread_id")
+        .annotate(total=Count("id"))
+        .values("total")[:1]
+    )
+
+
+def send_message_digests(since: datetime) -> int:
+    """
+    One summary per digest subscriber with unread threads active since `since`.
+
+    The inbox projection on ThreadMember picks the candidate threads. Messages are then
+    counted the way pushes are filtered: the member's own messages and those from muted
+    or blocked senders are left out. Returns the number of digests created.
+    """
+    rows = (
+        ThreadMember.objects.filter(
+            user__settings__digest_enabled=True,
+            unread_count__gt=0,
+            last_activity_at__gte=since,
+        )
+        .annotate(pushable=Coalesce(_pushable_unread(), Value(0)))
+        .filter(pushable__gt=0)
+        .values("user_id")
+        .annotate(threads=Count("id"), messages=Sum("pushable"))
+        .order_by("user_id")
+    )
+    sent = 0
+    chunk: List[dict] = []
+    for row in rows.iterator():
+        chunk.append(row)
+        if len(chunk) >= _CHUNK_SIZE:
+            _send_chunk(chunk)
+            sent += len(chunk)
+            chunk = []
+    if chunk:
+        _send_chunk(chunk)
+        sent += len(chunk)
+    return sent
@@ -2,12 +2,12 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass
-from typing import Iterable, Set
+from typing import Dict, Iterable, List, Set
 
 from django.utils import timezone
 
 from apps.notifications.models import Notification
-from apps.users.models import User, UserSettings
+from apps.users.models import Device, User, UserSettings
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +27,13 @@ def create_in_app_notification(user: User, payload: NotificationPayload) -> Noti
     return notification
 
 
+def create_in_app_notifications(user_ids: Iterable[int], payload: NotificationPayload) -> List[Notification]:
+    """One INSERT for the whole recipient list."""
+    return Notification.objects.bulk_create(
+        [Notification(user_id=user_id, type=payload.type, payload=payload.payload) for user_id in dict.fromkeys(user_ids)]
+    )
+
+
 def _is_within_quiet_hours(settings: UserSettings | None) -> bool:
     if not settings:
         return False
@@ -49,6 +56,53 @@ def _is_within_quiet_hours(settings: UserSettings | None) -> bool:
     return current_minutes >= start_minutes or current_minutes <= end_minutes
 
 
+def push_eligible_user_ids(user_ids: Iterable[int]) -> Set[int]:
+    """Drop users with push disabled or inside their quiet hours, reading all settings in one query."""
+    ids = set(user_ids)
+    if not ids:
+        return set()
+    blocked = {
+        settings.user_id
+        for settings in UserSettings.objects.filter(user_id__in=ids).only("user_id", "push_enabled", "quiet_hours")
+        if not settings.push_enabled or _is_within_quiet_hours(settings)
+    }
+    return ids - blocked
+
+
+def devices_by_provider(user_ids: Iterable[int]) -> Dict[str, List[Device]]:
+    grouped: Dict[str, List[Device]] = {}
+    for device in Device.objects.filter(user_id__in=list(user_ids)).order_by("device_type", "id"):
+        grouped.setdefault(device.device_type, []).append(device)
+    return grouped
+
+
+def send_provider_batch(provider: str, devices: List[Device], payload: NotificationPayload) -> None:
+    logger.info(
+        "[push] Would send %s to %d %s device(s): %s",
+        payload.type,
+        len(devices),
+        provider,
+        [device.push_token for device in devices],
+    )
+
+
+def send_push_to_user_ids(user_ids: Iterable[int], payload: NotificationPayload) -> int:
+    """
+    Push one payload to many users with a constant number of queries.
+
+    Settings are checked in bulk, then devices are grouped by provider (device_type) so
+    each provider gets a single batch. Returns the number of devices addressed.
+    """
+    eligible = push_eligible_user_ids(user_ids)
+    if not eligible:
+        return 0
+    sent = 0
+    for provider, devices in devices_by_provider(eligible).items():
+        send_provider_batch(provider, devices, payload)
+        sent += len(devices)
+    return sent
+
+
 def send_push_notification(
     users: Iterable[User],
     payload: NotificationPayload,
@@ -56,21 +110,7 @@ def send_push_notification(
     skip_user_ids: Iterable[int] | None = None,
 ) -> None:
     skipped: Set[int] = set(skip_user_ids or [])
-    for user in users:
-        if user.id in skipped:
-            continue
-        settings = getattr(user, "settings", None)
-        if settings and (not settings.push_enabled or _is_within_quiet_hours(settings)):
-            continue
-        devices = getattr(user, "devices", None)
-        device_list = list(devices.all()) if devices is not None else []
-        for device in device_list:
-            logger.info(
-                "[push] Would send %s to %s via %s",
-                payload.type,
-                device.push_token,
-                device.device_type,
-            )
+    send_push_to_user_ids([user.id for user in users if user.id not in skipped], payload)
 
 
 def send_email_notification(users: Iterable[User], payload: NotificationPayload) -> None:
@@ -89,8 +129,7 @@ def dispatch_notification(
     skip_push_user_ids: Iterable[int] | None = None,
 ) -> None:
     users = list(users)
-    for user in users:
-        create_in_app_notification(user, payload)
+    create_in_app_notifications([user.id for user in users], payload)
     if send_push:
         send_push_notification(users, payload, skip_user_ids=skip_push_user_ids)
     send_email_notification(users, payload)
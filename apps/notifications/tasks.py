@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+from datetime import timedelta
+from typing import Dict, Iterable, List, Tuple
+
 from celery import shared_task
+from django.utils import timezone
 
 from apps.messaging.models import Message
-from .services import NotificationPayload, send_push_notification
-from apps.users.models import User
+from .coalesce import take_pending
+from .digest import send_message_digests
+from .services import NotificationPayload, send_push_to_user_ids
 
 
 def _truncate_text(text: str | None, limit: int = 140) -> str:
@@ -17,25 +22,49 @@ def _truncate_text(text: str | None, limit: int = 140) -> str:
 
 
 @shared_task
-def notify_new_message(user_id: int, thread_id: int, message_id: int) -> None:
-    try:
-        user = User.objects.select_related("settings").prefetch_related("devices").get(id=user_id)
-    except User.DoesNotExist:
-        return
+def notify_new_message(user_ids: Iterable[int] | int, thread_id: int, message_id: int) -> None:
+    """Push a new message to a batch of recipients; a single id is still accepted from older producers."""
+    if isinstance(user_ids, int):
+        user_ids = [user_ids]
     try:
         message = Message.objects.select_related("sender").get(id=message_id)
     except Message.DoesNotExist:
         return
+    send_push_to_user_ids(user_ids, _message_payload(message, thread_id))
 
+
+def _message_payload(message: Message, thread_id: int, count: int = 1) -> NotificationPayload:
     sender_name = getattr(message.sender, "name", "") or getattr(message.sender, "handle", "")
-    payload = NotificationPayload(
-        type="message:new",
-        payload={
-            "thread_id": thread_id,
-            "message_id": message_id,
-            "sender_id": message.sender_id,
-            "sender_name": sender_name,
-            "text": _truncate_text(message.body),
-        },
-    )
-    send_push_notification([user], payload)
+    payload = {
+        "thread_id": thread_id,
+        "message_id": message.id,
+        "sender_id": message.sender_id,
+        "sender_name": sender_name,
+        "text": _truncate_text(message.body),
+    }
+    if count > 1:
+        payload["count"] = count
+        payload["text"] = f"{count} new messages"
+    return NotificationPayload(type="message:new", payload=payload)
+
+
+@shared_task
+def flush_message_pushes(user_ids: List[int], thread_id: int) -> int:
+    """Send the pushes coalesced for (user, thread) since the window opened; one push per user."""
+    pending = take_pending(user_ids, thread_id)
+    if not pending:
+        return 0
+    messages = Message.objects.select_related("sender").in_bulk({last for _, last in pending.values()})
+    groups: Dict[Tuple[int, int], List[int]] = {}
+    for user_id, key in pending.items():
+        groups.setdefault(key, []).append(user_id)
+    for (count, last_message_id), group in groups.items():
+        message = messages.get(last_message_id)
+        if message is not None:
+            send_push_to_user_ids(group, _message_payload(message, thread_id, count))
+    return len(pending)
+
+
+@shared_task
+def send_message_digests_task(hours: int = 24) -> int:
+    return send_message_digests(timezone.now() - timedelta(hours=hours))
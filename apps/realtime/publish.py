@@ -1,57 +1,210 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+import os
+import queue
+import threading
+import time
+from typing import Any, List, Optional, Tuple
 
 import requests
 from django.conf import settings
+from prometheus_client import Counter, Gauge
+from requests.adapters import HTTPAdapter
 
 from apps.core.pubsub import publish_event
 
 logger = logging.getLogger(__name__)
 
+PUBLISH_EVENTS = Counter(
+    "realtime_publish_events_total",
+    "Realtime events by outcome: queued, dropped (queue full), http, redis (fallback) or failed.",
+    ["outcome"],
+)
+PUBLISH_QUEUE_DEPTH = Gauge("realtime_publish_queue_depth", "Events waiting in the realtime publish queue.")
 
-def _publish_via_http(channel: str, payload: dict) -> tuple[bool, str | None]:
-    base_url = getattr(settings, "REALTIME_PUBLISH_URL", "") or ""
-    if not base_url:
-        return False, "no_publish_url"
-    url = base_url.rstrip("/") + "/internal/publish"
-    headers: dict[str, str] = {}
+_HTTP_TIMEOUT = (0.5, 1.0)
+
+QueuedEvent = Tuple[str, dict, dict]
+
+
+def _publish_url() -> str:
+    return getattr(settings, "REALTIME_PUBLISH_URL", "") or ""
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    pool_size = max(1, int(getattr(settings, "REALTIME_PUBLISH_POOL_SIZE", 4)))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
     token = getattr(settings, "REALTIME_PUBLISH_TOKEN", "") or ""
     if token:
-        headers["Authorization"] = f"Bearer {token}"
+        session.headers["Authorization"] = f"Bearer {token}"
+    return session
+
+
+_session_local = threading.local()
+
+
+def _session() -> requests.Session:
+    """Keep-alive session, one per thread (requests.Session is not thread-safe)."""
+    session = getattr(_session_local, "session", None)
+    if session is None:
+        session = _build_session()
+        _session_local.session = session
+    return session
+
+
+def _post(path: str, body: dict) -> tuple[bool, str | None]:
+    base_url = _publish_url()
+    if not base_url:
+        return False, "no_publish_url"
+    url = base_url.rstrip("/") + path
     try:
-        response = requests.post(
-            url,
-            json={"channel": channel, "payload": payload},
-            headers=headers,
-            timeout=(0.5, 1.0),
-        )
+        response = _session().post(url, json=body, timeout=_HTTP_TIMEOUT)
         if response.ok:
             return True, None
         return False, f"http_{response.status_code}"
     except Exception as exc:  # pragma: no cover - best effort
-        logger.warning("realtime publish failed url=%s channel=%s error=%s", url, channel, exc)
+        logger.warning("realtime publish failed url=%s error=%s", url, exc)
         return False, str(exc)
 
 
+def _publish_via_http(channel: str, payload: dict) -> tuple[bool, str | None]:
+    return _post("/internal/publish", {"channel": channel, "payload": payload})
+
+
+def _publish_via_redis(channel: str, payload: dict, extra: dict) -> None:
+    logger.info("gift_realtime.publish_fallback_redis", extra=extra)
+    if publish_event(channel, payload):
+        PUBLISH_EVENTS.labels(outcome="redis").inc()
+        logger.info("gift_realtime.publish_success", extra={**extra, "path": "redis"})
+    else:
+        PUBLISH_EVENTS.labels(outcome="failed").inc()
+        logger.warning("gift_realtime.publish_failure", extra={**extra, "path": "redis"})
+
+
+class RealtimePublisher:
+    """
+    Bounded queue of realtime events drained by a daemon thread.
+
+    The thread groups whatever is queued (up to `batch_size`, waiting at most `linger`
+    seconds for more) into one POST to the gateway's /internal/publish/batch over a
+    keep-alive session. A failed batch falls back to Redis pubsub event by event. When
+    the queue is full new events are dropped, so callers never block on the gateway.
+    """
+
+    def __init__(
+        self,
+        *,
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        linger: Optional[float] = None,
+    ) -> None:
+        self.queue_size = max(1, queue_size or int(getattr(settings, "REALTIME_PUBLISH_QUEUE_SIZE", 10000)))
+        self.batch_size = max(1, batch_size or int(getattr(settings, "REALTIME_PUBLISH_BATCH_SIZE", 100)))
+        if linger is None:
+            linger = int(getattr(settings, "REALTIME_PUBLISH_LINGER_MS", 5)) / 1000
+        self.linger = max(0.0, linger)
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._queue: queue.Queue[QueuedEvent] = queue.Queue(maxsize=self.queue_size)
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_started(self) -> None:
+        pid = os.getpid()
+        if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+            return
+        with self._lock:
+            if self._pid != pid:
+                # Forked worker: the parent's queue and thread do not exist here.
+                self._queue = queue.Queue(maxsize=self.queue_size)
+                self._thread = None
+                self._pid = pid
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="realtime-publisher", daemon=True)
+                self._thread.start()
+
+    def submit(self, channel: str, payload: dict, extra: Optional[dict] = None) -> bool:
+        """Queue an event without blocking; returns False when it was dropped."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((channel, payload, extra or {}))
+        except queue.Full:
+            PUBLISH_EVENTS.labels(outcome="dropped").inc()
+            logger.warning("gift_realtime.publish_dropped", extra={**(extra or {}), "reason": "queue_full"})
+            return False
+        PUBLISH_EVENTS.labels(outcome="queued").inc()
+        PUBLISH_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    def flush(self) -> None:
+        """Block until every queued event has been sent or handed to the fallback."""
+        if self._thread is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def _next_batch(self) -> List[QueuedEvent]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        PUBLISH_QUEUE_DEPTH.set(self._queue.qsize())
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                self.send_batch(batch)
+            except Exception:  # pragma: no cover - keep the thread alive
+                logger.exception("realtime publisher batch crashed")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def send_batch(self, batch: List[QueuedEvent]) -> None:
+        events = [{"channel": channel, "payload": payload} for channel, payload, _ in batch]
+        sent, error = _post("/internal/publish/batch", {"events": events})
+        if sent:
+            PUBLISH_EVENTS.labels(outcome="http").inc(len(batch))
+            for _, _, extra in batch:
+                logger.info("gift_realtime.publish_success", extra={**extra, "path": "http"})
+            return
+        logger.warning(
+            "gift_realtime.publish_failure",
+            extra={"path": "http", "error": error, "batch_size": len(batch)},
+        )
+        for channel, payload, extra in batch:
+            _publish_via_redis(channel, payload, extra)
+
+
+publisher = RealtimePublisher()
+
+
 def publish_realtime_event(channel: str, payload: dict[str, Any], *, context: dict | None = None) -> None:
     """
     Best-effort publish to realtime service. Falls back to Redis pubsub.
+
+    With a gateway configured and REALTIME_PUBLISH_ASYNC on, the event is queued for the
+    background publisher and this returns immediately.
     """
     extra = {"channel": channel, "event_type": payload.get("type")}
     if context:
         extra.update(context)
     logger.info("gift_realtime.publish_attempt", extra=extra)
+    if _publish_url() and getattr(settings, "REALTIME_PUBLISH_ASYNC", True):
+        publisher.submit(channel, payload, extra)
+        return
     sent, error = _publish_via_http(channel, payload)
     if sent:
+        PUBLISH_EVENTS.labels(outcome="http").inc()
         logger.info("gift_realtime.publish_success", extra={**extra, "path": "http"})
         return
     if error:
         logger.warning("gift_realtime.publish_failure", extra={**extra, "path": "http", "error": error})
-    logger.info("gift_realtime.publish_fallback_redis", extra=extra)
-    ok = publish_event(channel, payload)
-    if ok:
-        logger.info("gift_realtime.publish_success", extra={**extra, "path": "redis"})
-    else:
-        logger.warning("gift_realtime.publish_failure", extra={**extra, "path": "redis"})
+    _publish_via_redis(channel, payload, extra)
@@ -25,6 +25,22 @@ from .models import (
     PostVideo,
     Timeline,
 )
+from .viewer_state import (
+    RECENT_GIFTS_LIMIT,
+    get_viewer_state,
+    prefetch_comment_viewer_state,
+    prefetch_post_viewer_state,
+)
+
+
+def _recent_gifts_fallback(obj) -> list:
+    if not hasattr(obj, "paid_reactions"):
+        return []
+    return list(
+        obj.paid_reactions.select_related("sender", "gift_type").order_by("-created_at", "-id")[
+            :RECENT_GIFTS_LIMIT
+        ]
+    )
 
 
 class PostImageSerializer(serializers.ModelSerializer):
@@ -82,6 +98,13 @@ class PostVideoSerializer(serializers.ModelSerializer):
         return url
 
 
+class PostListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):  # type: ignore[override]
+        posts = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        prefetch_post_viewer_state(self.context, posts)
+        return super().to_representation(posts)
+
+
 class PostSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     media = MediaAssetSerializer(read_only=True, many=True)
@@ -142,6 +165,7 @@ class PostSerializer(serializers.ModelSerializer):
             "recent_gifts",
             "created_at",
         ]
+        list_serializer_class = PostListSerializer
 
     def get_liked(self, obj: Post) -> bool:
         return self.get_viewer_has_liked(obj)
@@ -150,10 +174,17 @@ class PostSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         if not request or request.user.is_anonymous:
             return False
+        state = get_viewer_state(self.context)
+        if state is not None and obj.pk in state.post_ids:
+            return obj.pk in state.liked_post_ids
         return PostLike.objects.filter(user=request.user, post=obj).exists()
 
     def get_recent_gifts(self, obj: Post) -> list[dict]:
-        recent = list(obj.paid_reactions.all()[:5]) if hasattr(obj, "paid_reactions") else []
+        state = get_viewer_state(self.context)
+        if state is not None and obj.pk in state.post_ids:
+            recent = state.post_gifts.get(obj.pk, [])
+        else:
+            recent = _recent_gifts_fallback(obj)
         return PaidReactionSerializer(recent, many=True, context=self.context).data
 
     def create(self, validated_data: dict) -> Post:
@@ -255,6 +286,13 @@ class CommentImageSerializer(serializers.ModelSerializer):
         return url
 
 
+class CommentListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):  # type: ignore[override]
+        comments = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        prefetch_comment_viewer_state(self.context, comments)
+        return super().to_representation(comments)
+
+
 class CommentSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     images = CommentImageSerializer(read_only=True, many=True)
@@ -295,6 +333,7 @@ class CommentSerializer(serializers.ModelSerializer):
             "recent_gifts",
             "created_at",
         ]
+        list_serializer_class = CommentListSerializer
 
     def to_internal_value(self, data):
         if isinstance(data, QueryDict):
@@ -325,10 +364,17 @@ class CommentSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         if not request or request.user.is_anonymous:
             return False
+        state = get_viewer_state(self.context)
+        if state is not None and obj.pk in state.comment_ids:
+            return obj.pk in state.liked_comment_ids
         return CommentLike.objects.filter(user=request.user, comment=obj).exists()
 
     def get_recent_gifts(self, obj: Comment) -> list[dict]:
-        recent = list(obj.paid_reactions.all()[:5]) if hasattr(obj, "paid_reactions") else []
+        state = get_viewer_state(self.context)
+        if state is not None and obj.pk in state.comment_ids:
+            recent = state.comment_gifts.get(obj.pk, [])
+        else:
+            recent = _recent_gifts_fallback(obj)
         return PaidReactionSerializer(recent, many=True, context=self.context).data
 
     def create(self, validated_data: dict) -> Comment:
@@ -421,7 +467,14 @@ class PaidReactionSerializer(serializers.ModelSerializer):
     def get_gift_type(self, obj: PaidReaction) -> dict:
         from apps.payments.serializers import GiftTypeSerializer
 
-        return GiftTypeSerializer(obj.gift_type, context=self.context).data
+        state = get_viewer_state(self.context)
+        if state is None:
+            return GiftTypeSerializer(obj.gift_type, context=self.context).data
+        payload = state.gift_type_payloads.get(obj.gift_type_id)
+        if payload is None:
+            payload = GiftTypeSerializer(obj.gift_type, context=self.context).data
+            state.gift_type_payloads[obj.gift_type_id] = payload
+        return dict(payload)
 
 
 class TimelineSerializer(serializers.ModelSerializer):
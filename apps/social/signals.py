@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from apps.feed.cache import FeedCache
-from apps.feed.services import fan_out_post
+from apps.feed.services import record_author_timeline_entry
+from apps.feed.tasks import fan_out_post_task
 
 from .models import Post
 
@@ -12,5 +14,7 @@ from .models import Post
 @receiver(post_save, sender=Post)
 def handle_post_created(sender, instance: Post, created: bool, **kwargs) -> None:
     if created:
-        fan_out_post(instance)
+        record_author_timeline_entry(instance)
+        post_id = instance.id
+        transaction.on_commit(lambda: fan_out_post_task.delay(post_id))
         FeedCache.invalidate_first_page(instance.author_id)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import CommentLike, PaidReaction, PostLike
+
+VIEWER_STATE_CONTEXT_KEY = "viewer_state"
+RECENT_GIFTS_LIMIT = 5
+
+
+def _viewer(context: dict):
+    request = context.get("request")
+    user = getattr(request, "user", None)
+    if user is None or user.is_anonymous:
+        return None
+    return user
+
+
+def _recent_reactions(target_field: str, target_ids: set[int]) -> dict[int, list[PaidReaction]]:
+    """Top-N newest paid reactions per target in a single windowed query."""
+    grouped: dict[int, list[PaidReaction]] = {target_id: [] for target_id in target_ids}
+    if not target_ids:
+        return grouped
+    rows = (
+        PaidReaction.objects.filter(**{f"{target_field}__in": target_ids})
+        .select_related("sender", "gift_type")
+        .annotate(
+            recent_rank=Window(
+                expression=RowNumber(),
+                partition_by=[F(target_field)],
+                order_by=[F("created_at").desc(), F("id").desc()],
+            )
+        )
+        .filter(recent_rank__lte=RECENT_GIFTS_LIMIT)
+        .order_by(target_field, "recent_rank")
+    )
+    for reaction in rows:
+        grouped[getattr(reaction, target_field)].append(reaction)
+    return grouped
+
+
+@dataclass
+class ViewerState:
+    """
+    Per-page viewer state for post/comment serialization.
+
+    Loaded in bulk by the list serializers so per-object SerializerMethodFields
+    read from memory instead of issuing one query per row. Ids that were never
+    loaded fall back to the per-object query path.
+    """
+
+    post_ids: set[int] = field(default_factory=set)
+    comment_ids: set[int] = field(default_factory=set)
+    liked_post_ids: set[int] = field(default_factory=set)
+    liked_comment_ids: set[int] = field(default_factory=set)
+    post_gifts: dict[int, list[PaidReaction]] = field(default_factory=dict)
+    comment_gifts: dict[int, list[PaidReaction]] = field(default_factory=dict)
+    gift_type_payloads: dict[int, dict] = field(default_factory=dict)
+
+    def load_posts(self, posts: Iterable, user=None) -> None:
+        new_ids = {post.pk for post in posts if post is not None and post.pk} - self.post_ids
+        if not new_ids:
+            return
+        if user is not None:
+            self.liked_post_ids.update(
+                PostLike.objects.filter(user=user, post_id__in=new_ids).values_list("post_id", flat=True)
+            )
+        self.post_gifts.update(_recent_reactions("post_id", new_ids))
+        self.post_ids.update(new_ids)
+
+    def load_comments(self, comments: Iterable, user=None) -> None:
+        new_ids = {comment.pk for comment in comments if comment is not None and comment.pk} - self.comment_ids
+        if not new_ids:
+            return
+        if user is not None:
+            self.liked_comment_ids.update(
+                CommentLike.objects.filter(user=user, comment_id__in=new_ids).values_list("comment_id", flat=True)
+            )
+        self.comment_gifts.update(_recent_reactions("comment_id", new_ids))
+        self.comment_ids.update(new_ids)
+
+
+def get_viewer_state(context: dict) -> ViewerState | None:
+    state = context.get(VIEWER_STATE_CONTEXT_KEY)
+    return state if isinstance(state, ViewerState) else None
+
+
+def prefetch_post_viewer_state(context: dict, posts: Iterable) -> ViewerState:
+    state = get_viewer_state(context)
+    if state is None:
+        state = ViewerState()
+        context[VIEWER_STATE_CONTEXT_KEY] = state
+    state.load_posts(posts, user=_viewer(context))
+    return state
+
+
+def prefetch_comment_viewer_state(context: dict, comments: Iterable) -> ViewerState:
+    state = get_viewer_state(context)
+    if state is None:
+        state = ViewerState()
+        context[VIEWER_STATE_CONTEXT_KEY] = state
+    state.load_comments(comments, user=_viewer(context))
+    return state
@@ -13,7 +13,12 @@ from rest_framework.response import Response
 
 from django.core.exceptions import ValidationError
 
-from apps.coin.services.ledger import create_spend, get_balance_cents, get_or_create_user_account
+from apps.coin.services.ledger import (
+    create_spend,
+    get_balance_cents,
+    get_or_create_user_account,
+    get_user_account_key,
+)
 from apps.payments.models import GiftType
 from apps.payments.feature_flag import payments_enabled
 from apps.feed.cache import FeedCache
@@ -173,8 +178,7 @@ class PostViewSet(viewsets.ModelViewSet):
         transaction.on_commit(
             lambda: publish_gift_received(reaction=reaction, channel=f"post:{post.id}", request=request)
         )
-        account = get_or_create_user_account(request.user)
-        balance_cents = get_balance_cents(account.account_key)
+        balance_cents = get_balance_cents(get_user_account_key(request.user))
         logger.info(
             "gift_spend.created request_id=%s user_id=%s target=post target_id=%s gift_type_id=%s "
             "quantity=%s amount_cents=%s reference=%s coin_event_id=%s",
@@ -336,8 +340,7 @@ class CommentViewSet(viewsets.ModelViewSet):
                 request=request,
             )
         )
-        account = get_or_create_user_account(request.user)
-        balance_cents = get_balance_cents(account.account_key)
+        balance_cents = get_balance_cents(get_user_account_key(request.user))
         logger.info(
             "gift_spend.created request_id=%s user_id=%s target=comment target_id=%s gift_type_id=%s "
             "quantity=%s amount_cents=%s reference=%s coin_event_id=%s",
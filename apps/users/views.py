@@ -137,15 +137,21 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         if request.method.lower() == "post":
             follow, _ = Follow.objects.get_or_create(follower=request.user, followee=target)
             rebuild_user_timeline(request.user.id)
-            from apps.feed.cache import FeedCache
+            from apps.feed.cache import FeedCache, RankedPoolCache
+            from apps.feed.timelines import invalidate_timeline
 
             FeedCache.invalidate_first_page(request.user.id)
+            RankedPoolCache.invalidate(request.user.id)
+            invalidate_timeline(request.user.id)
             return Response({"following": True})
         Follow.objects.filter(follower=request.user, followee=target).delete()
         rebuild_user_timeline(request.user.id)
-        from apps.feed.cache import FeedCache
+        from apps.feed.cache import FeedCache, RankedPoolCache
+        from apps.feed.timelines import invalidate_timeline
 
         FeedCache.invalidate_first_page(request.user.id)
+        RankedPoolCache.invalidate(request.user.id)
+        invalidate_timeline(request.user.id)
         return Response({"following": False})
 
     @action(detail=True, methods=["get"], url_path="followers")
@@ -169,6 +169,18 @@ COIN_FEE_MIN_CENTS = int(os.getenv("COIN_FEE_MIN_CENTS", "25"))
 COIN_THROTTLE_TRANSFER = os.getenv("COIN_THROTTLE_TRANSFER", "30/min")
 COIN_THROTTLE_SPEND = os.getenv("COIN_THROTTLE_SPEND", "60/min")
 PAID_REACTION_THROTTLE = os.getenv("PAID_REACTION_THROTTLE", "30/min")
+# Processes hashing day partitions of ledger snapshots; 1 hashes in-process.
+LEDGER_HASH_WORKERS = int(os.getenv("LEDGER_HASH_WORKERS", "1"))
+# coin_invariant_check only advances its high-water mark past events at least this old.
+COIN_INVARIANT_SETTLE_MS = int(os.getenv("COIN_INVARIANT_SETTLE_MS", "5000"))
+# Account status/is_system lookups for ledger postings: per-process LRU + shared cache.
+# Invalidation goes through the shared cache, so without Redis (LocMemCache is per
+# process) a suspension would not reach other workers; the cache stays off then.
+COIN_ACCOUNT_CACHE_ENABLED = (
+    bool(REDIS_CACHE_URL) and os.getenv("COIN_ACCOUNT_CACHE_ENABLED", "true").lower() == "true"
+)
+COIN_ACCOUNT_CACHE_SIZE = int(os.getenv("COIN_ACCOUNT_CACHE_SIZE", "4096"))
+COIN_ACCOUNT_CACHE_TTL_SECONDS = int(os.getenv("COIN_ACCOUNT_CACHE_TTL_SECONDS", "300"))
 
 AUTH_USER_MODEL = "users.User"
 AUTHENTICATION_BACKENDS = (
@@ -412,9 +424,40 @@ CELERY_BEAT_SCHEDULE = {
         "task": "apps.feed.tasks.prune_old_timeline_entries",
         "schedule": int(os.getenv("FEED_PRUNE_INTERVAL_HOURS", "6")) * 3600,
         "args": (int(os.getenv("FEED_PRUNE_DAYS", "30")),),
-    }
+    },
+    "prune-message-changes": {
+        "task": "apps.messaging.tasks.prune_message_changes",
+        "schedule": int(os.getenv("MESSAGING_SYNC_PRUNE_INTERVAL_HOURS", "6")) * 3600,
+    },
+    "message-digests": {
+        "task": "apps.notifications.tasks.send_message_digests_task",
+        "schedule": int(os.getenv("NOTIFICATIONS_DIGEST_INTERVAL_HOURS", "24")) * 3600,
+        "args": (int(os.getenv("NOTIFICATIONS_DIGEST_INTERVAL_HOURS", "24")),),
+    },
 }
 
+# --- Notifications ---
+# Message pushes for one (user, thread) within this window are merged into one; 0 disables.
+NOTIFICATIONS_PUSH_COALESCE_SECONDS = int(os.getenv("NOTIFICATIONS_PUSH_COALESCE_SECONDS", "10"))
+
+# --- Feed timelines (hybrid fan-out) ---
+FEED_TIMELINES_ENABLED = os.getenv("FEED_TIMELINES_ENABLED", "true").lower() == "true"
+FEED_TIMELINE_MAX_ENTRIES = int(os.getenv("FEED_TIMELINE_MAX_ENTRIES", "800"))
+FEED_TIMELINE_TTL_SECONDS = int(os.getenv("FEED_TIMELINE_TTL_SECONDS", str(7 * 24 * 3600)))
+FEED_FANOUT_FOLLOWER_THRESHOLD = int(os.getenv("FEED_FANOUT_FOLLOWER_THRESHOLD", "5000"))
+FEED_RANKED_POOL_TTL_SECONDS = int(os.getenv("FEED_RANKED_POOL_TTL_SECONDS", "300"))
+
+# --- Messaging sync ---
+MESSAGING_SYNC_PAGE_SIZE = int(os.getenv("MESSAGING_SYNC_PAGE_SIZE", "100"))
+MESSAGING_SYNC_MAX_PAGE_SIZE = int(os.getenv("MESSAGING_SYNC_MAX_PAGE_SIZE", "500"))
+# Snowflake ids are taken before commit; a caught-up client is only moved past records this old.
+MESSAGING_SYNC_SETTLE_MS = int(os.getenv("MESSAGING_SYNC_SETTLE_MS", "2000"))
+# Change records older than this are pruned; clients behind it must resync from scratch.
+MESSAGING_SYNC_RETENTION_DAYS = int(os.getenv("MESSAGING_SYNC_RETENTION_DAYS", "30"))
+# Per-message emoji counters in Redis, filled from the database on first read.
+MESSAGING_REACTION_COUNTERS_ENABLED = os.getenv("MESSAGING_REACTION_COUNTERS_ENABLED", "true").lower() == "true"
+MESSAGING_REACTION_COUNTERS_TTL_SECONDS = int(os.getenv("MESSAGING_REACTION_COUNTERS_TTL_SECONDS", str(24 * 3600)))
+
 # --- Pub/Sub (realtime fanout) ---
 # Prefer explicit PUBSUB_REDIS_URL; default to docker redis hostname to avoid localhost lookups
 PUBSUB_REDIS_URL = os.getenv("PUBSUB_REDIS_URL", "redis://redis:6379/1")
@@ -422,6 +465,16 @@ REALTIME_CHANNELS_ENABLED = os.getenv("REALTIME_CHANNELS_ENABLED", "false").lowe
 REALTIME_PUBLISH_URL = os.getenv("REALTIME_PUBLISH_URL", "")
 REALTIME_PUBLISH_TOKEN = os.getenv("REALTIME_PUBLISH_TOKEN", "")
 REALTIME_PUBLISH_RATE_LIMIT = os.getenv("REALTIME_PUBLISH_RATE_LIMIT", "")
+# Gateway publishes go through a bounded in-process queue drained by a background thread.
+REALTIME_PUBLISH_ASYNC = os.getenv("REALTIME_PUBLISH_ASYNC", "true").lower() == "true"
+REALTIME_PUBLISH_QUEUE_SIZE = int(os.getenv("REALTIME_PUBLISH_QUEUE_SIZE", "10000"))
+REALTIME_PUBLISH_BATCH_SIZE = int(os.getenv("REALTIME_PUBLISH_BATCH_SIZE", "100"))
+REALTIME_PUBLISH_LINGER_MS = int(os.getenv("REALTIME_PUBLISH_LINGER_MS", "5"))
+REALTIME_PUBLISH_POOL_SIZE = int(os.getenv("REALTIME_PUBLISH_POOL_SIZE", "4"))
+# Per-user Redis Streams let the realtime gateway replay events missed during a reconnect.
+REALTIME_STREAMS_ENABLED = os.getenv("REALTIME_STREAMS_ENABLED", "true").lower() == "true"
+REALTIME_STREAM_MAXLEN = int(os.getenv("REALTIME_STREAM_MAXLEN", "200"))
+REALTIME_STREAM_TTL_SECONDS = int(os.getenv("REALTIME_STREAM_TTL_SECONDS", str(24 * 3600)))
 
 CHANNEL_LAYERS = {
     "default": {
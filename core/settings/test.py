@@ -9,6 +9,11 @@ CELERY_BROKER_URL = "memory://"
 CELERY_RESULT_BACKEND = "cache+memory://"
 
 OPENSEARCH_ENABLED = False
+FEED_TIMELINES_ENABLED = False
+REALTIME_STREAMS_ENABLED = False
+MESSAGING_REACTION_COUNTERS_ENABLED = False
+COIN_ACCOUNT_CACHE_ENABLED = False
+NOTIFICATIONS_PUSH_COALESCE_SECONDS = 0
 
 MEDIA_ROOT = BASE_DIR / "tmp" / "test-media"
 
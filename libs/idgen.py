@@ -57,3 +57,8 @@ def generate_id(node_id: int = 1) -> int:
             generator = SnowflakeGenerator(node_id=node_id)
             _GLOBAL_GENERATORS[node_id] = generator
     return generator.get_id()
+
+
+def min_id_for_timestamp(timestamp_ms: int) -> int:
+    """Smallest id any node can generate at `timestamp_ms` (epoch milliseconds)."""
+    return max(0, (timestamp_ms - SnowflakeGenerator._epoch) << 22)
@@ -0,0 +1,158 @@
+"""
+Merkle trees over ledger rows.
+
+A leaf is SHA-256 of 0x00 + the row's canonical JSON (the same bytes the flat ledger
+hash consumes); an interior node is SHA-256 of 0x01 + left + right, and an unpaired
+node is carried up unchanged. Ledgers are partitioned by day: each day's rows form a
+subtree and the day roots, in date order, are the leaves of the tree whose root is
+stored on the snapshot. A row is then verified from its day's rows and the stored day
+roots alone, without re-hashing the rest of the month.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Mapping, Sequence, Tuple
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+EMPTY_ROOT = hashlib.sha256(b"").hexdigest()
+
+ProofStep = Dict[str, str]
+
+
+def encode_row(row: Mapping[str, object]) -> bytes:
+    return json.dumps(row, sort_keys=True).encode("utf-8")
+
+
+def day_partition(moment: datetime) -> str:
+    """UTC calendar day of a timestamp, the partition key for ledger trees."""
+    return moment.astimezone(timezone.utc).date().isoformat()
+
+
+def leaf_hash(encoded_row: bytes) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + encoded_row).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def _parent_level(level: Sequence[bytes]) -> List[bytes]:
+    parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        parents.append(level[-1])
+    return parents
+
+
+def merkle_root(leaves: Sequence[bytes]) -> str:
+    if not leaves:
+        return EMPTY_ROOT
+    level = list(leaves)
+    while len(level) > 1:
+        level = _parent_level(level)
+    return level[0].hex()
+
+
+def merkle_proof(leaves: Sequence[bytes], index: int) -> List[ProofStep]:
+    """Sibling hashes from `leaves[index]` up to the root, nearest first."""
+    if not 0 <= index < len(leaves):
+        raise IndexError("Leaf index out of range.")
+    proof: List[ProofStep] = []
+    level = list(leaves)
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({"side": "left" if sibling < index else "right", "hash": level[sibling].hex()})
+        level = _parent_level(level)
+        index //= 2
+    return proof
+
+
+def fold_proof(leaf: bytes, proof: Sequence[ProofStep]) -> str:
+    node = leaf
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        node = node_hash(sibling, node) if step["side"] == "left" else node_hash(node, sibling)
+    return node.hex()
+
+
+def partition_root(encoded_rows: Sequence[bytes]) -> str:
+    """Root of one partition's subtree; runs in pool workers, so it must stay picklable."""
+    return merkle_root([leaf_hash(row) for row in encoded_rows])
+
+
+def partitioned_root(partition_roots: Mapping[str, str]) -> str:
+    return merkle_root([bytes.fromhex(partition_roots[key]) for key in sorted(partition_roots)])
+
+
+def row_inclusion_proof(
+    partition_rows: Sequence[bytes], index: int, partition: str, partition_roots: Mapping[str, str]
+) -> List[ProofStep]:
+    """Proof from a row through its partition root to the snapshot root."""
+    keys = sorted(partition_roots)
+    tree_leaves = [bytes.fromhex(partition_roots[key]) for key in keys]
+    row_leaves = [leaf_hash(row) for row in partition_rows]
+    return merkle_proof(row_leaves, index) + merkle_proof(tree_leaves, keys.index(partition))
+
+
+def verify_inclusion(encoded_row: bytes, proof: Sequence[ProofStep], root: str) -> bool:
+    return fold_proof(leaf_hash(encoded_row), proof) == root
+
+
+class PartitionedMerkleBuilder:
+    """
+    Collect rows partition by partition (rows must arrive grouped by partition) and
+    hash each finished partition, in a process pool when `workers` > 1.
+
+    At most `workers * 2` partitions are in flight; older results are collected before
+    more are submitted, so memory stays bounded by a few partitions' rows.
+    """
+
+    def __init__(self, workers: int = 1) -> None:
+        self.workers = max(1, workers)
+        self.partition_roots: Dict[str, str] = {}
+        self._executor: Executor | None = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+        self._pending: Deque[Tuple[str, Future]] = deque()
+        self._partition: str | None = None
+        self._rows: List[bytes] = []
+
+    def __enter__(self) -> "PartitionedMerkleBuilder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+    def add(self, partition: str, encoded_row: bytes) -> None:
+        if partition != self._partition:
+            self._flush()
+            self._partition = partition
+        self._rows.append(encoded_row)
+
+    def _flush(self) -> None:
+        if self._partition is None:
+            return
+        if self._partition in self.partition_roots or any(key == self._partition for key, _ in self._pending):
+            raise ValueError(f"Rows for partition {self._partition} are not contiguous.")
+        if self._executor is None:
+            self.partition_roots[self._partition] = partition_root(self._rows)
+        else:
+            self._pending.append((self._partition, self._executor.submit(partition_root, self._rows)))
+            while len(self._pending) > self.workers * 2:
+                key, future = self._pending.popleft()
+                self.partition_roots[key] = future.result()
+        self._partition = None
+        self._rows = []
+
+    def finish(self) -> Tuple[str, Dict[str, str]]:
+        """Return `(root, partition_roots)` once every row has been added."""
+        self._flush()
+        while self._pending:
+            key, future = self._pending.popleft()
+            self.partition_roots[key] = future.result()
+        return partitioned_root(self.partition_roots), dict(sorted(self.partition_roots.items()))
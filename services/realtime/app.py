@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import hmac
 import json
 import logging
@@ -13,12 +12,16 @@ from redis.exceptions import RedisError
 
 from .auth import AuthError, decode_token
 from .config import settings
+from .hub import hub
 from .manager import manager
-from .redis_client import get_async_redis, publish
-from .schemas import AckEvent, MessageEvent, PresenceEvent, PublishRequest
+from .presence import presence
+from .redis_client import consume_rate_limit, publish, publish_batch, read_stream
+from .schemas import AckEvent, MessageEvent, PresenceBatchEvent, PresenceEvent, PublishBatchRequest, PublishRequest
 
 logger = logging.getLogger(__name__)
 
+_STREAM_ID_RE = re.compile(r"^\d{1,20}-\d{1,20}$")
+
 app = FastAPI(title=settings.app_name)
 
 
@@ -53,6 +56,23 @@ def _parse_channels(raw: str | None) -> list[str]:
     return channels[:20]
 
 
+def _parse_user_ids(raw) -> list[int]:
+    if not raw:
+        return []
+    values = raw.split(",") if isinstance(raw, str) else raw
+    if not isinstance(values, list):
+        return []
+    user_ids = []
+    for value in values:
+        try:
+            user_id = int(str(value).strip())
+        except ValueError:
+            continue
+        if user_id > 0:
+            user_ids.append(user_id)
+    return user_ids[: settings.realtime_presence_max_watch]
+
+
 def _verify_publish_token(authorization: str | None) -> None:
     token = settings.realtime_publish_token
     if not token or not token.strip():
@@ -117,18 +137,16 @@ def _parse_rate_limit(value: str | None) -> tuple[int, int] | None:
     return count, window
 
 
-async def _enforce_rate_limit(request: Request) -> None:
+async def _enforce_rate_limit(request: Request, cost: int = 1) -> None:
+    """Fixed-window limit per client IP, counted in events so batching cannot bypass it."""
     limit = _parse_rate_limit(settings.realtime_publish_rate_limit)
     if not limit:
         return
     count, window = limit
     client_ip = _client_ip(request)
     key = f"realtime:publish:rl:{client_ip}"
-    redis = get_async_redis()
     try:
-        current = await redis.incr(key)
-        if current == 1:
-            await redis.expire(key, window)
+        current = await consume_rate_limit(key, cost, window)
         if current > count:
             raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Rate limit exceeded")
     except HTTPException:
@@ -173,6 +191,45 @@ async def internal_publish(
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Publish failed")
 
 
+@app.post("/internal/publish/batch")
+async def internal_publish_batch(
+    request: PublishBatchRequest,
+    http_request: Request,
+    authorization: str | None = Header(default=None),
+) -> dict:
+    _verify_publish_token(authorization)
+    if not request.events or len(request.events) > settings.realtime_publish_batch_max:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid batch size")
+    for event in request.events:
+        _validate_channel(event.channel)
+        if not isinstance(event.payload, dict):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid payload")
+        _validate_payload(event.payload)
+    await _enforce_rate_limit(http_request, cost=len(request.events))
+    req_id = _request_id(http_request)
+    try:
+        published = await publish_batch([(event.channel, event.payload) for event in request.events])
+    except RedisError:
+        logger.warning("gift_realtime.publish_failure", extra={"batch_size": len(request.events), "request_id": req_id})
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Publish failed")
+    logger.info("gift_realtime.publish_success", extra={"batch_size": published, "request_id": req_id})
+    return {"status": "ok", "published": published}
+
+
+@app.get("/presence")
+async def presence_query(ids: str = "", authorization: str | None = Header(default=None)) -> dict:
+    """Which of the given user ids are online on any gateway node."""
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token")
+    try:
+        decode_token(authorization.split(" ", 1)[1].strip())
+    except AuthError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    user_ids = _parse_user_ids(ids)
+    online = await presence.online_among(user_ids)
+    return {"online": sorted(online)}
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket, user_id: int = Depends(get_user_id)) -> None:
     token_sub = getattr(websocket.state, "token_sub", None)
@@ -182,25 +239,34 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int = Depends(get_us
     logger.debug("realtime: sending event", extra={"type": ack.type, "target": "personal"})
     await manager.send_personal_message(user_id, ack.model_dump_json())
 
-    redis = get_async_redis()
-    pubsub = redis.pubsub()
     channels = [f"user:{user_id}", "broadcast"]
     channels.extend(_parse_channels(websocket.query_params.get("channels")))
-    await pubsub.subscribe(*channels)
-    pubsub_task = asyncio.create_task(_forward_pubsub(pubsub, websocket))
-    await _publish_presence(user_id, "online")
+    last_event_id = websocket.query_params.get("last_event_id")
+    if last_event_id:
+        # Live events are held until the replay is queued, so older events never arrive after
+        # newer ones. Subscribing first loses nothing; events published in between may arrive
+        # twice and clients de-duplicate by event_id.
+        manager.hold(websocket)
+    await hub.subscribe(user_id, websocket, channels)
+    await presence.connect(user_id, websocket)
+    if last_event_id:
+        try:
+            await _replay_missed_events(user_id, websocket, last_event_id)
+        finally:
+            await manager.release(user_id, websocket)
+    watch = _parse_user_ids(websocket.query_params.get("watch"))
+    if watch:
+        await _send_presence_snapshot(user_id, websocket, watch)
     try:
         while True:
             raw = await websocket.receive_text()
             event = json.loads(raw)
             event_type = event.get("type")
             if event_type == "presence":
-                payload = PresenceEvent(**event)
-                response = payload.model_copy(update={"timestamp": datetime.utcnow()})
-                logger.debug("realtime: sending event", extra={"type": response.type, "target": "broadcast"})
-                await manager.broadcast(response.model_dump_json())
-                with suppress(RedisError):
-                    await publish("broadcast", response.model_dump())
+                payload = PresenceEvent(**{**event, "user_id": user_id})
+                presence.record(payload.model_copy(update={"timestamp": datetime.utcnow()}))
+            elif event_type == "presence.watch":
+                await _send_presence_snapshot(user_id, websocket, _parse_user_ids(event.get("user_ids")))
             elif event_type == "message":
                 payload = MessageEvent(**event)
                 response = payload.model_copy(update={"created_at": datetime.utcnow()})
@@ -209,57 +275,37 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int = Depends(get_us
                 with suppress(RedisError):
                     await publish(f"user:{payload.sender_id}", response.model_dump())
             else:
-                await manager.safe_send_text(websocket, AckEvent(message="ignored").model_dump_json())
+                await manager.send(user_id, websocket, AckEvent(message="ignored").model_dump_json())
     except AuthError as exc:
         logger.warning("WebSocket auth error for user_id=%s: %s", user_id, exc)
         manager.disconnect(user_id, websocket)
         await websocket.close()
-        await _publish_presence(user_id, "offline")
         return
     except WebSocketDisconnect:
         manager.disconnect(user_id, websocket)
-        await _publish_presence(user_id, "offline")
     except json.JSONDecodeError:
-        await manager.safe_send_text(websocket, AckEvent(message="invalid-json").model_dump_json())
+        await manager.send(user_id, websocket, AckEvent(message="invalid-json").model_dump_json())
     finally:
         manager.disconnect(user_id, websocket)
-        pubsub_task.cancel()
-        with suppress(asyncio.CancelledError):
-            await pubsub_task
-        with suppress(Exception):
-            await pubsub.unsubscribe(*channels)
-            await pubsub.close()
+        presence.disconnect(user_id, websocket)
+        await hub.unsubscribe(user_id, websocket, channels)
 
 
-async def _forward_pubsub(pubsub, websocket: WebSocket) -> None:
-    try:
-        async for message in pubsub.listen():  # type: ignore[attr-defined]
-            if message is None:
-                continue
-            if message.get("type") != "message":
-                continue
-            data = message.get("data")
-            if isinstance(data, bytes):
-                data = data.decode("utf-8")
-            ok = await manager.safe_send_text(websocket, data)
-            if not ok:
-                break
-    except asyncio.CancelledError:
-        raise
-    except RedisError:
-        await manager.safe_send_text(websocket, AckEvent(message="realtime-error").model_dump_json())
-
-
-async def _publish_presence(user_id: int, status: str) -> None:
-    event = PresenceEvent(
-        user_id=user_id,
-        thread_id=None,
-        status=status,
-        timestamp=datetime.utcnow(),
-    )
-    logger.debug("realtime: sending event", extra={"type": event.type, "target": "broadcast"})
-    await manager.broadcast(event.model_dump_json())
+async def _replay_missed_events(user_id: int, websocket: WebSocket, last_event_id: str) -> None:
+    if not _STREAM_ID_RE.match(last_event_id):
+        await manager.send(user_id, websocket, AckEvent(message="replay-invalid").model_dump_json())
+        return
     try:
-        await publish("broadcast", event.model_dump())
+        messages, truncated = await read_stream(f"user:{user_id}", last_event_id, settings.realtime_replay_limit)
     except RedisError:
-        pass
+        truncated, messages = True, []
+    for message in messages:
+        await manager.send(user_id, websocket, message)
+    # "replay-truncated" tells the client to fall back to the sync endpoints.
+    done = AckEvent(message="replay-truncated" if truncated else "replay-complete")
+    await manager.send(user_id, websocket, done.model_dump_json())
+
+
+async def _send_presence_snapshot(user_id: int, websocket: WebSocket, watch: list[int]) -> None:
+    online = await presence.watch(user_id, websocket, watch)
+    await manager.send(user_id, websocket, PresenceBatchEvent(changes=online).model_dump_json())
@@ -14,6 +14,16 @@ class Settings(BaseSettings):
     realtime_jwt_secret: str | None = Field(None, alias="REALTIME_JWT_SECRET")
     realtime_publish_token: str | None = Field(None, alias="REALTIME_PUBLISH_TOKEN")
     realtime_publish_rate_limit: str | None = Field(None, alias="REALTIME_PUBLISH_RATE_LIMIT")
+    realtime_publish_batch_max: int = Field(500, alias="REALTIME_PUBLISH_BATCH_MAX")
+    realtime_send_queue_size: int = Field(256, alias="REALTIME_SEND_QUEUE_SIZE")
+    realtime_slow_consumer_policy: str = Field("drop", alias="REALTIME_SLOW_CONSUMER_POLICY")
+    realtime_send_timeout_seconds: float = Field(5.0, alias="REALTIME_SEND_TIMEOUT_SECONDS")
+    realtime_hub_shards: int = Field(1, alias="REALTIME_HUB_SHARDS")
+    realtime_presence_flush_seconds: float = Field(1.0, alias="REALTIME_PRESENCE_FLUSH_SECONDS")
+    realtime_presence_heartbeat_seconds: float = Field(30.0, alias="REALTIME_PRESENCE_HEARTBEAT_SECONDS")
+    realtime_presence_ttl_seconds: int = Field(90, alias="REALTIME_PRESENCE_TTL_SECONDS")
+    realtime_presence_max_watch: int = Field(500, alias="REALTIME_PRESENCE_MAX_WATCH")
+    realtime_replay_limit: int = Field(500, alias="REALTIME_REPLAY_LIMIT")
 
     class Config:
         env_file = ".env"
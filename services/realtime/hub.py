@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import zlib
+from contextlib import suppress
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import WebSocket
+from redis.exceptions import RedisError
+
+from .config import settings
+from .manager import ConnectionManager, manager as default_manager
+from .redis_client import get_async_redis
+from .schemas import AckEvent
+
+logger = logging.getLogger(__name__)
+
+Subscriber = Tuple[int, WebSocket]
+Listener = Callable[[str], Awaitable[None]]
+
+_RECONNECT_DELAYS = (0.5, 1.0, 2.0, 5.0)
+
+
+class _Shard:
+    """One Redis pubsub connection and the reader task that drains it."""
+
+    def __init__(self, hub: "SubscriptionHub", index: int) -> None:
+        self.hub = hub
+        self.index = index
+        self.channels: Set[str] = set()
+        self.pubsub = None
+        self.task: Optional[asyncio.Task] = None
+
+    def _ensure_pubsub(self):
+        if self.pubsub is None:
+            self.pubsub = self.hub.redis_factory().pubsub()
+        return self.pubsub
+
+    async def subscribe(self, channels: List[str]) -> None:
+        self.channels.update(channels)
+        try:
+            await self._ensure_pubsub().subscribe(*channels)
+        except (RedisError, OSError) as exc:
+            # The reader notices the broken connection and resubscribes every channel.
+            logger.warning("realtime hub shard %s failed to subscribe: %s", self.index, exc)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._read())
+
+    async def unsubscribe(self, channels: List[str]) -> None:
+        self.channels.difference_update(channels)
+        if self.pubsub is not None:
+            with suppress(RedisError, OSError):
+                await self.pubsub.unsubscribe(*channels)
+
+    async def _read(self) -> None:
+        failures = 0
+        while self.pubsub is not None:
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            # RuntimeError: the pubsub has no connection because resubscribing failed.
+            except (RedisError, OSError, RuntimeError) as exc:
+                logger.warning("realtime hub shard %s lost its Redis connection: %s", self.index, exc)
+                await self.hub.notify_error(self.channels)
+                await asyncio.sleep(_RECONNECT_DELAYS[min(failures, len(_RECONNECT_DELAYS) - 1)])
+                failures += 1
+                await self._reconnect()
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+            channel = message.get("channel")
+            data = message.get("data")
+            if isinstance(channel, bytes):
+                channel = channel.decode("utf-8")
+            if isinstance(data, bytes):
+                data = data.decode("utf-8")
+            await self.hub.dispatch(channel, data)
+
+    async def _reconnect(self) -> None:
+        old, self.pubsub = self.pubsub, None
+        if old is not None:
+            with suppress(Exception):
+                await old.close()
+        if not self.channels:
+            return
+        with suppress(RedisError, OSError):
+            await self._ensure_pubsub().subscribe(*self.channels)
+
+    async def close(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+        if self.pubsub is not None:
+            with suppress(Exception):
+                await self.pubsub.close()
+            self.pubsub = None
+        self.channels.clear()
+
+
+class SubscriptionHub:
+    """
+    Per-process multiplexer for Redis pubsub.
+
+    Sockets register interest in channels; the hub ref-counts them and keeps a single
+    SUBSCRIBE per channel on a small, fixed set of shared connections (channels are
+    spread across `shards` by CRC32). Incoming messages are handed to the
+    ConnectionManager for every local socket subscribed to that channel.
+    """
+
+    def __init__(
+        self,
+        connection_manager: Optional[ConnectionManager] = None,
+        *,
+        shards: Optional[int] = None,
+        redis_factory: Callable = get_async_redis,
+    ) -> None:
+        self.manager = connection_manager or default_manager
+        self.redis_factory = redis_factory
+        self.subscribers: Dict[str, Set[Subscriber]] = {}
+        self.listeners: Dict[str, List[Listener]] = {}
+        self._shards = [_Shard(self, index) for index in range(max(1, shards or settings.realtime_hub_shards))]
+
+    def _shard(self, channel: str) -> _Shard:
+        return self._shards[zlib.crc32(channel.encode("utf-8")) % len(self._shards)]
+
+    def _group(self, channels: Iterable[str]) -> Dict[_Shard, List[str]]:
+        grouped: Dict[_Shard, List[str]] = {}
+        for channel in channels:
+            grouped.setdefault(self._shard(channel), []).append(channel)
+        return grouped
+
+    async def subscribe(self, user_id: int, websocket: WebSocket, channels: Iterable[str]) -> None:
+        """Add a socket to each channel, issuing SUBSCRIBE only for channels new to this process."""
+        new_channels = []
+        for channel in dict.fromkeys(channels):
+            members = self.subscribers.setdefault(channel, set())
+            if not members and channel not in self.listeners:
+                new_channels.append(channel)
+            members.add((user_id, websocket))
+        for shard, shard_channels in self._group(new_channels).items():
+            await shard.subscribe(shard_channels)
+
+    async def unsubscribe(self, user_id: int, websocket: WebSocket, channels: Iterable[str]) -> None:
+        """Drop a socket from each channel, issuing UNSUBSCRIBE once the last local subscriber leaves."""
+        idle_channels = []
+        for channel in dict.fromkeys(channels):
+            members = self.subscribers.get(channel)
+            if members is None:
+                continue
+            members.discard((user_id, websocket))
+            if not members:
+                self.subscribers.pop(channel, None)
+                if channel not in self.listeners:
+                    idle_channels.append(channel)
+        for shard, shard_channels in self._group(idle_channels).items():
+            await shard.unsubscribe(shard_channels)
+
+    async def listen(self, channel: str, callback: Listener) -> None:
+        """Register a process-level callback for a channel; it shares the channel's subscription."""
+        first = channel not in self.listeners and not self.subscribers.get(channel)
+        self.listeners.setdefault(channel, []).append(callback)
+        if first:
+            await self._shard(channel).subscribe([channel])
+
+    async def dispatch(self, channel: str, data: str) -> None:
+        for callback in list(self.listeners.get(channel, ())):
+            try:
+                await callback(data)
+            except Exception:
+                logger.exception("realtime hub listener failed for channel %s", channel)
+        targets = list(self.subscribers.get(channel, ()))
+        if targets:
+            await self.manager.deliver(targets, data)
+
+    async def notify_error(self, channels: Iterable[str]) -> None:
+        notice = AckEvent(message="realtime-error").model_dump_json()
+        targets = {target for channel in channels for target in self.subscribers.get(channel, ())}
+        if targets:
+            await self.manager.deliver(list(targets), notice)
+
+    @property
+    def connection_count(self) -> int:
+        return sum(1 for shard in self._shards if shard.pubsub is not None)
+
+    async def close(self) -> None:
+        for shard in self._shards:
+            await shard.close()
+        self.subscribers.clear()
+        self.listeners.clear()
+
+
+hub = SubscriptionHub()
@@ -0,0 +1,110 @@
+"""
+Broadcast load test for ConnectionManager using in-process fake sockets.
+
+    python -m services.realtime.loadtest --connections 10000 --slow 100 --messages 20
+
+Fast sockets finish a send after --send-latency-ms; slow sockets stall for --slow-latency-ms.
+Reports how long each broadcast() call blocks the caller and the per-socket delivery
+latency of fast sockets, so a regression where one stalled client holds up the fan-out
+shows up as a jump in the p99/max numbers.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from starlette.websockets import WebSocketState
+
+from .manager import ConnectionManager
+
+
+class _LoadSocket:
+    def __init__(self, latency: float, latencies: List[float]) -> None:
+        self.latency = latency
+        self.latencies = latencies
+        self.application_state = WebSocketState.CONNECTED
+        self.client_state = WebSocketState.CONNECTED
+
+    async def send_text(self, message: str) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        sent_at = float(message.split(":", 1)[0])
+        self.latencies.append(time.perf_counter() - sent_at)
+
+    async def close(self, code: int = 1000) -> None:
+        self.application_state = WebSocketState.DISCONNECTED
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def run(args: argparse.Namespace) -> dict:
+    manager = ConnectionManager(
+        queue_size=args.queue_size,
+        slow_consumer_policy=args.policy,
+        send_timeout=args.send_timeout,
+    )
+    fast_latencies: List[float] = []
+    slow_latencies: List[float] = []
+    for index in range(args.connections):
+        if index < args.slow:
+            socket = _LoadSocket(args.slow_latency_ms / 1000, slow_latencies)
+        else:
+            socket = _LoadSocket(args.send_latency_ms / 1000, fast_latencies)
+        manager.register(index + 1, socket)  # type: ignore[arg-type]
+    await asyncio.sleep(0)
+
+    call_times: List[float] = []
+    started = time.perf_counter()
+    for seq in range(args.messages):
+        before = time.perf_counter()
+        await manager.broadcast(f"{before}:{seq}")
+        call_times.append(time.perf_counter() - before)
+        await asyncio.sleep(args.interval_ms / 1000)
+    fast_expected = (args.connections - args.slow) * args.messages
+    while len(fast_latencies) < fast_expected:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+    await manager.shutdown()
+
+    return {
+        "connections": args.connections,
+        "slow": args.slow,
+        "messages": args.messages,
+        "broadcast_call_ms_p50": statistics.median(call_times) * 1000,
+        "broadcast_call_ms_max": max(call_times) * 1000,
+        "fast_delivery_ms_p50": _percentile(fast_latencies, 0.50) * 1000,
+        "fast_delivery_ms_p99": _percentile(fast_latencies, 0.99) * 1000,
+        "fast_delivery_ms_max": max(fast_latencies) * 1000 if fast_latencies else 0.0,
+        "slow_delivered": len(slow_latencies),
+        "total_s": elapsed,
+        **manager.stats,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=10_000)
+    parser.add_argument("--slow", type=int, default=100, help="Sockets that stall on every send.")
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--interval-ms", type=float, default=10.0)
+    parser.add_argument("--send-latency-ms", type=float, default=0.0)
+    parser.add_argument("--slow-latency-ms", type=float, default=2000.0)
+    parser.add_argument("--queue-size", type=int, default=16)
+    parser.add_argument("--policy", choices=("drop", "disconnect"), default="drop")
+    parser.add_argument("--send-timeout", type=float, default=5.0)
+    result = asyncio.run(run(parser.parse_args()))
+    for key, value in result.items():
+        print(f"{key:>24}: {value:.3f}" if isinstance(value, float) else f"{key:>24}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,87 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Dict, Set
+import logging
+from contextlib import suppress
+from typing import Dict, List, Optional, Set, Tuple
 
 from fastapi import WebSocket
 from starlette.websockets import WebSocketDisconnect, WebSocketState
 
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+SLOW_CONSUMER_DROP = "drop"
+SLOW_CONSUMER_DISCONNECT = "disconnect"
+# "Try again later": the client is healthy but cannot keep up with the event rate.
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class _Outbox:
+    """Bounded send queue for one socket, drained by its own writer task."""
+
+    __slots__ = ("user_id", "websocket", "queue", "task", "closed")
+
+    def __init__(self, user_id: int, websocket: WebSocket, maxsize: int) -> None:
+        self.user_id = user_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=maxsize)
+        self.task: Optional[asyncio.Task] = None
+        self.closed = False
+
 
 class ConnectionManager:
-    def __init__(self) -> None:
+    """
+    Tracks local websockets and fans messages out to them.
+
+    Sockets registered through `connect` get a bounded outbox and a writer task, so
+    `broadcast` only enqueues and one slow client never delays the others. When an
+    outbox is full the slow-consumer policy either drops the oldest queued message
+    or disconnects the socket. A socket can be put on `hold`, which buffers fan-out
+    deliveries to it until `release` while direct `send`s still go through.
+    """
+
+    def __init__(
+        self,
+        *,
+        queue_size: Optional[int] = None,
+        slow_consumer_policy: Optional[str] = None,
+        send_timeout: Optional[float] = None,
+    ) -> None:
         self.connections: Dict[int, Set[WebSocket]] = {}
         self._locks: Dict[int, asyncio.Lock] = {}
+        self._outboxes: Dict[int, _Outbox] = {}
+        self._held: Dict[int, List[str]] = {}
+        self._closing: Set[asyncio.Task] = set()
+        self.queue_size = max(1, queue_size or settings.realtime_send_queue_size)
+        policy = slow_consumer_policy or settings.realtime_slow_consumer_policy
+        if policy not in (SLOW_CONSUMER_DROP, SLOW_CONSUMER_DISCONNECT):
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.slow_consumer_policy = policy
+        self.send_timeout = send_timeout if send_timeout is not None else settings.realtime_send_timeout_seconds
+        self.stats: Dict[str, int] = {"enqueued": 0, "dropped": 0, "slow_disconnects": 0}
 
     async def connect(self, user_id: int, websocket: WebSocket) -> None:
         await websocket.accept()
+        self.register(user_id, websocket)
+
+    def register(self, user_id: int, websocket: WebSocket) -> None:
+        """Track an accepted socket and start its writer task."""
         self.connections.setdefault(user_id, set()).add(websocket)
         self._locks.setdefault(id(websocket), asyncio.Lock())
+        if id(websocket) not in self._outboxes:
+            outbox = _Outbox(user_id, websocket, self.queue_size)
+            outbox.task = asyncio.create_task(self._writer(outbox))
+            self._outboxes[id(websocket)] = outbox
 
     def disconnect(self, user_id: int, websocket: WebSocket) -> None:
+        self._held.pop(id(websocket), None)
+        outbox = self._outboxes.pop(id(websocket), None)
+        if outbox is not None:
+            outbox.closed = True
+            if outbox.task is not None and outbox.task is not asyncio.current_task():
+                outbox.task.cancel()
         websockets = self.connections.get(user_id)
         if not websockets:
             return
@@ -47,25 +111,116 @@ class ConnectionManager:
             except Exception:
                 return False
 
-    async def send_personal_message(self, user_id: int, message: str) -> None:
-        stale: Set[WebSocket] = set()
-        for ws in list(self.connections.get(user_id, set())):
-            ok = await self.safe_send_text(ws, message)
+    async def _writer(self, outbox: _Outbox) -> None:
+        try:
+            while not outbox.closed:
+                message = await outbox.queue.get()
+                try:
+                    async with asyncio.timeout(self.send_timeout):
+                        ok = await self.safe_send_text(outbox.websocket, message)
+                except TimeoutError:
+                    ok = False
+                    self.stats["slow_disconnects"] += 1
+                    logger.info("realtime: send timed out, disconnecting user_id=%s", outbox.user_id)
+                finally:
+                    outbox.queue.task_done()
+                if not ok:
+                    self.disconnect(outbox.user_id, outbox.websocket)
+                    await self._close(outbox.websocket, SLOW_CONSUMER_CLOSE_CODE)
+        finally:
+            # Release anything still queued so drain() never waits on a dead socket.
+            while not outbox.queue.empty():
+                outbox.queue.get_nowait()
+                outbox.queue.task_done()
+
+    async def _close(self, websocket: WebSocket, code: int) -> None:
+        with suppress(Exception):
+            if websocket.application_state == WebSocketState.CONNECTED:
+                await websocket.close(code=code)
+
+    def enqueue(self, user_id: int, websocket: WebSocket, message: str) -> bool:
+        """
+        Queue a message on a registered socket without waiting for delivery.
+
+        Returns False when the socket is gone or was disconnected as a slow consumer.
+        """
+        outbox = self._outboxes.get(id(websocket))
+        if outbox is None or outbox.closed:
+            return False
+        try:
+            outbox.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            if self.slow_consumer_policy == SLOW_CONSUMER_DISCONNECT:
+                self.stats["slow_disconnects"] += 1
+                logger.info("realtime: send queue full, disconnecting user_id=%s", user_id)
+                self.disconnect(user_id, websocket)
+                task = asyncio.create_task(self._close(websocket, SLOW_CONSUMER_CLOSE_CODE))
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+                return False
+            # Drop the oldest pending message: for presence and typing the newest state wins.
+            outbox.queue.get_nowait()
+            outbox.queue.task_done()
+            outbox.queue.put_nowait(message)
+            self.stats["dropped"] += 1
+        self.stats["enqueued"] += 1
+        return True
+
+    async def send(self, user_id: int, websocket: WebSocket, message: str) -> bool:
+        """Deliver through the socket's outbox when it has one, otherwise send directly."""
+        if id(websocket) in self._outboxes:
+            return self.enqueue(user_id, websocket, message)
+        ok = await self.safe_send_text(websocket, message)
+        if not ok:
+            self.disconnect(user_id, websocket)
+        return ok
+
+    def hold(self, websocket: WebSocket) -> None:
+        """Buffer `deliver`ed messages for a socket, e.g. while its missed events are replayed."""
+        self._held.setdefault(id(websocket), [])
+
+    async def release(self, user_id: int, websocket: WebSocket) -> None:
+        """Send what was buffered during `hold`, in arrival order, and deliver normally again."""
+        for message in self._held.pop(id(websocket), []):
+            await self.send(user_id, websocket, message)
+
+    async def deliver(self, targets: List[Tuple[int, WebSocket]], message: str) -> None:
+        """Send one message to many (user_id, socket) pairs without waiting on any single socket."""
+        direct: List[Tuple[int, WebSocket]] = []
+        for user_id, ws in targets:
+            held = self._held.get(id(ws))
+            if held is not None:
+                held.append(message)
+            elif id(ws) in self._outboxes:
+                self.enqueue(user_id, ws, message)
+            else:
+                direct.append((user_id, ws))
+        if not direct:
+            return
+        results = await asyncio.gather(*(self.safe_send_text(ws, message) for _, ws in direct))
+        for (user_id, ws), ok in zip(direct, results):
             if not ok:
-                stale.add(ws)
-        for ws in stale:
-            self.disconnect(user_id, ws)
+                self.disconnect(user_id, ws)
+
+    async def send_personal_message(self, user_id: int, message: str) -> None:
+        await self.deliver([(user_id, ws) for ws in list(self.connections.get(user_id, set()))], message)
 
     async def broadcast(self, message: str) -> None:
-        stale_map: Dict[int, Set[WebSocket]] = {}
-        for user_id, sockets in list(self.connections.items()):
-            for ws in list(sockets):
-                ok = await self.safe_send_text(ws, message)
-                if not ok:
-                    stale_map.setdefault(user_id, set()).add(ws)
-        for user_id, sockets in stale_map.items():
-            for ws in sockets:
-                self.disconnect(user_id, ws)
+        targets = [(user_id, ws) for user_id, sockets in list(self.connections.items()) for ws in list(sockets)]
+        await self.deliver(targets, message)
+
+    async def drain(self) -> None:
+        """Wait until every outbox queued so far has been handed to its socket."""
+        await asyncio.gather(*(outbox.queue.join() for outbox in list(self._outboxes.values())))
+
+    async def shutdown(self) -> None:
+        outboxes = list(self._outboxes.values())
+        for outbox in outboxes:
+            self.disconnect(outbox.user_id, outbox.websocket)
+        tasks = [outbox.task for outbox in outboxes if outbox.task is not None]
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
 
 
 manager = ConnectionManager()
@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from contextlib import suppress
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import WebSocket
+from redis.exceptions import RedisError
+
+from .config import settings
+from .hub import SubscriptionHub, hub as default_hub
+from .manager import ConnectionManager, manager as default_manager
+from .redis_client import get_async_redis, publish
+from .schemas import PresenceBatchEvent, PresenceEvent
+
+logger = logging.getLogger(__name__)
+
+PRESENCE_CHANNEL = "presence:diffs"
+# ZSET user_id -> epoch second until which the user counts as online.
+ONLINE_KEY = "presence:online"
+
+Subscriber = Tuple[int, WebSocket]
+Publisher = Callable[[str, dict], Awaitable[None]]
+
+_PIPELINE_CHUNK = 500
+
+
+def sessions_key(user_id: int) -> str:
+    """HASH node_id -> expiry for the gateway nodes that hold a socket for the user."""
+    return f"presence:sessions:{user_id}"
+
+
+def _chunks(values: List[int], size: int = _PIPELINE_CHUNK) -> Iterable[List[int]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _has_live_session(fields: Optional[dict], now: float) -> bool:
+    for value in (fields or {}).values():
+        try:
+            if float(value) > now:
+                return True
+        except (TypeError, ValueError):
+            continue
+    return False
+
+
+class PresenceStore:
+    """
+    Online state in Redis, written in pipelined batches.
+
+    Every node records itself in the user's sessions hash and bumps the user's expiry in
+    the shared online ZSET; nodes refresh both on each heartbeat. A user goes offline when
+    the last live session is released, or when a crashed node's heartbeats stop and the
+    sweep finds the ZSET entry expired. ZREM decides which node reports the change, so
+    each offline transition is announced once.
+    """
+
+    def __init__(self, redis_factory: Callable = get_async_redis, ttl: Optional[int] = None) -> None:
+        self.redis_factory = redis_factory
+        self.ttl = max(1, ttl or settings.realtime_presence_ttl_seconds)
+
+    async def _refresh(self, node_id: str, user_ids: List[int], now: float, *, probe: bool) -> list:
+        expiry = now + self.ttl
+        pipe = self.redis_factory().pipeline(transaction=False)
+        for user_id in user_ids:
+            if probe:
+                pipe.zscore(ONLINE_KEY, user_id)
+            pipe.hset(sessions_key(user_id), node_id, expiry)
+            pipe.expire(sessions_key(user_id), self.ttl)
+        pipe.zadd(ONLINE_KEY, {str(user_id): expiry for user_id in user_ids}, gt=True)
+        return await pipe.execute()
+
+    async def mark_online(self, node_id: str, user_ids: List[int], now: float) -> List[int]:
+        """Record sessions for `user_ids`; returns the users that were offline until now."""
+        came_online: List[int] = []
+        for chunk in _chunks(user_ids):
+            results = await self._refresh(node_id, chunk, now, probe=True)
+            for user_id, score in zip(chunk, results[0:-1:3]):
+                if score is None or float(score) <= now:
+                    came_online.append(user_id)
+        return came_online
+
+    async def heartbeat(self, node_id: str, user_ids: List[int], now: float) -> None:
+        for chunk in _chunks(user_ids):
+            await self._refresh(node_id, chunk, now, probe=False)
+
+    async def _remove_if_idle(self, user_ids: List[int], sessions: List[dict], now: float) -> List[int]:
+        idle = [user_id for user_id, fields in zip(user_ids, sessions) if not _has_live_session(fields, now)]
+        if not idle:
+            return []
+        pipe = self.redis_factory().pipeline(transaction=False)
+        for user_id in idle:
+            pipe.zrem(ONLINE_KEY, user_id)
+        removed = await pipe.execute()
+        return [user_id for user_id, count in zip(idle, removed) if count]
+
+    async def mark_offline(self, node_id: str, user_ids: List[int], now: float) -> List[int]:
+        """Release this node's sessions; returns the users that no longer have any live session."""
+        went_offline: List[int] = []
+        for chunk in _chunks(user_ids):
+            pipe = self.redis_factory().pipeline(transaction=False)
+            for user_id in chunk:
+                pipe.hdel(sessions_key(user_id), node_id)
+                pipe.hgetall(sessions_key(user_id))
+            results = await pipe.execute()
+            went_offline.extend(await self._remove_if_idle(chunk, results[1::2], now))
+        return went_offline
+
+    async def sweep(self, now: float, limit: int = _PIPELINE_CHUNK) -> List[int]:
+        """Expire users whose sessions stopped heartbeating (e.g. their node died)."""
+        client = self.redis_factory()
+        raw = await client.zrangebyscore(ONLINE_KEY, "-inf", now, start=0, num=limit)
+        stale = [int(member) for member in raw]
+        if not stale:
+            return []
+        pipe = client.pipeline(transaction=False)
+        for user_id in stale:
+            pipe.hgetall(sessions_key(user_id))
+        return await self._remove_if_idle(stale, await pipe.execute(), now)
+
+    async def online_among(self, user_ids: Iterable[int], now: float) -> Set[int]:
+        ids = list(dict.fromkeys(user_ids))
+        online: Set[int] = set()
+        for chunk in _chunks(ids):
+            pipe = self.redis_factory().pipeline(transaction=False)
+            for user_id in chunk:
+                pipe.zscore(ONLINE_KEY, user_id)
+            for user_id, score in zip(chunk, await pipe.execute()):
+                if score is not None and float(score) > now:
+                    online.add(user_id)
+        return online
+
+
+class PresenceService:
+    """
+    Tracks local sockets, coalesces presence changes and fans them out to watchers.
+
+    Connects and disconnects only mark a user dirty; every flush interval the node works out
+    the net change per user (a reconnect inside one interval is no change at all), writes it
+    to the store and publishes a single `presence.batch` on PRESENCE_CHANNEL. Each node
+    delivers the batch only to local sockets that watch one of the changed users.
+    """
+
+    def __init__(
+        self,
+        connection_manager: Optional[ConnectionManager] = None,
+        subscription_hub: Optional[SubscriptionHub] = None,
+        store: Optional[PresenceStore] = None,
+        *,
+        node_id: Optional[str] = None,
+        publisher: Publisher = publish,
+        flush_interval: Optional[float] = None,
+        heartbeat_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.manager = connection_manager or default_manager
+        self.hub = subscription_hub or default_hub
+        self.store = store or PresenceStore()
+        self.node_id = node_id or uuid.uuid4().hex
+        self.publisher = publisher
+        self.flush_interval = flush_interval or settings.realtime_presence_flush_seconds
+        self.heartbeat_interval = heartbeat_interval or settings.realtime_presence_heartbeat_seconds
+        self.max_watch = settings.realtime_presence_max_watch
+        self.clock = clock
+        self.local_counts: Dict[int, int] = {}
+        self.announced: Set[int] = set()
+        self.dirty: Set[int] = set()
+        self.pending_events: Dict[Tuple[int, Optional[int]], PresenceEvent] = {}
+        self.watchers: Dict[int, Set[Subscriber]] = {}
+        self.watching: Dict[int, Tuple[Subscriber, Set[int]]] = {}
+        self._last_heartbeat = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._listening = False
+
+    async def start(self) -> None:
+        if not self._listening:
+            self._listening = True
+            await self.hub.listen(PRESENCE_CHANNEL, self.deliver_batch)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def connect(self, user_id: int, websocket: WebSocket) -> None:
+        self.local_counts[user_id] = self.local_counts.get(user_id, 0) + 1
+        self.dirty.add(user_id)
+        await self.start()
+
+    def disconnect(self, user_id: int, websocket: WebSocket) -> None:
+        self.unwatch(websocket)
+        count = self.local_counts.get(user_id, 0) - 1
+        if count > 0:
+            self.local_counts[user_id] = count
+        else:
+            self.local_counts.pop(user_id, None)
+        self.dirty.add(user_id)
+
+    def record(self, event: PresenceEvent) -> None:
+        """Queue a client-sent presence event (e.g. typing); the latest per (user, thread) wins."""
+        self.pending_events[(event.user_id, event.thread_id)] = event
+
+    async def watch(self, user_id: int, websocket: WebSocket, user_ids: Iterable[int]) -> List[PresenceEvent]:
+        """Replace the socket's watch list and return the watched users that are online right now."""
+        self.unwatch(websocket)
+        watched = set(list(dict.fromkeys(user_ids))[: self.max_watch])
+        subscriber = (user_id, websocket)
+        self.watching[id(websocket)] = (subscriber, watched)
+        for watched_id in watched:
+            self.watchers.setdefault(watched_id, set()).add(subscriber)
+        online = await self.online_among(watched)
+        now = datetime.now(timezone.utc)
+        return [PresenceEvent(user_id=uid, thread_id=None, status="online", timestamp=now) for uid in sorted(online)]
+
+    def unwatch(self, websocket: WebSocket) -> None:
+        entry = self.watching.pop(id(websocket), None)
+        if entry is None:
+            return
+        subscriber, watched = entry
+        for watched_id in watched:
+            members = self.watchers.get(watched_id)
+            if members is None:
+                continue
+            members.discard(subscriber)
+            if not members:
+                self.watchers.pop(watched_id, None)
+
+    async def online_among(self, user_ids: Iterable[int]) -> Set[int]:
+        ids = set(user_ids)
+        local = {user_id for user_id in ids if self.local_counts.get(user_id)}
+        try:
+            return local | await self.store.online_among(ids - local, self.clock())
+        except RedisError as exc:
+            logger.warning("Presence lookup failed, answering from local sockets: %s", exc)
+            return local
+
+    async def flush(self) -> List[PresenceEvent]:
+        """
+        Write net changes since the last flush and publish them as one batch.
+
+        `announced` only moves once every store call succeeded, so a failed flush is
+        retried in full. Transitions the store already made before the failure are
+        published anyway: the retry's probe would find those users online already.
+        """
+        now = self.clock()
+        dirty, self.dirty = self.dirty, set()
+        to_online = sorted(uid for uid in dirty if self.local_counts.get(uid) and uid not in self.announced)
+        to_offline = sorted(uid for uid in dirty if not self.local_counts.get(uid) and uid in self.announced)
+        announced = (self.announced | set(to_online)) - set(to_offline)
+        came_online: List[int] = []
+        went_offline: List[int] = []
+        try:
+            if to_online:
+                came_online = await self.store.mark_online(self.node_id, to_online, now)
+            if to_offline:
+                went_offline = await self.store.mark_offline(self.node_id, to_offline, now)
+            if now - self._last_heartbeat >= self.heartbeat_interval:
+                await self.store.heartbeat(self.node_id, sorted(announced), now)
+                self._last_heartbeat = now
+                went_offline.extend(await self.store.sweep(now))
+        except RedisError as exc:
+            logger.warning("Presence flush failed, retrying next interval: %s", exc)
+            self.dirty |= dirty
+            if not came_online and not went_offline:
+                return []
+        else:
+            self.announced = announced
+
+        stamp = datetime.fromtimestamp(now, timezone.utc)
+        changes = [PresenceEvent(user_id=uid, thread_id=None, status="online", timestamp=stamp) for uid in came_online]
+        changes += [PresenceEvent(user_id=uid, thread_id=None, status="offline", timestamp=stamp) for uid in went_offline]
+        changes += list(self.pending_events.values())
+        self.pending_events.clear()
+        if not changes:
+            return []
+        batch = PresenceBatchEvent(changes=changes)
+        try:
+            await self.publisher(PRESENCE_CHANNEL, batch.model_dump())
+        except RedisError:
+            await self.deliver_batch(batch.model_dump_json())
+        return changes
+
+    async def deliver_batch(self, data: str) -> None:
+        """Send each local watcher the subset of a batch that concerns the users it watches."""
+        try:
+            changes = json.loads(data).get("changes") or []
+        except (ValueError, AttributeError):
+            return
+        per_subscriber: Dict[Subscriber, List[dict]] = {}
+        for change in changes:
+            for subscriber in self.watchers.get(change.get("user_id"), ()):
+                per_subscriber.setdefault(subscriber, []).append(change)
+        for (user_id, websocket), subset in per_subscriber.items():
+            message = json.dumps({"type": "presence.batch", "changes": subset})
+            await self.manager.send(user_id, websocket, message)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Presence flush crashed")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+presence = PresenceService()
@@ -25,3 +25,78 @@ async def publish(channel: str, payload: dict) -> None:
         raise
     await redis.publish(channel, encoded)
     logger.debug("realtime: sent event", extra={"channel": channel, "type": payload.get("type")})
+
+
+async def publish_batch(events: list[tuple[str, dict]]) -> int:
+    """PUBLISH every (channel, payload) pair in one pipeline round trip."""
+    redis = get_async_redis()
+    pipe = redis.pipeline(transaction=False)
+    for channel, payload in events:
+        try:
+            encoded = json.dumps(jsonable_encoder(payload))
+        except (TypeError, ValueError) as exc:
+            logger.warning("Realtime publish serialization failed for channel %s: %s", channel, exc)
+            raise
+        pipe.publish(channel, encoded)
+    await pipe.execute()
+    logger.debug("realtime: sent batch", extra={"size": len(events)})
+    return len(events)
+
+
+async def consume_rate_limit(key: str, cost: int, window: int) -> int:
+    """
+    Add `cost` to a fixed-window counter in one round trip and return the new total.
+
+    SET NX EX creates the window with its expiry atomically, so a crash between the
+    increment and the expire can never leave a counter without a TTL.
+    """
+    redis = get_async_redis()
+    pipe = redis.pipeline(transaction=True)
+    pipe.set(key, 0, ex=window, nx=True)
+    pipe.incrby(key, cost)
+    _, current = await pipe.execute()
+    return int(current)
+
+
+def stream_key(channel: str) -> str:
+    """Mirror of apps.core.pubsub.stream_key: where per-user events are retained for replay."""
+    return f"realtime:stream:{channel}"
+
+
+def _decode(value) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+def _parse_stream_id(value: str) -> tuple[int, int]:
+    millis, _, seq = value.partition("-")
+    return int(millis), int(seq or 0)
+
+
+async def read_stream(channel: str, after_id: str, limit: int) -> tuple[list[str], bool]:
+    """
+    Return the events on `channel` after `after_id`, oldest first, rebuilt exactly as they
+    were published (with "event_id"). The flag is True when events may be missing: the
+    stream was trimmed past `after_id`, expired altogether after the client saw an event,
+    or more than `limit` events are pending.
+    """
+    redis = get_async_redis()
+    key = stream_key(channel)
+    pipe = redis.pipeline(transaction=False)
+    pipe.xrange(key, "-", "+", count=1)
+    pipe.xrange(key, f"({after_id}", "+", count=limit)
+    oldest, entries = await pipe.execute()
+    messages = []
+    for entry_id, fields in entries:
+        entry_id = _decode(entry_id)
+        tail = fields.get(b"tail", fields.get("tail"))
+        if tail is None:
+            continue
+        messages.append('{"event_id":"' + entry_id + '"' + _decode(tail))
+    # Entries between the cursor and the oldest retained one may have been trimmed by MAXLEN;
+    # with no stream at all, anything after a non-zero cursor may have expired with it.
+    cursor = _parse_stream_id(after_id)
+    if oldest:
+        trimmed = _parse_stream_id(_decode(oldest[0][0])) > cursor
+    else:
+        trimmed = cursor > (0, 0)
+    return messages, trimmed or len(entries) >= limit
@@ -14,6 +14,11 @@ class PresenceEvent(BaseModel):
     timestamp: datetime | None = None
 
 
+class PresenceBatchEvent(BaseModel):
+    type: Literal["presence.batch"] = "presence.batch"
+    changes: list[PresenceEvent]
+
+
 class MessageEvent(BaseModel):
     type: Literal["message"] = "message"
     thread_id: int
@@ -34,3 +39,7 @@ RealtimeEvent = PresenceEvent | MessageEvent | AckEvent
 class PublishRequest(BaseModel):
     channel: str
     payload: dict
+
+
+class PublishBatchRequest(BaseModel):
+    events: list[PublishRequest]
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from unittest.mock import patch
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from services.realtime.hub import SubscriptionHub
+from services.realtime.manager import ConnectionManager
+from services.realtime.tests.test_manager import FakeWebSocket
+
+
+class FakePubSub:
+    def __init__(self) -> None:
+        self.commands: list[tuple[str, tuple[str, ...]]] = []
+        self.inbox: asyncio.Queue[dict] = asyncio.Queue()
+        self.broken = False
+        self.closed = False
+
+    async def subscribe(self, *channels: str) -> None:
+        self.commands.append(("subscribe", channels))
+
+    async def unsubscribe(self, *channels: str) -> None:
+        self.commands.append(("unsubscribe", channels))
+
+    async def get_message(self, ignore_subscribe_messages: bool = False, timeout: float = 0.0):
+        if self.broken:
+            raise RedisConnectionError("Connection reset by peer")
+        try:
+            return await asyncio.wait_for(self.inbox.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.pubsubs: list[FakePubSub] = []
+
+    def pubsub(self) -> FakePubSub:
+        pubsub = FakePubSub()
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+
+def test_hub_shares_one_subscription_per_channel() -> None:
+    async def scenario() -> None:
+        redis = FakeRedis()
+        manager = ConnectionManager()
+        hub = SubscriptionHub(manager, shards=1, redis_factory=lambda: redis)
+        sockets = [FakeWebSocket() for _ in range(3)]
+        for user_id, ws in enumerate(sockets, start=1):
+            manager.register(user_id, ws)
+            await hub.subscribe(user_id, ws, [f"user:{user_id}", "broadcast"])
+
+        assert len(redis.pubsubs) == 1
+        pubsub = redis.pubsubs[0]
+        subscribed = [channel for command, channels in pubsub.commands if command == "subscribe" for channel in channels]
+        assert sorted(subscribed) == ["broadcast", "user:1", "user:2", "user:3"]
+
+        await pubsub.inbox.put({"type": "message", "channel": b"broadcast", "data": b"hello"})
+        await pubsub.inbox.put({"type": "message", "channel": b"user:2", "data": b"direct"})
+        for _ in range(5):
+            await asyncio.sleep(0)
+        await manager.drain()
+        assert [ws.sent for ws in sockets] == [["hello"], ["hello", "direct"], ["hello"]]
+
+        await hub.unsubscribe(1, sockets[0], ["user:1", "broadcast"])
+        assert pubsub.commands[-1] == ("unsubscribe", ("user:1",))
+        await hub.unsubscribe(2, sockets[1], ["user:2", "broadcast"])
+        await hub.unsubscribe(3, sockets[2], ["user:3", "broadcast"])
+        assert pubsub.commands[-1] == ("unsubscribe", ("user:3", "broadcast"))
+        assert hub.subscribers == {}
+
+        await hub.close()
+        await manager.shutdown()
+
+    asyncio.run(scenario())
+
+
+async def _settle(manager: ConnectionManager) -> None:
+    for _ in range(10):
+        await asyncio.sleep(0)
+    await manager.drain()
+
+
+def test_hub_resubscribes_after_losing_its_connection() -> None:
+    async def scenario() -> None:
+        redis = FakeRedis()
+        manager = ConnectionManager()
+        hub = SubscriptionHub(manager, shards=1, redis_factory=lambda: redis)
+        ws = FakeWebSocket()
+        manager.register(7, ws)
+        heard: list[str] = []
+
+        async def listener(data: str) -> None:
+            heard.append(data)
+
+        await hub.listen("presence", listener)
+        await hub.subscribe(7, ws, ["user:7", "broadcast"])
+        first = redis.pubsubs[0]
+
+        first.broken = True
+        await _settle(manager)
+        # Subscribers hear about the gap; the shard reconnects on a fresh pubsub.
+        assert [json.loads(message)["message"] for message in ws.sent] == ["realtime-error"]
+        assert first.closed
+        assert len(redis.pubsubs) == 2
+        second = redis.pubsubs[1]
+        assert [(command, sorted(channels)) for command, channels in second.commands] == [
+            ("subscribe", ["broadcast", "presence", "user:7"])
+        ]
+
+        await second.inbox.put({"type": "message", "channel": b"presence", "data": b"online"})
+        await second.inbox.put({"type": "message", "channel": b"user:7", "data": b"direct"})
+        await _settle(manager)
+        assert heard == ["online"]
+        assert ws.sent[1:] == ["direct"]
+
+        await hub.close()
+        await manager.shutdown()
+
+    with patch("services.realtime.hub._RECONNECT_DELAYS", (0,)):
+        asyncio.run(scenario())
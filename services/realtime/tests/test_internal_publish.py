@@ -53,3 +53,86 @@ def test_internal_publish_rejects_invalid_event_type() -> None:
             headers={"Authorization": "Bearer secret"},
         )
     assert response.status_code == 400
+
+
+def test_internal_publish_batch_publishes_every_event() -> None:
+    _set_token("secret")
+    events = [{"channel": f"post:{i}", "payload": {"type": "gift.received", "id": i}} for i in range(1, 4)]
+    with patch("services.realtime.app.publish_batch", new=AsyncMock(return_value=3)) as mocked:
+        response = client.post(
+            "/internal/publish/batch",
+            json={"events": events},
+            headers={"Authorization": "Bearer secret"},
+        )
+    assert response.status_code == 200
+    assert response.json()["published"] == 3
+    mocked.assert_awaited_once()
+    assert [channel for channel, _ in mocked.await_args.args[0]] == ["post:1", "post:2", "post:3"]
+
+
+def test_internal_publish_batch_rejects_whole_batch_on_invalid_event() -> None:
+    _set_token("secret")
+    events = [
+        {"channel": "post:1", "payload": {"type": "gift.received"}},
+        {"channel": "user:1", "payload": {"type": "gift.received"}},
+    ]
+    with patch("services.realtime.app.publish_batch", new=AsyncMock()) as mocked:
+        response = client.post(
+            "/internal/publish/batch",
+            json={"events": events},
+            headers={"Authorization": "Bearer secret"},
+        )
+    assert response.status_code == 400
+    mocked.assert_not_awaited()
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, int] = {}
+        self.pipelines: list[list] = []
+
+    def pipeline(self, transaction: bool = True) -> "_FakeRedis":
+        self.pipelines.append([])
+        return self
+
+    def __getattr__(self, name: str):
+        def _queue(*args, **kwargs):
+            self.pipelines[-1].append((name, args, kwargs))
+            return self
+
+        return _queue
+
+    async def execute(self) -> list:
+        results = []
+        for name, args, kwargs in self.pipelines[-1]:
+            if name == "set":
+                created = args[0] not in self.values
+                self.values.setdefault(args[0], args[1])
+                results.append(created or None)
+            elif name == "incrby":
+                self.values[args[0]] = self.values.get(args[0], 0) + args[1]
+                results.append(self.values[args[0]])
+            else:
+                results.append(1)
+        return results
+
+
+def test_internal_publish_batch_rate_limits_by_event_count_in_one_pipeline() -> None:
+    _set_token("secret")
+    settings.realtime_publish_rate_limit = "5/m"
+    redis = _FakeRedis()
+    events = [{"channel": f"post:{i}", "payload": {"type": "gift.received"}} for i in range(1, 4)]
+    try:
+        with patch("services.realtime.redis_client.get_async_redis", return_value=redis):
+            first = client.post("/internal/publish/batch", json={"events": events}, headers={"Authorization": "Bearer secret"})
+            second = client.post("/internal/publish/batch", json={"events": events}, headers={"Authorization": "Bearer secret"})
+    finally:
+        settings.realtime_publish_rate_limit = None
+    assert first.status_code == 200
+    assert second.status_code == 429
+    # Rate limit and publish: one round trip each for the first batch, no publish for the second.
+    assert [[name for name, _, _ in pipe] for pipe in redis.pipelines] == [
+        ["set", "incrby"],
+        ["publish", "publish", "publish"],
+        ["set", "incrby"],
+    ]
@@ -40,3 +40,63 @@ def test_safe_send_rejects_disconnected() -> None:
 
     assert result is False
     assert ws.sent == []
+
+
+class SlowWebSocket(FakeWebSocket):
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = asyncio.Event()
+        self.closed_with: int | None = None
+
+    async def send_text(self, message: str) -> None:
+        await self.release.wait()
+        self.sent.append(message)
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed_with = code
+        self.application_state = WebSocketState.DISCONNECTED
+
+
+def test_broadcast_does_not_wait_for_slow_consumer() -> None:
+    async def scenario() -> None:
+        manager = ConnectionManager(queue_size=2, slow_consumer_policy="drop", send_timeout=60)
+        fast = FakeWebSocket()
+        slow = SlowWebSocket()
+        manager.register(1, fast)
+        manager.register(2, slow)
+
+        for i in range(5):
+            await manager.broadcast(f"m{i}")
+            await asyncio.sleep(0)
+        assert fast.sent == [f"m{i}" for i in range(5)]
+
+        slow.release.set()
+        await manager.drain()
+        # m0 was already in flight; the bounded queue kept only the newest two.
+        assert slow.sent == ["m0", "m3", "m4"]
+        assert manager.stats["dropped"] == 2
+        await manager.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_policy_closes_slow_consumer() -> None:
+    async def scenario() -> None:
+        manager = ConnectionManager(queue_size=1, slow_consumer_policy="disconnect", send_timeout=60)
+        fast = FakeWebSocket()
+        slow = SlowWebSocket()
+        manager.register(1, fast)
+        manager.register(2, slow)
+
+        for i in range(3):
+            await manager.broadcast(f"m{i}")
+            await asyncio.sleep(0)
+
+        assert 2 not in manager.connections
+        assert slow.closed_with == 1013
+        assert manager.stats["slow_disconnects"] == 1
+        await manager.drain()
+        assert fast.sent == ["m0", "m1", "m2"]
+        await manager.shutdown()
+
+    asyncio.run(scenario())
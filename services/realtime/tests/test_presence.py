@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from redis.exceptions import RedisError
+
+from services.realtime.hub import SubscriptionHub
+from services.realtime.manager import ConnectionManager
+from services.realtime.presence import PresenceService, PresenceStore
+from services.realtime.tests.test_manager import FakeWebSocket
+
+
+class FakeAsyncRedis:
+    """The ZSET/HASH subset of redis.asyncio used by PresenceStore."""
+
+    def __init__(self) -> None:
+        self.zset: dict[str, float] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+    def zscore(self, key: str, member) -> float | None:
+        return self.zset.get(str(member))
+
+    def zadd(self, key: str, mapping: dict, gt: bool = False) -> int:
+        added = 0
+        for member, score in mapping.items():
+            current = self.zset.get(member)
+            added += current is None
+            if current is None or not gt or score > current:
+                self.zset[member] = score
+        return added
+
+    def zrem(self, key: str, member) -> int:
+        return int(self.zset.pop(str(member), None) is not None)
+
+    async def zrangebyscore(self, key: str, low, high, start=0, num=None) -> list[bytes]:
+        members = sorted((score, member) for member, score in self.zset.items() if score <= float(high))
+        return [member.encode() for _, member in members][start : start + num if num else None]
+
+    def hset(self, key: str, field: str, value) -> int:
+        self.hashes.setdefault(key, {})[field] = str(value)
+        return 1
+
+    def hdel(self, key: str, field: str) -> int:
+        return int(self.hashes.get(key, {}).pop(field, None) is not None)
+
+    def hgetall(self, key: str) -> dict:
+        return {k.encode(): v.encode() for k, v in self.hashes.get(key, {}).items()}
+
+    def expire(self, key: str, seconds: int) -> bool:
+        return key in self.hashes
+
+
+class FakePipeline:
+    def __init__(self, client: FakeAsyncRedis) -> None:
+        self.client = client
+        self.calls: list = []
+
+    def __getattr__(self, name: str):
+        def _queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+
+        return _queue
+
+    async def execute(self) -> list:
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class Cluster:
+    """Two gateway nodes sharing one Redis; published batches reach every node."""
+
+    def __init__(self) -> None:
+        self.redis = FakeAsyncRedis()
+        self.now = 1_000.0
+        self.nodes: list[PresenceService] = []
+        self.published: list[dict] = []
+
+    def node(self, name: str) -> tuple[PresenceService, ConnectionManager]:
+        manager = ConnectionManager()
+        service = PresenceService(
+            manager,
+            SubscriptionHub(manager, redis_factory=lambda: None),
+            PresenceStore(redis_factory=lambda: self.redis, ttl=60),
+            node_id=name,
+            publisher=self.publish,
+            heartbeat_interval=30,
+            clock=lambda: self.now,
+        )
+        self.nodes.append(service)
+        return service, manager
+
+    async def publish(self, channel: str, payload: dict) -> None:
+        self.published.append(payload)
+        data = json.dumps(payload, default=str)
+        for node in self.nodes:
+            await node.deliver_batch(data)
+
+
+def _join(node: PresenceService, user_id: int) -> None:
+    """What PresenceService.connect records, without starting the flush loop."""
+    node.local_counts[user_id] = node.local_counts.get(user_id, 0) + 1
+    node.dirty.add(user_id)
+
+
+def _statuses(ws: FakeWebSocket) -> list[tuple[int, str]]:
+    return [
+        (change["user_id"], change["status"])
+        for message in ws.sent
+        for change in json.loads(message)["changes"]
+    ]
+
+
+def test_presence_batches_are_coalesced_and_sent_only_to_watchers() -> None:
+    async def scenario() -> None:
+        cluster = Cluster()
+        node_a, _ = cluster.node("a")
+        node_b, manager_b = cluster.node("b")
+        watcher, bystander = FakeWebSocket(), FakeWebSocket()
+        manager_b.register(10, watcher)
+        manager_b.register(11, bystander)
+
+        assert await node_b.watch(10, watcher, [1, 2]) == []
+
+        _join(node_a, 1)
+        _join(node_a, 3)
+        # User 2 connects and drops inside one interval: nothing to announce.
+        _join(node_a, 2)
+        node_a.disconnect(2, FakeWebSocket())
+        await node_a.flush()
+        await manager_b.drain()
+
+        assert len(cluster.published) == 1
+        assert _statuses(watcher) == [(1, "online")]
+        assert bystander.sent == []
+        assert await node_b.online_among([1, 2, 3]) == {1, 3}
+
+        # Same user on both nodes: leaving one node is not an offline transition.
+        _join(node_b, 1)
+        await node_b.flush()
+        node_a.disconnect(1, FakeWebSocket())
+        await node_a.flush()
+        node_b.disconnect(1, FakeWebSocket())
+        await node_b.flush()
+        await manager_b.drain()
+        assert _statuses(watcher) == [(1, "online"), (1, "offline")]
+
+        await manager_b.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_sweep_reports_users_of_a_dead_node_once() -> None:
+    async def scenario() -> None:
+        cluster = Cluster()
+        node_a, _ = cluster.node("a")
+        node_b, _ = cluster.node("b")
+        _join(node_a, 7)
+        await node_a.flush()
+        assert await node_b.online_among([7]) == {7}
+
+        # Node A dies; its heartbeats stop and the entry expires.
+        cluster.nodes.remove(node_a)
+        cluster.now += 120
+        changes = await node_b.flush()
+        assert [(c.user_id, c.status) for c in changes] == [(7, "offline")]
+        assert await node_b.flush() == []
+        assert await node_b.online_among([7]) == set()
+
+    asyncio.run(scenario())
+
+
+def test_partial_flush_failure_still_announces_each_transition_once() -> None:
+    async def scenario() -> None:
+        cluster = Cluster()
+        node, _ = cluster.node("a")
+        _join(node, 1)
+        await node.flush()
+
+        _join(node, 2)
+        node.disconnect(1, FakeWebSocket())
+        mark_offline = node.store.mark_offline
+
+        async def failing_mark_offline(*args, **kwargs):
+            raise RedisError("connection reset")
+
+        node.store.mark_offline = failing_mark_offline
+        changes = await node.flush()
+        # User 2 is online in the store already; a retry's probe would no longer report it.
+        assert [(c.user_id, c.status) for c in changes] == [(2, "online")]
+        assert node.announced == {1}
+
+        node.store.mark_offline = mark_offline
+        changes = await node.flush()
+        assert [(c.user_id, c.status) for c in changes] == [(1, "offline")]
+        assert node.announced == {2}
+        assert await node.flush() == []
+
+    asyncio.run(scenario())
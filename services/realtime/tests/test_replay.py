@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from unittest.mock import patch
+
+from services.realtime import app as realtime_app
+from services.realtime.manager import ConnectionManager
+from services.realtime.redis_client import read_stream
+from services.realtime.tests.test_manager import FakeWebSocket
+
+
+class FakeStreamRedis:
+    def __init__(self, entries: list[tuple[str, str]]) -> None:
+        self.entries = entries
+
+    def pipeline(self, transaction: bool = True) -> "FakeStreamRedis":
+        self.calls: list = []
+        return self
+
+    def xrange(self, key: str, start: str, end: str, count: int | None = None) -> "FakeStreamRedis":
+        self.calls.append((start, count))
+        return self
+
+    @staticmethod
+    def _key(entry_id: str) -> tuple[int, int]:
+        millis, seq = entry_id.split("-")
+        return int(millis), int(seq)
+
+    async def execute(self) -> list:
+        results = []
+        for start, count in self.calls:
+            rows = self.entries
+            if start.startswith("("):
+                rows = [row for row in rows if self._key(row[0]) > self._key(start[1:])]
+            results.append([(entry_id.encode(), {b"tail": tail.encode()}) for entry_id, tail in rows[:count]])
+        return results
+
+
+def _event(n: int) -> tuple[str, str]:
+    return (f"{1000 + n}-0", "," + json.dumps({"type": "message:new", "n": n})[1:])
+
+
+def test_read_stream_rebuilds_published_events_after_cursor() -> None:
+    redis = FakeStreamRedis([_event(n) for n in range(1, 5)])
+    with patch("services.realtime.redis_client.get_async_redis", return_value=redis):
+        messages, truncated = asyncio.run(read_stream("user:1", "1002-0", limit=10))
+        assert [json.loads(m) for m in messages] == [
+            {"event_id": "1003-0", "type": "message:new", "n": 3},
+            {"event_id": "1004-0", "type": "message:new", "n": 4},
+        ]
+        assert truncated is False
+
+        # The cursor predates the oldest retained entry: MAXLEN may have trimmed events.
+        _, truncated = asyncio.run(read_stream("user:1", "999-0", limit=10))
+        assert truncated is True
+        _, truncated = asyncio.run(read_stream("user:1", "1001-0", limit=2))
+        assert truncated is True
+
+
+def test_read_stream_treats_missing_stream_as_truncated() -> None:
+    with patch("services.realtime.redis_client.get_async_redis", return_value=FakeStreamRedis([])):
+        # The stream expired (or was never kept) after the client saw an event.
+        messages, truncated = asyncio.run(read_stream("user:1", "1002-0", limit=10))
+        assert messages == []
+        assert truncated is True
+        _, truncated = asyncio.run(read_stream("user:1", "0-0", limit=10))
+        assert truncated is False
+
+
+def test_reconnect_replays_missed_events_then_acks() -> None:
+    async def scenario() -> list[str]:
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        manager.register(1, ws)
+        redis = FakeStreamRedis([_event(n) for n in range(1, 4)])
+        with patch.object(realtime_app, "manager", manager), patch(
+            "services.realtime.redis_client.get_async_redis", return_value=redis
+        ):
+            await realtime_app._replay_missed_events(1, ws, "1001-0")
+            await realtime_app._replay_missed_events(1, ws, "not-an-id")
+        await manager.drain()
+        await manager.shutdown()
+        return ws.sent
+
+    sent = [json.loads(message) for message in asyncio.run(scenario())]
+    assert [m.get("event_id") for m in sent[:2]] == ["1002-0", "1003-0"]
+    assert [m.get("message") for m in sent[2:]] == ["replay-complete", "replay-invalid"]
+
+
+def test_live_events_wait_for_the_replay() -> None:
+    async def scenario() -> list[str]:
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        manager.register(1, ws)
+
+        class LiveDuringReplay(FakeStreamRedis):
+            async def execute(self) -> list:
+                # Published while the replay is still reading the stream.
+                await manager.deliver([(1, ws)], json.dumps({"event_id": "1004-0", "type": "message:new"}))
+                return await super().execute()
+
+        redis = LiveDuringReplay([_event(n) for n in range(1, 4)])
+        manager.hold(ws)
+        with patch.object(realtime_app, "manager", manager), patch(
+            "services.realtime.redis_client.get_async_redis", return_value=redis
+        ):
+            await realtime_app._replay_missed_events(1, ws, "1001-0")
+        await manager.release(1, ws)
+        await manager.deliver([(1, ws)], json.dumps({"event_id": "1005-0", "type": "message:new"}))
+        await manager.drain()
+        await manager.shutdown()
+        return ws.sent
+
+    sent = [json.loads(message) for message in asyncio.run(scenario())]
+    assert [m.get("event_id") or m.get("message") for m in sent] == [
+        "1002-0",
+        "1003-0",
+        "replay-complete",
+        "1004-0",
+        "1005-0",
+    ]
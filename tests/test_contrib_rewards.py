@@ -4,11 +4,13 @@ from datetime import datetime, timezone as dt_timezone
 
 import pytest
 from django.core.exceptions import ValidationError
+from django.test import override_settings
 from django.utils import timezone
 
 from apps.contrib_rewards.models import ContributorProfile, MonthlyRewardSnapshot, RewardEvent, RewardEventType
-from apps.contrib_rewards.services import calculate_monthly_rewards
+from apps.contrib_rewards.services import calculate_monthly_rewards, event_inclusion_proof
 from apps.users.models import User
+from libs.merkle import encode_row, verify_inclusion
 
 
 @pytest.mark.django_db
@@ -92,3 +94,53 @@ def test_monthly_snapshot_is_immutable():
         snapshot.save()
     with pytest.raises(ValidationError):
         snapshot.delete()
+
+
+@pytest.mark.django_db
+def test_rewards_snapshot_event_inclusion_proof():
+    user = User.objects.create_user(email="mk@example.com", password="pass1234", handle="mk", name="Merkle")
+    contributor = ContributorProfile.objects.create(user=user, github_username="mk")
+    events = [
+        RewardEvent.objects.create(
+            contributor=contributor,
+            event_type=RewardEventType.PR_MERGED,
+            points=points,
+            occurred_at=datetime(2025, 3, day, 12, tzinfo=dt_timezone.utc),
+        )
+        for day, points in ((3, 5), (3, 2), (9, 4), (20, 1))
+    ]
+
+    result = calculate_monthly_rewards(period="2025-03", revenue_cents=0, costs_cents=0, dry_run=False)
+    assert sorted(result.snapshot.merkle_day_roots) == ["2025-03-03", "2025-03-09", "2025-03-20"]
+    pooled = calculate_monthly_rewards(period="2025-03", revenue_cents=0, costs_cents=0, dry_run=True, workers=2)
+    assert pooled.merkle_root == result.merkle_root
+
+    document = event_inclusion_proof(result.snapshot, events[1].id)
+    assert verify_inclusion(encode_row(document["row"]), document["proof"], result.merkle_root)
+    tampered = {**document["row"], "points": 50}
+    assert not verify_inclusion(encode_row(tampered), document["proof"], result.merkle_root)
+
+
+@pytest.mark.django_db
+@override_settings(TIME_ZONE="Asia/Tbilisi")
+def test_rewards_inclusion_proof_with_non_utc_month_bounds():
+    user = User.objects.create_user(email="tz@example.com", password="pass1234", handle="tzmk", name="Tbilisi")
+    contributor = ContributorProfile.objects.create(user=user, github_username="tzmk")
+    # Both fall on UTC day 2026-09-30; in UTC+4 the first is September, the second October.
+    september, october = [
+        RewardEvent.objects.create(
+            contributor=contributor,
+            event_type=RewardEventType.PR_MERGED,
+            points=points,
+            occurred_at=datetime(2026, 9, 30, hour, tzinfo=dt_timezone.utc),
+        )
+        for hour, points in ((19, 3), (21, 7))
+    ]
+
+    for period, event in (("2026-09", september), ("2026-10", october)):
+        result = calculate_monthly_rewards(period=period, revenue_cents=0, costs_cents=0, dry_run=False)
+        assert "2026-09-30" in result.snapshot.merkle_day_roots
+        document = event_inclusion_proof(result.snapshot, event.id)
+        assert verify_inclusion(encode_row(document["row"]), document["proof"], result.merkle_root)
+    with pytest.raises(ValidationError):
+        event_inclusion_proof(result.snapshot, september.id)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.feed import composer
+from apps.feed.cache import RankedPoolCache
+from apps.feed.composer import compose_for_you_feed
+from apps.feed.cursors import RankCursor, decode_rank_cursor, encode_rank_cursor
+from apps.social.models import Follow, Post
+from apps.users.models import User
+
+
+def _user(handle: str) -> User:
+    return User.objects.create_user(email=f"{handle}@example.com", password="pass1234", handle=handle, name=handle)
+
+
+def _context(user: User) -> dict:
+    request = APIRequestFactory().get("/api/v1/feed/for_you/")
+    request.user = user
+    return {"request": request}
+
+
+def _post_ids(items: list[dict]) -> list[int]:
+    return [item["id"] for item in items if item.get("type") == "post"]
+
+
+def test_rank_cursor_round_trips():
+    now = timezone.now()
+    cursor = RankCursor(score=0.123456789012345, created_at=now - timedelta(hours=1), id=42, as_of=now)
+    assert decode_rank_cursor(encode_rank_cursor(cursor)) == cursor
+    with pytest.raises(ValueError):
+        decode_rank_cursor("bm90LWpzb24")
+
+
+@pytest.mark.django_db
+def test_for_you_keyset_pages_cover_pool_once_despite_new_posts():
+    viewer = _user("fy_viewer")
+    author = _user("fy_author")
+    Follow.objects.create(follower=viewer, followee=author)
+    posts = []
+    for i in range(7):
+        post = Post.objects.create(author=author, text=f"p{i}", like_count=i % 3, comment_count=i % 2)
+        Post.objects.filter(id=post.id).update(created_at=timezone.now() - timedelta(hours=i))
+        posts.append(post.id)
+
+    seen: list[int] = []
+    items, cursor = compose_for_you_feed(viewer, limit=3, serializer_context=_context(viewer))
+    seen.extend(_post_ids(items))
+    Post.objects.create(author=author, text="fresh post between pages", like_count=50)
+    while cursor:
+        items, cursor = compose_for_you_feed(viewer, cursor=cursor, limit=3, serializer_context=_context(viewer))
+        seen.extend(_post_ids(items))
+
+    assert sorted(seen) == sorted(posts)
+    assert len(seen) == len(set(seen))
+
+
+@pytest.mark.django_db
+def test_for_you_rejects_offset_cursor():
+    client = APIClient()
+    client.force_authenticate(_user("fy_badcursor"))
+    response = client.get("/api/v1/feed/for_you/?cursor=20")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_for_you_does_not_report_internal_value_errors_as_bad_cursor():
+    client = APIClient()
+    client.force_authenticate(_user("fy_internal"))
+    with mock.patch("apps.feed.views.compose_for_you_feed", side_effect=ValueError("scoring bug")):
+        with pytest.raises(ValueError, match="scoring bug"):
+            client.get("/api/v1/feed/for_you/")
+
+
+@pytest.mark.django_db
+def test_for_you_pool_is_scored_once_and_refreshed_incrementally():
+    viewer = _user("fy_pool")
+    author = _user("fy_pool_author")
+    for i in range(6):
+        post = Post.objects.create(author=author, text=f"p{i}")
+        Post.objects.filter(id=post.id).update(created_at=timezone.now() - timedelta(minutes=i + 1))
+
+    def _scored(scorer) -> int:
+        return sum(len(call.args[1]) for call in scorer.call_args_list)
+
+    with mock.patch.object(composer, "static_scores_batch", wraps=composer.static_scores_batch) as scorer:
+        first, cursor = compose_for_you_feed(viewer, limit=2, serializer_context=_context(viewer))
+        assert _scored(scorer) == 6
+        assert RankedPoolCache.get(viewer.id, "for_you") is not None
+
+        second, _ = compose_for_you_feed(viewer, cursor=cursor, limit=2, serializer_context=_context(viewer))
+        assert _scored(scorer) == 6
+        assert not set(_post_ids(first)) & set(_post_ids(second))
+
+        fresh = Post.objects.create(author=author, text="new arrival")
+        refreshed, _ = compose_for_you_feed(viewer, limit=2, serializer_context=_context(viewer))
+        assert _scored(scorer) == 7
+        assert _post_ids(refreshed)[0] == fresh.id
+
+
+@pytest.mark.django_db
+def test_for_you_scroll_survives_pool_trimmed_by_newer_first_page():
+    viewer = _user("fy_trim")
+    author = _user("fy_trim_author")
+    older = []
+    for i in range(14):
+        post = Post.objects.create(author=author, text=f"old{i}")
+        Post.objects.filter(id=post.id).update(created_at=timezone.now() - timedelta(hours=i + 1))
+        older.append(post.id)
+
+    # limit=2 pools the 12 newest candidates.
+    items, cursor = compose_for_you_feed(viewer, limit=2, serializer_context=_context(viewer))
+    seen = _post_ids(items)
+    for i in range(12):
+        Post.objects.create(author=author, text=f"new{i}")
+    # A newer first page refreshes the shared pool and trims every older post out of it.
+    compose_for_you_feed(viewer, limit=2, serializer_context=_context(viewer))
+    while cursor:
+        items, cursor = compose_for_you_feed(viewer, cursor=cursor, limit=2, serializer_context=_context(viewer))
+        seen.extend(_post_ids(items))
+
+    assert sorted(seen) == sorted(older[:12])
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import random
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.utils import timezone
+
+from apps.feed.rank import (
+    FEED_RANKING_CONFIG_FOR_YOU,
+    FEED_RANKING_CONFIG_FOR_YOU_VIDEOS,
+    score_post_for_user,
+    score_posts_batch,
+)
+
+
+def _posts(count: int, now):
+    rng = random.Random(1234)
+    posts = []
+    for index in range(count):
+        posts.append(
+            SimpleNamespace(
+                id=index + 1,
+                author_id=rng.randint(1, 40),
+                created_at=None if index % 97 == 0 else now - timedelta(microseconds=rng.randint(-10**6, 10**12)),
+                like_count=rng.choice([0, 1, 2, 5, 17, 80, 1000, None]),
+                comment_count=rng.choice([0, 1, 3, 9, 49, 500]),
+                video=object() if index % 3 == 0 else None,
+            )
+        )
+    return posts
+
+
+def test_score_posts_batch_matches_scalar_path_exactly():
+    now = timezone.now()
+    user = SimpleNamespace(id=999)
+    posts = _posts(1500, now)
+    followee_ids = set(range(1, 40, 3))
+
+    for config in (FEED_RANKING_CONFIG_FOR_YOU, FEED_RANKING_CONFIG_FOR_YOU_VIDEOS):
+        batch = score_posts_batch(user, posts, config, followee_ids=followee_ids, now=now).tolist()
+        scalar = [score_post_for_user(user, post, config, followee_ids=followee_ids, now=now) for post in posts]
+        assert batch == scalar
+
+
+def test_score_posts_batch_handles_empty_input():
+    assert score_posts_batch(SimpleNamespace(id=1), [], FEED_RANKING_CONFIG_FOR_YOU, now=timezone.now()).size == 0
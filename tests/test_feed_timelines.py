@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.feed import timelines
+from apps.feed.composer import compose_following_feed
+from apps.feed.services import fan_out_post
+from apps.social.models import Follow, Post, PostVisibility
+from apps.users.models import User
+
+
+class _InMemoryRedis:
+    """Just enough of the redis-py ZSET/SET API for the timeline store."""
+
+    def __init__(self) -> None:
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.sets: dict[str, set[str]] = {}
+
+    def pipeline(self, transaction: bool = True):
+        return _Pipeline(self)
+
+    def register_script(self, source: str):
+        assert "ZREMRANGEBYRANK" in source
+        return _PushScript(self)
+
+    def push_if_live(self, keys: list, args: list) -> int:
+        key, (member, score, max_entries, _ttl) = keys[0], args
+        if not self.exists(key):
+            return 0
+        self.zadd(key, {member: score})
+        self.zremrangebyrank(key, 1, -(int(max_entries) + 1))
+        return 1
+
+    def exists(self, key: str) -> int:
+        return int(key in self.zsets or key in self.sets)
+
+    def delete(self, *keys: str) -> int:
+        return sum(int(self.zsets.pop(key, None) is not None or self.sets.pop(key, None) is not None) for key in keys)
+
+    def zcard(self, key: str) -> int:
+        return len(self.zsets.get(key, {}))
+
+    def zrange(self, key: str, start: int, end: int, withscores: bool = False):
+        rows = [(member.encode(), score) for member, score in self._ascending(key)[start : end + 1]]
+        return rows if withscores else [member for member, _ in rows]
+
+    def expire(self, key: str, seconds: int) -> bool:
+        return key in self.zsets
+
+    def zadd(self, key: str, mapping: dict) -> int:
+        self.zsets.setdefault(key, {}).update({str(m): float(s) for m, s in mapping.items()})
+        return len(mapping)
+
+    def _ascending(self, key: str) -> list[tuple[str, float]]:
+        return sorted(self.zsets.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+
+    def zremrangebyrank(self, key: str, start: int, end: int) -> int:
+        ordered = self._ascending(key)
+        end = len(ordered) + end if end < 0 else end
+        doomed = ordered[start : end + 1]
+        for member, _ in doomed:
+            del self.zsets[key][member]
+        return len(doomed)
+
+    def zrevrangebyscore(self, key, max, min, start=None, num=None, withscores=False):
+        def _bound(value):
+            text = str(value)
+            if text in ("+inf", "-inf"):
+                return (float(text), False)
+            if text.startswith("("):
+                return (float(text[1:]), True)
+            return (float(text), False)
+
+        high, high_excl = _bound(max)
+        low, low_excl = _bound(min)
+        rows = [
+            (member.encode(), score)
+            for member, score in reversed(self._ascending(key))
+            if (score < high or (not high_excl and score == high)) and (score > low or (not low_excl and score == low))
+        ]
+        if num is not None:
+            rows = rows[start : start + num]
+        return rows if withscores else [member for member, _ in rows]
+
+    def sadd(self, key: str, member) -> int:
+        self.sets.setdefault(key, set()).add(str(member))
+        return 1
+
+    def srem(self, key: str, member) -> int:
+        members = self.sets.get(key, set())
+        removed = str(member) in members
+        members.discard(str(member))
+        return int(removed)
+
+    def smembers(self, key: str) -> set[bytes]:
+        return {member.encode() for member in self.sets.get(key, set())}
+
+
+class _PushScript:
+    def __init__(self, client: _InMemoryRedis) -> None:
+        self.client = client
+
+    def __call__(self, keys=(), args=(), client=None):
+        if client is None:
+            return self.client.push_if_live(list(keys), list(args))
+        return client.push_if_live(list(keys), list(args))
+
+
+class _Pipeline:
+    def __init__(self, client: _InMemoryRedis) -> None:
+        self.client = client
+        self.calls: list = []
+
+    def __getattr__(self, name):
+        def _queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+
+        return _queue
+
+    def execute(self) -> list:
+        results = [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+        self.calls = []
+        return results
+
+
+def _user(handle: str) -> User:
+    return User.objects.create_user(email=f"{handle}@example.com", password="pass1234", handle=handle, name=handle)
+
+
+def _context(user: User) -> dict:
+    request = APIRequestFactory().get("/api/v1/feed/following/")
+    request.user = user
+    return {"request": request}
+
+
+def _post_ids(items: list[dict]) -> list[int]:
+    return [item["id"] for item in items if item.get("type") == "post"]
+
+
+def _backdate(post: Post, minutes: int) -> Post:
+    Post.objects.filter(id=post.id).update(created_at=timezone.now() - timedelta(minutes=minutes))
+    post.refresh_from_db()
+    return post
+
+
+@pytest.mark.django_db
+def test_following_feed_keyset_pages_are_stable_under_new_posts():
+    viewer = _user("tl_viewer")
+    author = _user("tl_author")
+    stranger = _user("tl_stranger")
+    Follow.objects.create(follower=viewer, followee=author)
+    posts = [_backdate(Post.objects.create(author=author, text=f"p{i}"), minutes=10 - i) for i in range(5)]
+    Post.objects.create(author=author, text="hidden", visibility=PostVisibility.PRIVATE)
+    Post.objects.create(author=stranger, text="not followed")
+
+    first, cursor = compose_following_feed(viewer, limit=2, serializer_context=_context(viewer))
+    assert _post_ids(first) == [posts[4].id, posts[3].id]
+    assert cursor and not cursor.isdigit()
+
+    Post.objects.create(author=author, text="arrives between pages")
+    second, cursor = compose_following_feed(viewer, cursor=cursor, limit=2, serializer_context=_context(viewer))
+    assert _post_ids(second) == [posts[2].id, posts[1].id]
+    third, cursor = compose_following_feed(viewer, cursor=cursor, limit=2, serializer_context=_context(viewer))
+    assert _post_ids(third) == [posts[0].id]
+    assert cursor is None
+
+
+@pytest.mark.django_db
+def test_following_feed_rejects_malformed_cursor():
+    viewer = _user("tl_badcursor")
+    client = APIClient()
+    client.force_authenticate(viewer)
+    response = client.get("/api/v1/feed/following/?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+@override_settings(FEED_TIMELINES_ENABLED=True, FEED_FANOUT_FOLLOWER_THRESHOLD=3, FEED_TIMELINE_MAX_ENTRIES=3)
+def test_hybrid_fan_out_pushes_to_live_timelines_and_pulls_big_authors():
+    redis = _InMemoryRedis()
+    viewer = _user("tl_live")
+    idle = _user("tl_idle")
+    small = _user("tl_small")
+    big = _user("tl_big")
+    for follower in (viewer, idle):
+        Follow.objects.create(follower=follower, followee=small)
+        Follow.objects.create(follower=follower, followee=big)
+    Follow.objects.create(follower=small, followee=big)
+
+    with mock.patch("apps.feed.timelines.get_redis_client", return_value=redis):
+        old = _backdate(Post.objects.create(author=small, text="before materialize"), minutes=30)
+        # First read materializes the viewer's timeline from the database.
+        assert timelines.read_following_entries(viewer.id, limit=10) == [
+            (timelines.datetime_to_score(old.created_at), old.id)
+        ]
+
+        small_posts = [_backdate(Post.objects.create(author=small, text=f"s{i}"), minutes=20 - i) for i in range(3)]
+        for post in small_posts:
+            assert fan_out_post(post)["pull"] is False
+        big_post = _backdate(Post.objects.create(author=big, text="celebrity"), minutes=5)
+        result = fan_out_post(big_post)
+
+        assert result["pull"] is True
+        assert timelines.timeline_key(idle.id) not in redis.zsets
+        pushed = redis.zsets[timelines.timeline_key(viewer.id)]
+        # Capped at FEED_TIMELINE_MAX_ENTRIES posts plus the sentinel, big author never pushed.
+        assert set(pushed) == {"0", *(str(p.id) for p in small_posts)}
+
+        entries = timelines.read_following_entries(viewer.id, limit=3)
+        assert [post_id for _, post_id in entries] == [big_post.id, small_posts[2].id, small_posts[1].id]
+        items, cursor = compose_following_feed(viewer, limit=2, serializer_context=_context(viewer))
+        assert _post_ids(items) == [big_post.id, small_posts[2].id]
+        items, _ = compose_following_feed(viewer, cursor=cursor, limit=2, serializer_context=_context(viewer))
+        assert _post_ids(items) == [small_posts[1].id, small_posts[0].id]
+
+
+@pytest.mark.django_db
+@override_settings(FEED_FANOUT_FOLLOWER_THRESHOLD=1)
+def test_pull_author_posts_still_reach_home_feed():
+    viewer = _user("tl_home_viewer")
+    big = _user("tl_home_big")
+    Follow.objects.create(follower=viewer, followee=big)
+    post = Post.objects.create(author=big, text="popular post")
+
+    assert fan_out_post(post)["pull"] is True
+
+    client = APIClient()
+    client.force_authenticate(viewer)
+    response = client.get("/api/v1/feed/home/")
+    assert response.status_code == 200
+    post_ids = [str(item["post"]["id"]) for item in response.data["items"] if item.get("type") == "post"]
+    assert str(post.id) in post_ids
+
+
+@pytest.mark.django_db
+@override_settings(FEED_TIMELINES_ENABLED=True, FEED_TIMELINE_MAX_ENTRIES=3)
+def test_following_feed_scrolls_past_the_timeline_cap():
+    redis = _InMemoryRedis()
+    viewer = _user("tl_cap_viewer")
+    author = _user("tl_cap_author")
+    Follow.objects.create(follower=viewer, followee=author)
+    posts = [_backdate(Post.objects.create(author=author, text=f"c{i}"), minutes=60 - i) for i in range(8)]
+
+    seen: list[int] = []
+    with mock.patch("apps.feed.timelines.get_redis_client", return_value=redis):
+        items, cursor = compose_following_feed(viewer, limit=2, serializer_context=_context(viewer))
+        seen.extend(_post_ids(items))
+        while cursor:
+            items, cursor = compose_following_feed(viewer, cursor=cursor, limit=2, serializer_context=_context(viewer))
+            seen.extend(_post_ids(items))
+        # Only the newest FEED_TIMELINE_MAX_ENTRIES posts (plus the sentinel) live in Redis.
+        assert len(redis.zsets[timelines.timeline_key(viewer.id)]) == 4
+
+    assert seen == [post.id for post in reversed(posts)]
+
+
+@pytest.mark.django_db
+@override_settings(FEED_TIMELINES_ENABLED=True, FEED_FANOUT_FOLLOWER_THRESHOLD=2)
+def test_pull_to_push_flip_drops_timelines_built_without_the_author():
+    redis = _InMemoryRedis()
+    viewer = _user("tl_flip_viewer")
+    other = _user("tl_flip_other")
+    author = _user("tl_flip_author")
+    for follower in (viewer, other):
+        Follow.objects.create(follower=follower, followee=author)
+
+    with mock.patch("apps.feed.timelines.get_redis_client", return_value=redis):
+        early = _backdate(Post.objects.create(author=author, text="while pulled"), minutes=10)
+        assert fan_out_post(early)["pull"] is True
+        assert [post_id for _, post_id in timelines.read_following_entries(viewer.id)] == [early.id]
+        assert set(redis.zsets[timelines.timeline_key(viewer.id)]) == {"0"}
+
+        Follow.objects.filter(follower=other).delete()
+        late = Post.objects.create(author=author, text="after dropping below the threshold")
+        assert fan_out_post(late)["pull"] is False
+        entries = timelines.read_following_entries(viewer.id)
+
+    assert [post_id for _, post_id in entries] == [late.id, early.id]
+
+
+@pytest.mark.django_db
+@override_settings(FEED_TIMELINES_ENABLED=True)
+def test_materialize_keeps_posts_pushed_while_it_reads_the_database():
+    redis = _InMemoryRedis()
+    viewer = _user("tl_race_viewer")
+    author = _user("tl_race_author")
+    Follow.objects.create(follower=viewer, followee=author)
+    load = timelines._entries_from_queryset
+    raced = []
+
+    def _load_then_push(queryset, limit):
+        entries = load(queryset, limit)
+        # A post commits and fans out after the reader's snapshot, before its ZADD.
+        post = Post.objects.create(author=author, text="raced")
+        fan_out_post(post)
+        raced.append(post)
+        return entries
+
+    with mock.patch("apps.feed.timelines.get_redis_client", return_value=redis):
+        with mock.patch("apps.feed.timelines._entries_from_queryset", side_effect=_load_then_push):
+            timelines._materialize(redis, viewer.id, {author.id})
+        assert str(raced[0].id) in redis.zsets[timelines.timeline_key(viewer.id)]
@@ -0,0 +1,39 @@
+from libs.merkle import (
+    PartitionedMerkleBuilder,
+    encode_row,
+    leaf_hash,
+    merkle_proof,
+    merkle_root,
+    row_inclusion_proof,
+    verify_inclusion,
+)
+
+
+def _rows(count):
+    return [encode_row({"id": index, "amount_cents": index * 10}) for index in range(count)]
+
+
+def test_every_leaf_proves_against_the_root():
+    for count in (1, 2, 5, 8):
+        rows = _rows(count)
+        leaves = [leaf_hash(row) for row in rows]
+        root = merkle_root(leaves)
+        for index, row in enumerate(rows):
+            assert verify_inclusion(row, merkle_proof(leaves, index), root)
+        assert not verify_inclusion(encode_row({"id": 0, "amount_cents": 1}), merkle_proof(leaves, 0), root)
+
+
+def test_partitioned_root_is_independent_of_worker_count():
+    days = {"2025-01-01": _rows(3), "2025-01-02": _rows(1), "2025-01-05": _rows(4)}
+    results = []
+    for workers in (1, 2):
+        with PartitionedMerkleBuilder(workers) as builder:
+            for day, rows in days.items():
+                for row in rows:
+                    builder.add(day, row)
+            results.append(builder.finish())
+    assert results[0] == results[1]
+
+    root, day_roots = results[0]
+    proof = row_inclusion_proof(days["2025-01-05"], 2, "2025-01-05", day_roots)
+    assert verify_inclusion(days["2025-01-05"][2], proof, root)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import uuid
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from apps.messaging.models import ThreadMember
+from tests.test_messaging_reliability import register_and_login
+
+
+class ThreadInboxTests(APITestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client_a = APIClient()
+        self.user_a = register_and_login(self.client_a, "inbox-a@example.com", "inboxa")
+        self.others = []
+        for index in range(3):
+            client = APIClient()
+            user = register_and_login(client, f"inbox-{index}@example.com", f"inboxpeer{index}")
+            self.others.append((client, user))
+
+    def _thread_with(self, client: APIClient, user: dict) -> str:
+        response = client.post("/api/v1/messaging/threads/direct/", {"user_id": self.user_a["id"]}, format="json")
+        self.assertIn(response.status_code, (status.HTTP_200_OK, status.HTTP_201_CREATED))
+        return str(response.data["id"])
+
+    def _send(self, client: APIClient, thread_id: str, body: str) -> int:
+        response = client.post(
+            "/api/v1/messaging/messages/",
+            {"thread": thread_id, "body": body, "client_uuid": uuid.uuid4().hex},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return int(response.data["id"])
+
+    def test_inbox_is_ordered_by_activity_and_counts_unread_without_message_queries(self) -> None:
+        thread_ids = []
+        for index, (client, user) in enumerate(self.others):
+            thread_id = self._thread_with(client, user)
+            thread_ids.append(thread_id)
+            for n in range(index + 1):
+                self._send(client, thread_id, f"hello {n} from {index}")
+        # A reply of our own moves the thread up and, until we mark the thread read, counts
+        # as unread like any other message after our last read one.
+        self._send(self.client_a, thread_ids[0], "reply")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_a.get("/api/v1/messaging/threads/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([q["sql"] for q in queries.captured_queries if '"messaging_message"' in q["sql"]])
+
+        self.assertEqual([str(t["id"]) for t in response.data], [thread_ids[0], thread_ids[2], thread_ids[1]])
+        by_id = {str(t["id"]): t for t in response.data}
+        self.assertEqual(by_id[thread_ids[0]]["unread_count"], 2)
+        self.assertEqual(by_id[thread_ids[0]]["last_message"]["body"], "reply")
+        self.assertEqual(by_id[thread_ids[1]]["unread_count"], 2)
+        self.assertEqual(by_id[thread_ids[2]]["unread_count"], 3)
+
+        read = self.client_a.post(f"/api/v1/messaging/threads/{thread_ids[2]}/read/", {}, format="json")
+        self.assertEqual(read.status_code, status.HTTP_200_OK)
+        membership = ThreadMember.objects.get(thread_id=int(thread_ids[2]), user_id=self.user_a["id"])
+        self.assertEqual(membership.unread_count, 0)
+
+    def test_keyset_pages_cover_the_inbox_once(self) -> None:
+        expected = []
+        for client, user in self.others:
+            thread_id = self._thread_with(client, user)
+            self._send(client, thread_id, "hi")
+            expected.insert(0, thread_id)
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client_a.get("/api/v1/messaging/threads/", params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(str(t["id"]) for t in response.data["results"])
+            cursor = response.data["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(seen, expected)
+
+        bad = self.client_a.get("/api/v1/messaging/threads/", {"cursor": "not-a-cursor"})
+        self.assertEqual(bad.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deleting_the_last_message_rewinds_the_inbox(self) -> None:
+        client, user = self.others[0]
+        thread_id = self._thread_with(client, user)
+        self._send(client, thread_id, "first")
+        second = self._send(client, thread_id, "second")
+
+        response = client.delete(f"/api/v1/messaging/messages/{second}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        membership = ThreadMember.objects.get(thread_id=int(thread_id), user_id=self.user_a["id"])
+        self.assertEqual(membership.last_message_preview, "first")
+        self.assertEqual(membership.unread_count, 1)
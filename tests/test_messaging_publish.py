@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.pubsub import publish_many
+from apps.messaging.events import publish_typing_event
+from apps.messaging.membership import get_thread_member_ids
+from apps.messaging.models import Thread, ThreadMember
+from apps.users.models import User
+
+
+def test_publish_many_serializes_once_and_pipelines() -> None:
+    client = Mock()
+    pipe = client.pipeline.return_value
+    with patch("apps.core.pubsub.get_redis_client", return_value=client), patch(
+        "apps.core.pubsub.json.dumps", wraps=json.dumps
+    ) as dumps:
+        sent = publish_many(["user:1", "user:2", "user:1", "user:3"], {"type": "typing"})
+
+    assert sent == 3
+    assert dumps.call_count == 1
+    assert [call.args[0] for call in pipe.publish.call_args_list] == ["user:1", "user:2", "user:3"]
+    pipe.execute.assert_called_once()
+    client.publish.assert_not_called()
+
+
+@override_settings(REALTIME_STREAMS_ENABLED=True, REALTIME_STREAM_MAXLEN=50)
+def test_user_channels_are_appended_to_replay_streams() -> None:
+    client = Mock()
+    pipe = client.pipeline.return_value
+    script = client.register_script.return_value
+    with patch("apps.core.pubsub.get_redis_client", return_value=client):
+        sent = publish_many(["user:7", "post:3", "user:8"], {"type": "message:new", "payload": {"id": "1"}})
+
+    assert sent == 3
+    client.register_script.assert_called_once()
+    assert [call.kwargs["keys"] for call in script.call_args_list] == [
+        ["realtime:stream:user:7"],
+        ["realtime:stream:user:8"],
+    ]
+    channel, maxlen, _, tail = script.call_args_list[0].kwargs["args"]
+    assert (channel, maxlen) == ("user:7", 50)
+    assert all(call.kwargs["client"] is pipe for call in script.call_args_list)
+    # What the Lua script publishes once Redis has assigned the stream id.
+    assert json.loads('{"event_id":"1700000000000-0"' + tail) == {
+        "event_id": "1700000000000-0",
+        "type": "message:new",
+        "payload": {"id": "1"},
+    }
+    assert [call.args[0] for call in pipe.publish.call_args_list] == ["post:3"]
+
+
+@pytest.mark.django_db
+def test_thread_events_use_cached_membership() -> None:
+    users = [
+        User.objects.create_user(email=f"pm{i}@example.com", password="pass1234", handle=f"pm{i}", name=f"PM {i}")
+        for i in range(4)
+    ]
+    thread = Thread.objects.create(is_group=True, created_by=users[0])
+    for user in users:
+        ThreadMember.objects.create(thread=thread, user=user)
+
+    with patch("apps.messaging.events.publish_events") as publish:
+        publish_typing_event(thread, users[0], True)
+        with CaptureQueriesContext(connection) as ctx:
+            publish_typing_event(thread, users[0], False)
+        assert not [q for q in ctx.captured_queries if "messaging_threadmember" in q["sql"]]
+        assert sorted(publish.call_args.args[0]) == sorted(f"user:{u.id}" for u in users[1:])
+
+        ThreadMember.objects.filter(thread=thread, user=users[3]).delete()
+        publish_typing_event(thread, users[0], True)
+        assert sorted(publish.call_args.args[0]) == sorted(f"user:{u.id}" for u in users[1:3])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_membership_cache_is_dropped_again_after_commit() -> None:
+    users = [
+        User.objects.create_user(email=f"pc{i}@example.com", password="pass1234", handle=f"pc{i}", name=f"PC {i}")
+        for i in range(2)
+    ]
+    thread = Thread.objects.create(is_group=True, created_by=users[0])
+    ThreadMember.objects.create(thread=thread, user=users[0])
+
+    with transaction.atomic():
+        ThreadMember.objects.create(thread=thread, user=users[1])
+        # A reader outside the transaction caches the pre-commit membership meanwhile.
+        cache.set(f"messaging:thread_members:{thread.id}", [users[0].id], 300)
+
+    assert sorted(get_thread_member_ids(thread.id)) == sorted(u.id for u in users)
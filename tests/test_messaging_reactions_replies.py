@@ -2,10 +2,54 @@ from __future__ import annotations
 
 from unittest import mock
 
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
+from apps.messaging import reactions as reactions_module
 from apps.messaging.models import MessageReaction
+from apps.messaging.reactions import counters_key, reaction_summaries
+
+
+class _CounterRedis:
+    """The HASH subset of redis-py used by the reaction counters, plus the fill and invalidate scripts."""
+
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[str, int]] = {}
+        self.versions: dict[str, int] = {}
+
+    def pipeline(self, transaction: bool = True) -> "_CounterRedis":
+        self._results: list = []
+        return self
+
+    def execute(self) -> list:
+        results, self._results = self._results, []
+        return results
+
+    def hgetall(self, key: str) -> None:
+        self._results.append({k.encode(): str(v).encode() for k, v in self.hashes.get(key, {}).items()})
+
+    def get(self, key: str) -> None:
+        self._results.append(str(self.versions[key]).encode() if key in self.versions else None)
+
+    def register_script(self, source: str):
+        def _fill(keys, args, client=None):
+            hash_key, version_key = keys
+            stored = str(self.versions[version_key]) if version_key in self.versions else ""
+            filled = hash_key not in self.hashes and stored == args[0]
+            if filled:
+                fields = args[2:]
+                self.hashes[hash_key] = {fields[i]: int(fields[i + 1]) for i in range(0, len(fields), 2)}
+            self._results.append(int(filled))
+
+        def _invalidate(keys, args, client=None):
+            self.hashes.pop(keys[0], None)
+            self.versions[keys[1]] = self.versions.get(keys[1], 0) + 1
+            return 1
+
+        return _fill if "HSET" in source else _invalidate
 
 
 def register_and_login(client: APIClient, email: str, handle: str) -> dict:
@@ -122,3 +166,72 @@ class MessagingReactionsRepliesTests(APITestCase):
             format="multipart",
         )
         self.assertEqual(invalid_reply.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def _message(self, thread_id: str, body: str) -> int:
+        response = self.sender_client.post(
+            "/api/v1/messaging/messages/",
+            {"thread": thread_id, "body": body, "client_uuid": body},
+            format="json",
+        )
+        return int(response.data["id"])
+
+    def test_message_list_loads_reactions_for_the_page_at_once(self) -> None:
+        thread_id = self._create_thread()
+        message_ids = [self._message(thread_id, f"page-{index}") for index in range(4)]
+        for message_id in message_ids:
+            MessageReaction.objects.create(message_id=message_id, user_id=self.sender["id"], emoji="👍")
+        MessageReaction.objects.create(message_id=message_ids[0], user_id=self.recipient["id"], emoji="👍")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.recipient_client.get("/api/v1/messaging/messages/", {"thread": thread_id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        reaction_queries = [q for q in queries.captured_queries if '"messaging_messagereaction"' in q["sql"]]
+        self.assertEqual(len(reaction_queries), 1)
+
+        by_id = {int(item["id"]): item["reactions"] for item in response.data["results"]}
+        self.assertEqual(by_id[message_ids[0]], [{"emoji": "👍", "count": 2, "reacted_by_current_user": True}])
+        self.assertEqual(by_id[message_ids[1]], [{"emoji": "👍", "count": 1, "reacted_by_current_user": False}])
+
+    @override_settings(MESSAGING_REACTION_COUNTERS_ENABLED=True)
+    def test_redis_counters_are_filled_on_read_and_dropped_on_toggles(self) -> None:
+        thread_id = self._create_thread()
+        message_id = self._message(thread_id, "counted")
+        redis = _CounterRedis()
+        url = f"/api/v1/messaging/messages/{message_id}/reactions/"
+        with mock.patch("apps.messaging.reactions.get_redis_client", return_value=redis):
+            self.assertEqual(reaction_summaries([message_id], self.recipient["id"]), {message_id: []})
+            self.assertEqual(redis.hashes[counters_key(message_id)], {"_": 0})
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.recipient_client.post(url, {"emoji": "🔥"}, format="json")
+                self.sender_client.post(url, {"emoji": "🔥"}, format="json")
+            self.assertNotIn(counters_key(message_id), redis.hashes)
+            reaction_summaries([message_id], self.recipient["id"])
+            self.assertEqual(redis.hashes[counters_key(message_id)], {"_": 0, "🔥": 2})
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.sender_client.post(url, {"emoji": "🔥"}, format="json")
+            summary = reaction_summaries([message_id], self.recipient["id"])
+        self.assertEqual(summary[message_id], [{"emoji": "🔥", "count": 1, "reacted_by_current_user": True}])
+
+    @override_settings(MESSAGING_REACTION_COUNTERS_ENABLED=True)
+    def test_fill_racing_a_reaction_is_not_cached(self) -> None:
+        thread_id = self._create_thread()
+        message_id = self._message(thread_id, "raced")
+        redis = _CounterRedis()
+        load = reactions_module._counts_from_database
+
+        def _load_then_react(*args, **kwargs):
+            loaded = load(*args, **kwargs)
+            # A reaction commits after the reader's query but before its fill.
+            with self.captureOnCommitCallbacks(execute=True):
+                MessageReaction.objects.create(message_id=message_id, user_id=self.sender["id"], emoji="🔥")
+                reactions_module.invalidate_reaction_counters(message_id)
+            return loaded
+
+        with mock.patch("apps.messaging.reactions.get_redis_client", return_value=redis):
+            with mock.patch("apps.messaging.reactions._counts_from_database", side_effect=_load_then_react):
+                self.assertEqual(reaction_summaries([message_id]), {message_id: []})
+            self.assertNotIn(counters_key(message_id), redis.hashes)
+            summary = reaction_summaries([message_id])
+        self.assertEqual(summary[message_id], [{"emoji": "🔥", "count": 1, "reacted_by_current_user": False}])
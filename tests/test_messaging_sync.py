@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import time
+import uuid
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from apps.messaging.models import MessageChange
+from apps.messaging.tasks import prune_message_changes
+from libs.idgen import min_id_for_timestamp
+from tests.test_messaging_reliability import register_and_login
+
+
+class ThreadSyncTests(APITestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.sender_client = APIClient()
+        self.recipient_client = APIClient()
+        self.sender = register_and_login(self.sender_client, "sync-sender@example.com", "syncsender")
+        self.recipient = register_and_login(self.recipient_client, "sync-recipient@example.com", "syncrecipient")
+        response = self.sender_client.post(
+            "/api/v1/messaging/threads/direct/", {"user_id": self.recipient["id"]}, format="json"
+        )
+        self.thread_id = str(response.data["id"])
+
+    def _send(self, body: str) -> int:
+        response = self.sender_client.post(
+            "/api/v1/messaging/messages/",
+            {"thread": self.thread_id, "body": body, "client_uuid": uuid.uuid4().hex},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return int(response.data["id"])
+
+    def _sync(self, **params) -> dict:
+        response = self.recipient_client.get(f"/api/v1/messaging/threads/{self.thread_id}/sync/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_pages_are_bounded_and_resume_from_next_version(self) -> None:
+        sent = [self._send(f"m{index}") for index in range(5)]
+
+        first = self._sync(limit=2)
+        self.assertTrue(first["has_more"])
+        self.assertEqual([int(m["id"]) for m in first["messages"]], sent[:2])
+
+        received = [int(m["id"]) for m in first["messages"]]
+        version = first["next_version"]
+        while True:
+            page = self._sync(version=version, limit=2)
+            received.extend(int(m["id"]) for m in page["messages"])
+            version = page["next_version"]
+            if not page["has_more"]:
+                break
+        self.assertEqual(received, sent)
+
+    def test_changes_carry_status_reactions_and_deletions(self) -> None:
+        kept = self._send("keep")
+        removed = self._send("remove")
+        version = str(removed)
+
+        self.recipient_client.post(f"/api/v1/messaging/messages/{kept}/reactions/", {"emoji": "🔥"}, format="json")
+        self.recipient_client.post(f"/api/v1/messaging/threads/{self.thread_id}/read/", {}, format="json")
+        self.assertEqual(
+            self.sender_client.delete(f"/api/v1/messaging/messages/{removed}/").status_code,
+            status.HTTP_204_NO_CONTENT,
+        )
+
+        page = self._sync(version=version)
+        self.assertEqual(page["messages"], [])
+        by_type = {(change["type"], int(change["id"])): change for change in page["changes"]}
+        self.assertEqual(by_type[("status", kept)]["status"], "read")
+        self.assertEqual(by_type[("reactions", kept)]["reactions"][0]["count"], 1)
+        self.assertIn(("delete", removed), by_type)
+        self.assertNotIn(("status", removed), by_type)
+
+    def test_query_count_does_not_grow_with_page_size(self) -> None:
+        def count_queries() -> int:
+            with CaptureQueriesContext(connection) as queries:
+                self._sync(limit=50)
+            return len(queries.captured_queries)
+
+        for index in range(3):
+            self._send(f"small {index}")
+        small = count_queries()
+        for index in range(12):
+            self._send(f"large {index}")
+        self.assertEqual(count_queries(), small)
+
+    def test_invalid_version_is_rejected(self) -> None:
+        response = self.recipient_client.get(f"/api/v1/messaging/threads/{self.thread_id}/sync/", {"version": "soon"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(MESSAGING_SYNC_RETENTION_DAYS=1)
+    def test_changes_past_retention_are_pruned_and_old_versions_resync(self) -> None:
+        kept = self._send("keep")
+        self.recipient_client.post(f"/api/v1/messaging/threads/{self.thread_id}/read/", {}, format="json")
+        two_days_ago = min_id_for_timestamp(int(time.time() * 1000) - 2 * 24 * 3600 * 1000)
+        MessageChange.objects.create(id=two_days_ago, thread_id=self.thread_id, message_id=kept, type="status")
+
+        self.assertEqual(prune_message_changes(), 1)
+        self.assertFalse(MessageChange.objects.filter(id=two_days_ago).exists())
+        self.assertTrue(MessageChange.objects.filter(message_id=kept).exists())
+
+        response = self.recipient_client.get(
+            f"/api/v1/messaging/threads/{self.thread_id}/sync/", {"version": str(two_days_ago)}
+        )
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertTrue(response.data["resync_required"])
+        self.assertEqual([int(m["id"]) for m in self._sync(version=0)["messages"]], [kept])
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+
+from apps.messaging.models import Message, Thread, ThreadMember
+from apps.notifications.consumers import notify_thread_message
+from apps.notifications.digest import DIGEST_TYPE, send_message_digests
+from apps.notifications.models import Notification
+from apps.notifications.tasks import flush_message_pushes
+from apps.users.models import Block, Device, Mute, User, UserSettings
+
+
+class _CoalesceRedis:
+    """MULTI pipelines over plain dicts: just the commands the push coalescer issues."""
+
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.strings: dict[str, str] = {}
+        self._queued: list = []
+
+    def pipeline(self, transaction: bool = True) -> "_CoalesceRedis":
+        self._queued = []
+        return self
+
+    def __getattr__(self, name: str):
+        def _queue(*args, **kwargs):
+            self._queued.append((name, args, kwargs))
+            return self
+
+        return _queue
+
+    def execute(self) -> list:
+        queued, self._queued = self._queued, []
+        return [getattr(self, f"_{name}")(*args, **kwargs) for name, args, kwargs in queued]
+
+    def _hincrby(self, key, field, amount):
+        entry = self.hashes.setdefault(key, {})
+        entry[field] = str(int(entry.get(field, 0)) + amount)
+        return int(entry[field])
+
+    def _hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = str(value)
+        return 1
+
+    def _expire(self, key, seconds):
+        return True
+
+    def _set(self, key, value, nx=False, ex=None):
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = str(value)
+        return True
+
+    def _hgetall(self, key):
+        return {k.encode(): v.encode() for k, v in self.hashes.get(key, {}).items()}
+
+    def _delete(self, *keys):
+        return sum(int(self.hashes.pop(k, None) is not None or self.strings.pop(k, None) is not None) for k in keys)
+
+
+class NotificationDispatchTests(TestCase):
+    def setUp(self) -> None:
+        self.sender = User.objects.create_user(email="group-sender@example.com", handle="gsender", password="pass12345")
+        self.thread = Thread.objects.create(created_by=self.sender, is_group=True, title="Group")
+        ThreadMember.objects.create(thread=self.thread, user=self.sender)
+
+    def _add_members(self, count: int, offset: int = 0) -> list[User]:
+        users = []
+        for index in range(offset, offset + count):
+            user = User.objects.create_user(
+                email=f"member{index}@example.com", handle=f"member{index}", password="pass12345"
+            )
+            ThreadMember.objects.create(thread=self.thread, user=user)
+            Device.objects.create(user=user, push_token=f"token-{index}", device_type="ios" if index % 2 else "android")
+            users.append(user)
+        return users
+
+    def _notify(self) -> int:
+        message = Message.objects.create(thread=self.thread, sender=self.sender, body="hello group")
+        with CaptureQueriesContext(connection) as queries:
+            notify_thread_message(message)
+        return len(queries.captured_queries)
+
+    @mock.patch("apps.notifications.services.send_provider_batch")
+    def test_query_count_is_constant_in_group_size(self, send_batch) -> None:
+        self._add_members(3)
+        small = self._notify()
+        self._add_members(12, offset=3)
+        self.assertEqual(self._notify(), small)
+        self.assertEqual(Notification.objects.filter(type="message:new").count(), 3 + 15)
+        # One batch per provider per message.
+        self.assertEqual(send_batch.call_count, 4)
+
+    @mock.patch("apps.notifications.services.send_provider_batch")
+    def test_push_skips_muted_disabled_and_quiet_recipients(self, send_batch) -> None:
+        muted, disabled, quiet, active = self._add_members(4)
+        Mute.objects.create(user=muted, target=self.sender)
+        UserSettings.objects.filter(user=disabled).update(push_enabled=False)
+        UserSettings.objects.filter(user=quiet).update(quiet_hours={"start": "00:00", "end": "23:59"})
+
+        self._notify()
+
+        pushed = {device.user_id for call in send_batch.call_args_list for device in call.args[1]}
+        self.assertEqual(pushed, {active.id})
+        # Muting and quiet hours only silence pushes; every member still gets the in-app row.
+        self.assertEqual(Notification.objects.filter(type="message:new").count(), 4)
+
+    @override_settings(NOTIFICATIONS_PUSH_COALESCE_SECONDS=10)
+    @mock.patch("apps.notifications.services.send_provider_batch")
+    def test_burst_of_messages_becomes_one_push_per_member(self, send_batch) -> None:
+        members = self._add_members(2)
+        redis = _CoalesceRedis()
+        with mock.patch("apps.notifications.coalesce.get_redis_client", return_value=redis), mock.patch(
+            "apps.notifications.consumers.flush_message_pushes.apply_async"
+        ) as schedule:
+            for _ in range(5):
+                self._notify()
+            # Only the first message of the burst schedules a flush.
+            schedule.assert_called_once()
+            (user_ids, thread_id), kwargs = schedule.call_args.args[0], schedule.call_args.kwargs
+            self.assertEqual(sorted(user_ids), sorted(user.id for user in members))
+            self.assertEqual(kwargs["countdown"], 10)
+
+            self.assertEqual(flush_message_pushes(user_ids, thread_id), 2)
+            self.assertEqual(flush_message_pushes(user_ids, thread_id), 0)
+
+            self._notify()
+            self.assertEqual(schedule.call_count, 2)
+
+        payloads = [call.args[2].payload for call in send_batch.call_args_list]
+        self.assertEqual(len(payloads), 2)  # one batch per provider
+        self.assertTrue(all(payload["count"] == 5 for payload in payloads))
+
+    @mock.patch("apps.notifications.services.send_provider_batch")
+    def test_digest_subscribers_get_a_summary_on_top_of_pushes(self, send_batch) -> None:
+        subscriber, regular = self._add_members(2)
+        UserSettings.objects.filter(user=subscriber).update(digest_enabled=True)
+        for _ in range(3):
+            self._notify()
+        pushed = {device.user_id for call in send_batch.call_args_list for device in call.args[1]}
+        self.assertEqual(pushed, {subscriber.id, regular.id})
+
+        with mock.patch("apps.notifications.digest.send_provider_batch") as send_digest:
+            self.assertEqual(send_message_digests(timezone.now() - timedelta(days=1)), 1)
+        digest = Notification.objects.get(type=DIGEST_TYPE)
+        self.assertEqual(digest.user_id, subscriber.id)
+        self.assertEqual(digest.payload["message_count"], 3)
+        self.assertEqual([device.user_id for device in send_digest.call_args.args[1]], [subscriber.id])
+
+    def test_digest_leaves_out_own_muted_and_blocked_messages(self) -> None:
+        (subscriber,) = self._add_members(1)
+        UserSettings.objects.filter(user=subscriber).update(digest_enabled=True)
+        muted = User.objects.create_user(email="digest-muted@example.com", handle="dmuted", password="pass12345")
+        blocked = User.objects.create_user(email="digest-blocked@example.com", handle="dblocked", password="pass12345")
+        for user in (muted, blocked):
+            ThreadMember.objects.create(thread=self.thread, user=user)
+        Mute.objects.create(user=subscriber, target=muted)
+        Block.objects.create(user=blocked, target=subscriber)
+
+        for sender in (self.sender, subscriber, muted, blocked, muted):
+            Message.objects.create(thread=self.thread, sender=sender, body="hi")
+
+        with mock.patch("apps.notifications.digest.send_provider_batch"):
+            self.assertEqual(send_message_digests(timezone.now() - timedelta(days=1)), 1)
+        digest = Notification.objects.get(type=DIGEST_TYPE)
+        self.assertEqual(digest.payload["message_count"], 1)
+        self.assertEqual(digest.payload["thread_count"], 1)
+
+        Mute.objects.all().delete()
+        Message.objects.filter(sender=self.sender).delete()
+        Notification.objects.all().delete()
+        with mock.patch("apps.notifications.digest.send_provider_batch"):
+            self.assertEqual(send_message_digests(timezone.now() - timedelta(days=1)), 1)
+        self.assertEqual(Notification.objects.get(type=DIGEST_TYPE).payload["message_count"], 2)
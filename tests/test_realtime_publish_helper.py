@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import threading
 from unittest.mock import Mock, patch
 
 import pytest
+from django.test import override_settings
+from prometheus_client import REGISTRY
 
-from apps.realtime.publish import publish_realtime_event
+from apps.realtime.publish import RealtimePublisher, publish_realtime_event
 
 
 def _payload() -> dict:
@@ -12,13 +15,15 @@ def _payload() -> dict:
 
 
 @pytest.mark.django_db
+@override_settings(REALTIME_PUBLISH_URL="http://realtime:8001", REALTIME_PUBLISH_ASYNC=False)
 def test_publish_http_success_skips_redis() -> None:
-    with patch("apps.realtime.publish.requests.post") as mocked_post, patch(
+    session = Mock()
+    with patch("apps.realtime.publish._session", return_value=session), patch(
         "apps.realtime.publish.publish_event"
     ) as mocked_redis:
-        mocked_post.return_value = Mock(ok=True)
+        session.post.return_value = Mock(ok=True)
         publish_realtime_event("post:1", _payload(), context={"event_id": 1})
-        assert mocked_post.called
+        assert session.post.call_args.args[0] == "http://realtime:8001/internal/publish"
         assert mocked_redis.called is False
 
 
@@ -30,3 +35,42 @@ def test_publish_http_failure_falls_back_to_redis() -> None:
         mocked_post.return_value = Mock(ok=False, status_code=500)
         publish_realtime_event("post:1", _payload(), context={"event_id": 1})
         assert mocked_redis.called is True
+
+
+def _dropped() -> float:
+    return REGISTRY.get_sample_value("realtime_publish_events_total", {"outcome": "dropped"}) or 0.0
+
+
+@override_settings(REALTIME_PUBLISH_URL="http://realtime:8001")
+def test_background_publisher_batches_and_drops_when_full() -> None:
+    release = threading.Event()
+    session = Mock()
+    bodies: list[dict] = []
+
+    def _post(url, json, timeout):
+        release.wait(5)
+        bodies.append(json)
+        return Mock(ok=True)
+
+    session.post.side_effect = _post
+    publisher = RealtimePublisher(queue_size=2, batch_size=10, linger=0.0)
+    dropped_before = _dropped()
+    with patch("apps.realtime.publish._session", return_value=session), patch(
+        "apps.realtime.publish.publish_event"
+    ) as mocked_redis:
+        assert publisher.submit("post:1", _payload())
+        # Let the worker take the first event and block on the gateway.
+        for _ in range(100):
+            if publisher._queue.empty():
+                break
+            threading.Event().wait(0.01)
+        assert publisher.submit("post:2", _payload())
+        assert publisher.submit("post:3", _payload())
+        assert publisher.submit("post:4", _payload()) is False
+        release.set()
+        publisher.flush()
+
+    assert _dropped() - dropped_before == 1
+    assert [[e["channel"] for e in body["events"]] for body in bodies] == [["post:1"], ["post:2", "post:3"]]
+    assert session.post.call_args.args[0] == "http://realtime:8001/internal/publish/batch"
+    mocked_redis.assert_not_called()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from apps.coin.models import CoinEvent, CoinEventType
+from apps.payments.models import GiftType
+from apps.social.models import Comment, CommentLike, PaidReaction, PaidReactionTargetType, Post, PostLike
+from apps.social.serializers import CommentSerializer, PostSerializer
+from apps.users.models import User
+
+
+def _request_for(user: User):
+    request = APIRequestFactory().get("/api/v1/feed/for_you/")
+    request.user = user
+    return request
+
+
+def _gift(sender: User, gift_type: GiftType, *, post: Post | None = None, comment: Comment | None = None):
+    return PaidReaction.objects.create(
+        sender=sender,
+        target_type=PaidReactionTargetType.POST if post else PaidReactionTargetType.COMMENT,
+        post=post,
+        comment=comment,
+        gift_type=gift_type,
+        quantity=1,
+        total_amount_cents=100,
+        coin_event=CoinEvent.objects.create(event_type=CoinEventType.SPEND),
+    )
+
+
+def _serialize_posts(posts, viewer):
+    queryset = Post.objects.filter(id__in=[p.id for p in posts]).select_related(
+        "author", "author__settings", "video"
+    ).prefetch_related("media", "images").order_by("id")
+    return PostSerializer(list(queryset), many=True, context={"request": _request_for(viewer)}).data
+
+
+@pytest.mark.django_db
+def test_post_list_viewer_state_matches_single_object_path() -> None:
+    viewer = User.objects.create_user(email="vs1@example.com", password="pass1234", handle="vs1", name="Viewer")
+    author = User.objects.create_user(email="vs2@example.com", password="pass1234", handle="vs2", name="Author")
+    gift_type = GiftType.objects.create(key="vs_rose", name="Rose", price_cents=100, price_slc_cents=100)
+    posts = [Post.objects.create(author=author, text=f"post {i}") for i in range(3)]
+    PostLike.objects.create(user=viewer, post=posts[1])
+    for _ in range(7):
+        _gift(viewer, gift_type, post=posts[0])
+
+    many = _serialize_posts(posts, viewer)
+    single = [PostSerializer(post, context={"request": _request_for(viewer)}).data for post in posts]
+
+    assert [item["viewer_has_liked"] for item in many] == [False, True, False]
+    assert [item["liked"] for item in many] == [False, True, False]
+    assert len(many[0]["recent_gifts"]) == 5
+    for bulk_item, single_item in zip(many, single):
+        assert bulk_item["viewer_has_liked"] == single_item["viewer_has_liked"]
+        assert [g["id"] for g in bulk_item["recent_gifts"]] == [g["id"] for g in single_item["recent_gifts"]]
+
+
+@pytest.mark.django_db
+def test_post_list_viewer_state_query_count_is_constant() -> None:
+    viewer = User.objects.create_user(email="vs3@example.com", password="pass1234", handle="vs3", name="Viewer")
+    author = User.objects.create_user(email="vs4@example.com", password="pass1234", handle="vs4", name="Author")
+    gift_type = GiftType.objects.create(key="vs_star", name="Star", price_cents=100, price_slc_cents=100)
+
+    def _measure(count: int) -> int:
+        posts = [Post.objects.create(author=author, text=f"post {i}") for i in range(count)]
+        for post in posts:
+            PostLike.objects.create(user=viewer, post=post)
+            _gift(viewer, gift_type, post=post)
+        with CaptureQueriesContext(connection) as ctx:
+            _serialize_posts(posts, viewer)
+        viewer_tables = ("social_postlike", "social_paidreaction", "payments_gifttype")
+        return sum(1 for query in ctx.captured_queries if any(t in query["sql"] for t in viewer_tables))
+
+    assert _measure(2) == _measure(10)
+
+
+@pytest.mark.django_db
+def test_comment_list_uses_viewer_state() -> None:
+    viewer = User.objects.create_user(email="vs5@example.com", password="pass1234", handle="vs5", name="Viewer")
+    post = Post.objects.create(author=viewer, text="post")
+    gift_type = GiftType.objects.create(key="vs_moon", name="Moon", price_cents=100, price_slc_cents=100)
+    comments = [Comment.objects.create(post=post, author=viewer, text=f"c{i}") for i in range(3)]
+    CommentLike.objects.create(user=viewer, comment=comments[2])
+    _gift(viewer, gift_type, comment=comments[0])
+
+    data = CommentSerializer(
+        list(Comment.objects.filter(post=post).select_related("author").order_by("id")),
+        many=True,
+        context={"request": _request_for(viewer)},
+    ).data
+
+    assert [item["viewer_has_liked"] for item in data] == [False, False, True]
+    assert [len(item["recent_gifts"]) for item in data] == [1, 0, 0]
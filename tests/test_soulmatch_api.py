@@ -108,3 +108,25 @@ class SoulmatchAPITests(BaseAPITestCase):
         self.assertIn("lens_reason_short", item)
         self.assertEqual(item.get("explanation_level"), "premium")
         self.assertIn("explanation", item)
+
+    @mock.patch("apps.matching.views.soulmatch_precompute_candidates_task.apply_async")
+    def test_recommendations_async_enqueues_precompute_then_serves_cache(self, mock_task) -> None:
+        mock_task.return_value.id = "task-precompute-1"
+
+        resp = self.client.get("/api/v1/soulmatch/recommendations/?async=true")
+        self.assertEqual(resp.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(resp.data["task_id"], "task-precompute-1")
+        mock_task.assert_called_once()
+
+        resp_repeat = self.client.get("/api/v1/soulmatch/recommendations/?async=true")
+        self.assertEqual(resp_repeat.status_code, status.HTTP_202_ACCEPTED)
+        mock_task.assert_called_once()
+
+        warm = self.client.get("/api/v1/soulmatch/recommendations/")
+        self.assertEqual(warm.status_code, status.HTTP_200_OK)
+        resp_ready = self.client.get("/api/v1/soulmatch/recommendations/?async=true")
+        self.assertEqual(resp_ready.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(item["user"]["id"] for item in resp_ready.data),
+            sorted(item["user"]["id"] for item in warm.data),
+        )
@@ -2,10 +2,16 @@ from __future__ import annotations
 
 from datetime import date, time
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from apps.astro.models import BirthData, NatalChart
-from apps.matching.services.soulmatch import calculate_soulmatch
+from apps.coin.models import CoinAccount
+from apps.matching.models import SoulmatchFeatures, SoulMatchResult
+from apps.matching.services.batch_scoring import score_candidates
+from apps.matching.services.features import build_features, load_features
+from apps.matching.services.soulmatch import calculate_soulmatch, calculate_soulmatch_many
 from apps.profile.models import UserProfile
 from apps.users.models import User
 
@@ -86,3 +92,97 @@ class SoulmatchServiceTests(TestCase):
     def test_same_user_raises(self) -> None:
         with self.assertRaises(ValueError):
             calculate_soulmatch(self.user_a, self.user_a)
+
+    def test_batch_scoring_matches_pairwise_and_caches(self) -> None:
+        user_c = User.objects.create_user(email="c@example.com", password="pass123", handle="c", name="User C")
+        _make_chart(self.user_a, "Aries", "Aries", "Leo")
+        _make_chart(self.user_b, "Cancer", "Taurus", "Pisces")
+        UserProfile.objects.create(user=self.user_a, values=["growth"], love_language=["words"])
+        UserProfile.objects.create(user=user_c, values=["growth", "family"], attachment_style="anxious")
+
+        candidates = [self.user_b.id, user_c.id]
+        batch = calculate_soulmatch_many(self.user_a, candidates + [self.user_a.id])
+        self.assertEqual(set(batch), set(candidates))
+        for candidate in (self.user_b, user_c):
+            self.assertEqual(batch[candidate.id], calculate_soulmatch(self.user_a, candidate))
+
+        cached = score_candidates(self.user_a, candidates, rules_version="test")
+        self.assertEqual(cached, batch)
+        self.assertEqual(SoulMatchResult.objects.filter(rules_version="test").count(), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(score_candidates(self.user_a, candidates, rules_version="test"), batch)
+
+    def test_precomputed_features_track_profile_and_chart_saves(self) -> None:
+        users = [self.user_a, self.user_b]
+        for idx in range(4):
+            users.append(
+                User.objects.create_user(
+                    email=f"f{idx}@example.com", password="pass123", handle=f"f{idx}", name=f"User F{idx}"
+                )
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            _make_chart(users[0], "Aries", "Aries", "Leo")
+            _make_chart(users[1], "Gemini", "Gemini", "Libra")
+            _make_chart(users[2], "Cancer", "Taurus", "Virgo")
+            _make_chart(users[3], "Taurus", "Capricorn", "Aries")
+            profile_a = UserProfile.objects.create(
+                user=users[0], values=["growth", "freedom"], attachment_style="anxious", love_language=["words"]
+            )
+            UserProfile.objects.create(user=users[1], values=["growth"], attachment_style="avoidant")
+            UserProfile.objects.create(user=users[2], preferred_lifestyle=["travel"], attachment_style="secure")
+            UserProfile.objects.create(user=users[4], values=["family", "freedom"], love_language=["words", "touch"])
+
+        self.assertTrue(SoulmatchFeatures.objects.filter(user=users[0], has_profile=True).exists())
+        candidate_ids = [user.id for user in users[1:]]
+        batch = calculate_soulmatch_many(users[0], candidate_ids)
+        for candidate in users[1:]:
+            self.assertEqual(batch[candidate.id], calculate_soulmatch(users[0], candidate))
+
+        profile_a.values = ["family"]
+        profile_a.attachment_style = "secure"
+        with self.captureOnCommitCallbacks(execute=True):
+            profile_a.save()
+        with self.assertNumQueries(1):
+            batch = calculate_soulmatch_many(users[0], candidate_ids)
+        for candidate in users[1:]:
+            self.assertEqual(batch[candidate.id], calculate_soulmatch(users[0], candidate))
+
+    def test_feature_refresh_waits_for_commit_and_skips_deleted_users(self) -> None:
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            UserProfile.objects.create(user=self.user_a, values=["growth"])
+        self.assertFalse(SoulmatchFeatures.objects.filter(user=self.user_a).exists())
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertTrue(SoulmatchFeatures.objects.filter(user=self.user_a, has_profile=True).exists())
+
+        _make_chart(self.user_a, "Aries", "Aries", "Leo")
+        CoinAccount.objects.filter(user=self.user_a).delete()  # PROTECTs the user; empty here.
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.user_a.delete()
+        self.assertEqual(callbacks, [])
+        self.assertFalse(SoulmatchFeatures.objects.filter(user_id=self.user_a.id).exists())
+
+    def test_cold_feature_load_takes_a_fixed_number_of_queries(self) -> None:
+        def cold_load(count: int, offset: int) -> tuple[int, dict]:
+            ids = []
+            for idx in range(offset, offset + count):
+                user = User.objects.create_user(
+                    email=f"cold{idx}@example.com", password="pass123", handle=f"cold{idx}", name=f"Cold {idx}"
+                )
+                _make_chart(user, "Aries", "Taurus", "Leo")
+                UserProfile.objects.create(user=user, values=["growth", "family"], love_language=["words"])
+                ids.append(user.id)
+            SoulmatchFeatures.objects.all().delete()
+            with CaptureQueriesContext(connection) as queries:
+                features = load_features(ids)
+            return len(queries.captured_queries), features
+
+        cold_load(1, 0)  # Assigns the token bits.
+        small, _ = cold_load(2, 1)
+        large, features = cold_load(6, 3)
+        self.assertEqual(large, small)
+        self.assertEqual(SoulmatchFeatures.objects.count(), 6)
+        for user_id, row in features.items():
+            profile = UserProfile.objects.get(user_id=user_id)
+            self.assertEqual(row, build_features(profile, NatalChart.objects.get(user_id=user_id)))
+            self.assertEqual(load_features([user_id])[user_id], row)